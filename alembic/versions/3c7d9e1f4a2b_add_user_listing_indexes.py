@@ -0,0 +1,37 @@
+"""add user listing indexes
+
+Revision ID: 3c7d9e1f4a2b
+Revises: 900aa6c58b72
+Create Date: 2026-10-18 09:12:41.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7d9e1f4a2b'
+down_revision: Union[str, None] = '900aa6c58b72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run in a transaction: build without locking users against writes
+    with op.get_context().autocommit_block():
+        # Keyset pagination on (created_at, user_id) over live users
+        op.create_index('ix_users_created_at_user_id', 'users', ['created_at', 'user_id'], unique=False, postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True)
+        op.create_index('ix_users_account_type_created_at_user_id', 'users', ['account_type', 'created_at', 'user_id'], unique=False, postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True)
+        # Role and location filters
+        op.create_index('ix_user_roles_role_name_user_id', 'user_roles', ['role_name', 'user_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_user_profiles_province_city', 'user_profiles', ['province', 'city'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_user_profiles_province_city', table_name='user_profiles', postgresql_concurrently=True)
+        op.drop_index('ix_user_roles_role_name_user_id', table_name='user_roles', postgresql_concurrently=True)
+        op.drop_index('ix_users_account_type_created_at_user_id', table_name='users', postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True)
+        op.drop_index('ix_users_created_at_user_id', table_name='users', postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True)
@@ -0,0 +1,153 @@
+"""Shared API dependencies"""
+
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+
+from app.core.permissions import permission_bit
+from app.db.admission import DatabaseOverloaded, db_admission
+from app.db.replicas import has_recent_write, is_connection_error
+from app.db.session import get_db, db_session, get_async_engine, get_replica_router, AsyncSessionLocal
+from app.schemas.user import CurrentUser
+from app.services.permission_service import PermissionService
+from app.utils.tokens import decode_token, TokenError
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> CurrentUser:
+    """
+    Identify the caller from the bearer access token
+    
+    Verification happens in-process (cached keys), so no database access is
+    needed. Endpoints that need fresh user data load it themselves.
+    
+    Usage in FastAPI:
+        @router.get("/things")
+        async def list_things(current_user: CurrentUser = Depends(get_current_user)):
+            ...
+    """
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    
+    try:
+        claims = decode_token(credentials.credentials)
+    except TokenError:
+        raise _unauthorized("Invalid or expired token")
+    
+    return CurrentUser(
+        user_id=claims['sub'],
+        account_type=claims.get('account_type', ''),
+        roles=claims.get('roles', [])
+    )
+
+async def get_read_db(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Database session for read-only endpoints (a replica when configured)
+    
+    Falls back to the primary when there are no healthy replicas, or when
+    the caller, or the user named by the {user_id} path parameter, was
+    written within the last REPLICA_STICKINESS_SECONDS (read-your-writes).
+    Never write through this session.
+    
+    Usage in FastAPI:
+        @router.get("/me")
+        async def read_me(db: AsyncSession = Depends(get_read_db)):
+            ...
+    """
+    replica_router = get_replica_router()
+    engine = replica_router.choose()
+    if engine is not None:
+        subjects = {current_user.user_id, request.path_params.get("user_id")} - {None}
+        for user_id in subjects:
+            if await has_recent_write(user_id):
+                engine = None
+                break
+    replica_router.record_read(engine)
+    
+    async with db_admission.slot():
+        async with AsyncSessionLocal(bind=engine or get_async_engine()) as db:
+            try:
+                yield db
+            except Exception as e:
+                # Stop sending reads to a replica that cannot be reached;
+                # the client gets a 503 and its retry goes elsewhere
+                if engine is not None and is_connection_error(e):
+                    replica_router.mark_down(engine)
+                    raise DatabaseOverloaded("Read replica unavailable") from e
+                raise
+
+def require_permission(name: str, hold_session: bool = True, read_only: bool = False):
+    """
+    Dependency factory: require a permission such as "receipts:read"
+    
+    The permission name is resolved to its bit once, here. Per request, a
+    cached user costs one dict lookup and a bitwise AND; only a cache miss
+    queries user_roles. Roles scoped to an organization apply when the
+    request sends an X-Organization-ID header (a UUID, 422 otherwise).
+    
+    With hold_session=False the check uses its own short session, so the
+    endpoint runs without a database slot (e.g. while receiving an upload).
+    
+    With read_only=True the check runs on the get_read_db session, which
+    FastAPI hands to the endpoint as well: read endpoints take one
+    admission slot and one session per request, not two.
+    
+    Usage in FastAPI:
+        @router.get("/receipts")
+        async def list_receipts(
+            current_user: CurrentUser = Depends(require_permission("receipts:read"))
+        ):
+            ...
+    """
+    bit = permission_bit(name)  # Fails at import time for typos
+    
+    async def check(db: AsyncSession, current_user: CurrentUser, organization_id: Optional[UUID]) -> CurrentUser:
+        mask = await PermissionService.get_permissions(
+            db, current_user.user_id, str(organization_id) if organization_id else None
+        )
+        
+        if not mask & bit:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Missing permission: {name}"
+            )
+        return current_user
+    
+    async def check_permission(
+        current_user: CurrentUser = Depends(get_current_user),
+        x_organization_id: Optional[UUID] = Header(None),
+        db: AsyncSession = Depends(get_db)
+    ) -> CurrentUser:
+        return await check(db, current_user, x_organization_id)
+    
+    async def check_permission_read(
+        current_user: CurrentUser = Depends(get_current_user),
+        x_organization_id: Optional[UUID] = Header(None),
+        db: AsyncSession = Depends(get_read_db)
+    ) -> CurrentUser:
+        return await check(db, current_user, x_organization_id)
+    
+    async def check_permission_released(
+        current_user: CurrentUser = Depends(get_current_user),
+        x_organization_id: Optional[UUID] = Header(None)
+    ) -> CurrentUser:
+        async with db_session() as db:
+            return await check(db, current_user, x_organization_id)
+    
+    if not hold_session:
+        return check_permission_released
+    return check_permission_read if read_only else check_permission
@@ -0,0 +1,80 @@
+"""HTTP middleware"""
+
+from starlette.datastructures import MutableHeaders
+import logging
+import time
+
+from app.core.metrics import HTTP_REQUEST_DURATION
+from app.db.instrumentation import start_query_stats, stop_query_stats
+
+logger = logging.getLogger("app.request")
+
+class RequestTimingMiddleware:
+    """
+    Per-request timing: Server-Timing header + one structured log line
+    
+    The header reports database time and statement count next to the
+    total time spent before the response started, e.g.
+    
+        Server-Timing: db;dur=3.41;desc="2 queries", app;dur=12.80
+        
+    The log line carries the same numbers as extra fields (method, path,
+    status, duration_ms, db_queries, db_ms) and covers the whole request,
+    including the body of streamed responses.
+    
+    The duration also goes to the http_request_duration_seconds histogram,
+    labelled with the route template (/api/v1/users/{user_id}), not the
+    raw path, to keep the number of series bounded.
+    
+    Written as plain ASGI (not BaseHTTPMiddleware) so the request runs in
+    the same task and the overhead stays small.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+            
+        started_at = time.perf_counter()
+        stats, token = start_query_stats()
+        status_code = 500
+        
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - started_at) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries", app;dur={elapsed_ms:.2f}'
+                )
+            await send(message)
+            
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_query_stats(token)
+            duration_ms = (time.perf_counter() - started_at) * 1000
+            route = scope.get("route")  # Set by the router on a match
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status_code
+            ).observe(duration_ms / 1000)
+            logger.info(
+                "%s %s %s %.1fms db=%d/%.1fms",
+                scope["method"], scope["path"], status_code,
+                duration_ms, stats.count, stats.total_ms,
+                extra={
+                    'method': scope["method"],
+                    'path': scope["path"],
+                    'status': status_code,
+                    'duration_ms': round(duration_ms, 2),
+                    'db_queries': stats.count,
+                    'db_ms': round(stats.total_ms, 2)
+                }
+            )
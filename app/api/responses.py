@@ -0,0 +1,40 @@
+"""Response classes"""
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from starlette.responses import Response
+
+# What is this?
+# ─────────────
+# Returning a pydantic model from an endpoint makes FastAPI dump it to a
+# dict, validate that dict against response_model again, run it through
+# jsonable_encoder and finally json.dumps it: three passes over data that
+# is already valid. Returning a Response skips all of that, so the user
+# endpoints build their schema object once and hand it to
+# PydanticJSONResponse, which serializes it in one pass with pydantic-core.
+# Pre-serialized JSON (the user cache stores bytes) is sent as-is.
+#
+# Everything else (dicts, errors) goes through ORJSONResponse, the app's
+# default response class.
+
+__all__ = ['ORJSONResponse', 'PydanticJSONResponse']
+
+class PydanticJSONResponse(Response):
+    """
+    JSON response rendered straight from a pydantic model (or JSON bytes)
+    
+    Usage:
+        return PydanticJSONResponse(UserResponse.model_validate(user))
+        return PydanticJSONResponse(cached_json_bytes)
+        
+    Keep response_model on the route: it still documents the schema.
+    """
+    
+    media_type = "application/json"
+    
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        raise TypeError(f"Expected a pydantic model or bytes, got {type(content).__name__}")
@@ -0,0 +1,173 @@
+"""Streaming file uploads (request body → storage, chunk by chunk)"""
+
+from typing import AsyncIterator, List, Optional, Tuple
+
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+# What is this?
+# ─────────────
+# FastAPI's UploadFile reads the whole multipart body before the endpoint
+# runs (spooled to a temporary file past 1 MB). UploadStream instead hands
+# the endpoint the file's bytes as they come off the socket, so they can go
+# straight to object storage with memory bounded by the chunk size.
+#
+# Two request forms are accepted:
+#   - multipart/form-data with a "file" field (what browsers send); other
+#     fields are skipped
+#   - the raw file as the body, with its own Content-Type
+#     (e.g. image/jpeg) and an optional ?filename= query parameter
+
+class UploadError(ValueError):
+    """Raised when the request body is not a usable upload"""
+
+
+class UploadStream:
+    """
+    The uploaded file of a request, read incrementally
+    
+    Usage:
+        upload = UploadStream(request)
+        await upload.start()          # Reads up to the file's headers
+        upload.content_type, upload.filename
+        async for chunk in upload:    # The file's bytes
+            ...
+    """
+    
+    def __init__(self, request: Request, field: str = "file"):
+        self.request = request
+        self.field = field
+        self.content_type: Optional[str] = None
+        self.filename: Optional[str] = None
+        self._body: Optional[AsyncIterator[bytes]] = None
+        self._parser: Optional[MultipartParser] = None
+        self._events: List[Tuple[str, bytes]] = []
+        self._buffered: List[bytes] = []  # File data parsed, not yet yielded
+        self._in_file = False
+        self._found = False
+        self._done = False
+        
+    @property
+    def is_multipart(self) -> bool:
+        return self._parser is not None
+        
+    async def start(self) -> None:
+        """
+        Read the file's metadata (for multipart, up to the file part's headers)
+        
+        Raises:
+            UploadError: If the body has no file
+        """
+        self._body = self.request.stream()
+        content_type, options = parse_options_header(self.request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data":
+            self.content_type = content_type.decode("latin-1") or None
+            self.filename = self.request.query_params.get("filename")
+            return
+            
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise UploadError("Missing multipart boundary")
+        self._start_multipart(boundary)
+        
+        # Feed the parser until the file part's headers are in
+        while not self._done:
+            chunk = await self._next_body_chunk()
+            if chunk is None:
+                break
+            if self._feed(chunk):
+                return
+        raise UploadError(f"Missing '{self.field}' file in the form")
+        
+    async def _next_body_chunk(self) -> Optional[bytes]:
+        try:
+            return await self._body.__anext__()
+        except StopAsyncIteration:
+            return None
+            
+    def _start_multipart(self, boundary: bytes) -> None:
+        part = {'headers': {}, 'field': b"", 'value': b""}
+        
+        def on_part_begin():
+            part['headers'] = {}
+            
+        def on_header_field(data, start, end):
+            part['field'] += data[start:end]
+            
+        def on_header_value(data, start, end):
+            part['value'] += data[start:end]
+            
+        def on_header_end():
+            part['headers'][part['field'].lower()] = part['value']
+            part['field'] = part['value'] = b""
+            
+        def on_headers_finished():
+            self._events.append(('headers', part['headers']))
+            
+        def on_part_data(data, start, end):
+            self._events.append(('data', bytes(data[start:end])))
+            
+        def on_part_end():
+            self._events.append(('end', b""))
+            
+        self._parser = MultipartParser(boundary, {
+            'on_part_begin': on_part_begin,
+            'on_header_field': on_header_field,
+            'on_header_value': on_header_value,
+            'on_header_end': on_header_end,
+            'on_headers_finished': on_headers_finished,
+            'on_part_data': on_part_data,
+            'on_part_end': on_part_end,
+        })
+        
+    def _feed(self, chunk: bytes) -> bool:
+        """
+        Parse one body chunk; the file's data goes to self._buffered
+        
+        Returns:
+            True once the file part's headers have been seen
+        """
+        self._parser.write(chunk)
+        events, self._events = self._events, []
+        for kind, value in events:
+            if kind == 'headers':
+                disposition, options = parse_options_header(value.get(b"content-disposition", b""))
+                name = options.get(b"name", b"").decode("utf-8", "replace")
+                if not self._found and name == self.field and b"filename" in options:
+                    self._found = self._in_file = True
+                    self.filename = options[b"filename"].decode("utf-8", "replace") or None
+                    content_type = value.get(b"content-type", b"").decode("latin-1")
+                    self.content_type = content_type.split(";")[0].strip().lower() or None
+            elif kind == 'data':
+                if self._in_file:
+                    self._buffered.append(value)
+            elif kind == 'end':
+                if self._in_file:
+                    self._in_file = False
+                    self._done = True
+        return self._found
+        
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        if self._body is None:
+            await self.start()
+            
+        if not self.is_multipart:
+            async for chunk in self._body:
+                if chunk:
+                    yield chunk
+            return
+            
+        while True:
+            buffered, self._buffered = self._buffered, []
+            for chunk in buffered:
+                yield chunk
+            if self._done:
+                break
+            chunk = await self._next_body_chunk()
+            if chunk is None:
+                raise UploadError("Upload ended before the end of the file")
+            self._feed(chunk)
+            
+        # Skip the rest of the form
+        while await self._next_body_chunk() is not None:
+            pass
@@ -0,0 +1,30 @@
+"""Dashboard API endpoints"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.api.deps import get_read_db, require_permission
+from app.api.responses import PydanticJSONResponse
+from app.services.summary_service import SummaryService
+from app.schemas.user import CurrentUser
+from app.schemas.receipt import DashboardResponse
+
+router = APIRouter()
+
+@router.get("", response_model=DashboardResponse)
+async def get_dashboard(
+    fiscal_year: Optional[int] = Query(None, ge=1900, le=9999, description="Default: the current fiscal year"),
+    current_user: CurrentUser = Depends(require_permission("dashboard:read", read_only=True)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Your receipts of a fiscal year: totals by month and by category
+    
+    Reads the precomputed receipt_summaries rows only (no aggregation over
+    receipts), so it costs the same for 100 or 100,000 receipts. The fiscal
+    year follows your profile's fiscal year end and is named after the
+    calendar year it ends in.
+    """
+    dashboard = await SummaryService.dashboard(db, current_user.user_id, fiscal_year)
+    return PydanticJSONResponse(DashboardResponse.model_validate(dashboard))
@@ -0,0 +1,157 @@
+"""Receipt API endpoints"""
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect
+from typing import Optional
+from uuid import UUID
+
+from app.db.session import db_session, get_db
+from app.api.deps import get_read_db, require_permission
+from app.api.responses import PydanticJSONResponse
+from app.api.uploads import UploadStream
+from app.services.receipt_service import ReceiptService
+from app.schemas.user import CurrentUser, MessageResponse
+from app.schemas.receipt import ReceiptResponse, ReceiptUpdateRequest
+
+router = APIRouter()
+
+def receipt_response(receipt, status_code: int) -> PydanticJSONResponse:
+    return PydanticJSONResponse(
+        ReceiptResponse.model_validate(receipt),
+        status_code=status_code,
+        headers={"Location": f"/api/v1/receipts/{receipt.receipt_id}"}
+    )
+
+@router.post(
+    "",
+    response_model=ReceiptResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={200: {"model": ReceiptResponse, "description": "Already uploaded: the existing receipt"}},
+    # Documents the multipart form; the body itself is read by UploadStream
+    openapi_extra={"requestBody": {"content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"file": {"type": "string", "format": "binary"}},
+        "required": ["file"]
+    }}}}}
+)
+async def upload_receipt(
+    request: Request,
+    current_user: CurrentUser = Depends(require_permission("receipts:write", hold_session=False)),
+    x_content_sha256: Optional[str] = Header(None)
+):
+    """
+    Upload a receipt (JPEG, PNG, WebP, HEIC or PDF)
+    
+    Send a multipart form with a "file" field, or the raw file as the body
+    with its Content-Type (and ?filename=...). The file is streamed to
+    storage as it arrives, without being held in memory.
+    
+    Returns 202 as soon as the file is stored and queued: extraction runs
+    in the receipt worker. Poll GET /receipts/{receipt_id} (the Location
+    header) for the result.
+    
+    The same file uploaded again returns 200 with the existing receipt.
+    Clients that send the file's SHA-256 (hex) in X-Content-SHA256 get
+    that answer before the body is even read.
+    """
+    if x_content_sha256:
+        async with db_session() as db:
+            existing = await ReceiptService.find_duplicate(db, current_user.user_id, x_content_sha256.lower())
+        if existing is not None:
+            return receipt_response(existing, status.HTTP_200_OK)
+    
+    # No database session while the body comes in
+    upload = UploadStream(request)
+    try:
+        await upload.start()
+        stored = await ReceiptService.store_upload(
+            current_user.user_id,
+            upload,
+            upload.content_type,
+            expected_sha256=x_content_sha256
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except ClientDisconnect:
+        # Nothing was stored; nobody reads this answer, but it isn't a server error
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload interrupted")
+    
+    async with db_session() as db:
+        receipt, created = await ReceiptService.create_receipt(
+            db,
+            current_user.user_id,
+            stored,
+            filename=upload.filename
+        )
+    
+    return receipt_response(receipt, status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK)
+
+@router.get("/{receipt_id}", response_model=ReceiptResponse)
+async def get_receipt(
+    receipt_id: UUID,
+    current_user: CurrentUser = Depends(require_permission("receipts:read", read_only=True)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get one of your receipts and its processing status"""
+    receipt = await ReceiptService.get_receipt(db, current_user.user_id, receipt_id)
+    
+    if not receipt:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Receipt not found"
+        )
+    
+    return PydanticJSONResponse(ReceiptResponse.model_validate(receipt))
+
+@router.patch("/{receipt_id}", response_model=ReceiptResponse)
+async def update_receipt(
+    receipt_id: UUID,
+    receipt_data: ReceiptUpdateRequest,
+    current_user: CurrentUser = Depends(require_permission("receipts:write")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Correct the extracted fields of one of your receipts
+    
+    Only the fields sent are changed. The receipt becomes APPROVED, and its
+    taxes and the dashboard totals are updated with it.
+    """
+    try:
+        receipt = await ReceiptService.update_receipt(
+            db,
+            current_user.user_id,
+            receipt_id,
+            receipt_data.model_dump(exclude_unset=True)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if not receipt:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Receipt not found"
+        )
+    
+    return PydanticJSONResponse(ReceiptResponse.model_validate(receipt))
+
+@router.delete("/{receipt_id}", response_model=MessageResponse)
+async def delete_receipt(
+    receipt_id: UUID,
+    current_user: CurrentUser = Depends(require_permission("receipts:write")),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete one of your receipts (and its file)"""
+    if not await ReceiptService.delete_receipt(db, current_user.user_id, receipt_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Receipt not found"
+        )
+    
+    return MessageResponse(success=True, message="Receipt deleted")
@@ -1,36 +1,69 @@
 """User API endpoints"""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
 
-from app.db.session import get_db
-from app.db.models import User  # Add this import
-from app.services.user_service import UserService
+from app.db.session import db_session, get_db
+from app.api.deps import get_current_user, get_read_db, require_permission
+from app.api.responses import PydanticJSONResponse
+from app.core.config import settings
+from app.services.user_service import UserService, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.services.permission_service import PermissionService
+from app.services.login_throttle import LoginThrottle
+from app.core.rate_limit import RateLimited
+from app.utils.security import PasswordHasherBusy
+from app.utils.tokens import (
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+    TokenError,
+    REFRESH_TOKEN
+)
 from app.schemas.user import (
     UserRegisterRequest,
     UserRegisterResponse,
     UserLoginRequest,
     UserLoginResponse,
+    TokenRefreshRequest,
+    TokenResponse,
+    CurrentUser,
+    RoleAssignRequest,
     UserUpdateRequest,
     UserResponse,
-    MessageResponse
+    UserDetailResponse,
+    UserListResponse,
+    MessageResponse,
+    ClientImportResponse
 )
 
 router = APIRouter()
 
+def _hasher_busy() -> HTTPException:
+    """503 response when the password hashing pool is saturated"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry",
+        headers={"Retry-After": "1"}
+    )
+
 @router.post("/register", response_model=UserRegisterResponse, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     user_data: UserRegisterRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Register a new user"""
     try:
-        user = UserService.create_user(db, user_data)
+        user = await UserService.create_user(db, user_data)
         
-        return UserRegisterResponse(
-            success=True,
-            message="User registered successfully",
-            user=UserResponse.model_validate(user)
+        return PydanticJSONResponse(
+            UserRegisterResponse(
+                success=True,
+                message="User registered successfully",
+                user=UserResponse.model_validate(user)
+            ),
+            status_code=status.HTTP_201_CREATED
         )
         
     except ValueError as e:
@@ -38,14 +71,35 @@ def register_user(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except PasswordHasherBusy:
+        raise _hasher_busy()
 
 @router.post("/login", response_model=UserLoginResponse)
-def login_user(
+async def login_user(
     credentials: UserLoginRequest,
-    db: Session = Depends(get_db)
+    request: Request
 ):
-    """Login with email and password"""
-    user = UserService.authenticate_user(db, credentials.email, credentials.password)
+    """
+    Login with email and password
+    
+    Takes no session for the whole request: the password check runs
+    between short sessions (see UserService.authenticate_user).
+    """
+    # Rate limits first: a rejected attempt costs no bcrypt and no query
+    client_ip = request.client.host if request.client else "unknown"
+    try:
+        await LoginThrottle.check(client_ip, credentials.email)
+    except RateLimited as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    try:
+        user = await UserService.authenticate_user(credentials.email, credentials.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     
     if not user:
         raise HTTPException(
@@ -59,19 +113,135 @@ def login_user(
             detail="Account is inactive"
         )
     
-    # Placeholder token (we'll add JWT next)
-    access_token = f"mock_token_for_{user.user_id}"
+    async with db_session() as db:
+        roles = await UserService.get_active_role_names(db, user.user_id)
     
-    return UserLoginResponse(
-        access_token=access_token,
+    return PydanticJSONResponse(UserLoginResponse(
+        access_token=create_access_token(user.user_id, user.account_type, roles),
+        refresh_token=create_refresh_token(user.user_id),
         token_type="bearer",
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
         user=UserResponse.model_validate(user)
+    ))
+
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh_tokens(
+    token_data: TokenRefreshRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Exchange a refresh token for new tokens (re-reads account type and roles)"""
+    try:
+        claims = decode_token(token_data.refresh_token, REFRESH_TOKEN)
+    except TokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token"
+        )
+    
+    user = await UserService.get_user_response(db, claims['sub'])
+    
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token"
+        )
+    
+    roles = await UserService.get_active_role_names(db, user.user_id)
+    
+    return TokenResponse(
+        access_token=create_access_token(user.user_id, user.account_type, roles),
+        refresh_token=create_refresh_token(user.user_id),
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
     )
 
+@router.get("", response_model=UserListResponse)
+async def list_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    account_type: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    province: Optional[str] = None,
+    city: Optional[str] = None,
+    current_user: CurrentUser = Depends(require_permission("users:list", read_only=True)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    List users, newest first
+    
+    Cursor-paginated: pass the next_cursor of one page as ?cursor= to get
+    the next. Filters combine with AND.
+    """
+    try:
+        page = await UserService.list_users(
+            db,
+            cursor=cursor,
+            limit=limit,
+            account_type=account_type,
+            role=role,
+            is_active=is_active,
+            province=province,
+            city=city
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return PydanticJSONResponse(page)
+
+@router.post("/import", response_model=ClientImportResponse)
+async def import_clients(
+    request: Request,
+    format: Optional[str] = None,
+    current_user: CurrentUser = Depends(require_permission("users:import")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Bulk import clients from a CSV or NDJSON body
+    
+    The body is streamed and processed in chunks, so large files are never
+    held in memory. Format comes from ?format= or the Content-Type
+    (text/csv or application/x-ndjson).
+    """
+    # Only this endpoint needs the CSV/NDJSON parser (imported on first use)
+    from app.services.import_service import ClientImportService, IMPORT_FORMATS
+    
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("ndjson" if "ndjson" in content_type else "csv")
+    
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported import format: {fmt}"
+        )
+    
+    return await ClientImportService.import_clients(db, request.stream(), fmt)
+
 @router.get("/me", response_model=UserResponse)
-def get_current_user(db: Session = Depends(get_db)):
-    """Get current user profile (placeholder)"""
-    user = db.query(User).first()
+async def read_current_user(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get current user profile"""
+    user_json = await UserService.get_user_json(db, current_user.user_id)
+    
+    if not user_json:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return PydanticJSONResponse(user_json)
+
+@router.get("/me/full", response_model=UserDetailResponse)
+async def read_current_user_detail(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get current user with profile and roles"""
+    user = await UserService.get_user_detail(db, current_user.user_id)
     
     if not user:
         raise HTTPException(
@@ -79,29 +249,50 @@ def get_current_user(db: Session = Depends(get_db)):
             detail="User not found"
         )
     
-    return UserResponse.model_validate(user)
+    return PydanticJSONResponse(user)
 
 @router.put("/me", response_model=UserResponse)
-def update_current_user(
+async def update_current_user(
     user_data: UserUpdateRequest,
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Update current user profile (placeholder)"""
-    user = db.query(User).first()
+    """Update current user profile"""
+    updated_user = await UserService.update_user(db, current_user.user_id, user_data)
     
-    if not user:
+    if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    updated_user = UserService.update_user(db, str(user.user_id), user_data)
-    return UserResponse.model_validate(updated_user)
+    return PydanticJSONResponse(UserResponse.model_validate(updated_user))
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: str, db: Session = Depends(get_db)):
+async def get_user(
+    user_id: str,
+    current_user: CurrentUser = Depends(require_permission("users:read", read_only=True)),
+    db: AsyncSession = Depends(get_read_db)
+):
     """Get user by ID"""
-    user = UserService.get_user_by_id(db, user_id)
+    user_json = await UserService.get_user_json(db, user_id)
+    
+    if not user_json:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return PydanticJSONResponse(user_json)
+
+@router.get("/{user_id}/full", response_model=UserDetailResponse)
+async def get_user_detail(
+    user_id: str,
+    current_user: CurrentUser = Depends(require_permission("users:read", read_only=True)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get user by ID with profile and roles"""
+    user = await UserService.get_user_detail(db, user_id)
     
     if not user:
         raise HTTPException(
@@ -109,4 +300,47 @@ def get_user(user_id: str, db: Session = Depends(get_db)):
             detail="User not found"
         )
     
-    return UserResponse.model_validate(user)
+    return PydanticJSONResponse(user)
+
+@router.post("/{user_id}/roles", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
+async def assign_role(
+    user_id: str,
+    role_data: RoleAssignRequest,
+    current_user: CurrentUser = Depends(require_permission("roles:manage")),
+    db: AsyncSession = Depends(get_db)
+):
+    """Assign a role to a user"""
+    if not await UserService.get_user_response(db, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    await PermissionService.assign_role(
+        db,
+        user_id,
+        role_data.role_name,
+        assigned_by=current_user.user_id,
+        organization_id=role_data.organization_id,
+        expires_at=role_data.expires_at
+    )
+    return MessageResponse(success=True, message=f"Role '{role_data.role_name}' assigned")
+
+@router.delete("/{user_id}/roles/{role_name}", response_model=MessageResponse)
+async def revoke_role(
+    user_id: UUID,
+    role_name: str,
+    organization_id: Optional[UUID] = None,
+    current_user: CurrentUser = Depends(require_permission("roles:manage")),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoke a role from a user (ids that aren't UUIDs are a 422)"""
+    if not await PermissionService.revoke_role(
+        db, str(user_id), role_name, str(organization_id) if organization_id else None
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Role not found"
+        )
+    
+    return MessageResponse(success=True, message=f"Role '{role_name}' revoked")
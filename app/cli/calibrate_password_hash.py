@@ -0,0 +1,136 @@
+"""
+Calibrate the password hash cost on this host
+
+Measures how long one hash takes here and picks the highest cost that
+stays within the latency target (PASSWORD_HASH_TARGET_MS by default):
+the bcrypt rounds, or the argon2 time/memory cost. Run it on the
+deployment host (or one like it); existing hashes are upgraded on the
+next successful login.
+
+Usage:
+    python -m app.cli.calibrate_password_hash
+    python -m app.cli.calibrate_password_hash --scheme argon2 --target-ms 200
+    python -m app.cli.calibrate_password_hash --write-env .env
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from typing import Dict
+
+from app.core.config import settings
+from app.utils.security import create_pwd_context
+
+# Search bounds
+BCRYPT_MIN_ROUNDS = 4
+BCRYPT_MAX_ROUNDS = 16
+ARGON2_MIN_MEMORY_KIB = 8 * 1024
+ARGON2_MAX_TIME_COST = 10
+
+SAMPLE_PASSWORD = "Calibrate-Password-123"
+
+def measure_ms(samples: int, **context_args) -> float:
+    """Median time (ms) of one hash with the given create_pwd_context arguments"""
+    context = create_pwd_context(**context_args)
+    context.hash(SAMPLE_PASSWORD)  # Warm up
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash(SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def calibrate_bcrypt(target_ms: float, samples: int) -> Dict[str, int]:
+    """Highest bcrypt rounds within target_ms (each round doubles the cost)"""
+    rounds = BCRYPT_MIN_ROUNDS
+    while rounds < BCRYPT_MAX_ROUNDS:
+        elapsed = measure_ms(samples, scheme="bcrypt", bcrypt_rounds=rounds)
+        print(f"  bcrypt rounds={rounds:<2} {elapsed:8.1f} ms", file=sys.stderr)
+        # The next round takes about twice as long; stop before overshooting
+        if elapsed * 2 > target_ms:
+            break
+        rounds += 1
+    return {'BCRYPT_ROUNDS': rounds}
+
+def calibrate_argon2(target_ms: float, samples: int, memory_kib: int, parallelism: int) -> Dict[str, int]:
+    """
+    Highest argon2 time cost within target_ms at the given memory
+    
+    Memory is the main defence against GPU cracking, so it is kept as high
+    as possible: if even time_cost=1 is too slow, memory is halved until it
+    fits (down to ARGON2_MIN_MEMORY_KIB).
+    """
+    def measure(time_cost: int, memory: int) -> float:
+        elapsed = measure_ms(
+            samples,
+            scheme="argon2",
+            argon2_time_cost=time_cost,
+            argon2_memory_cost=memory,
+            argon2_parallelism=parallelism
+        )
+        print(f"  argon2 time_cost={time_cost:<2} memory={memory:>7} KiB {elapsed:8.1f} ms", file=sys.stderr)
+        return elapsed
+        
+    while memory_kib > ARGON2_MIN_MEMORY_KIB and measure(1, memory_kib) > target_ms:
+        memory_kib //= 2
+    memory_kib = max(memory_kib, ARGON2_MIN_MEMORY_KIB)
+    
+    # Time grows linearly with time_cost
+    time_cost = 1
+    while time_cost < ARGON2_MAX_TIME_COST and measure(time_cost + 1, memory_kib) <= target_ms:
+        time_cost += 1
+        
+    return {
+        'ARGON2_TIME_COST': time_cost,
+        'ARGON2_MEMORY_COST': memory_kib,
+        'ARGON2_PARALLELISM': parallelism
+    }
+
+def write_env(path: str, values: Dict[str, object]) -> None:
+    """Set (or add) KEY=value lines in an env file"""
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        lines = []
+        
+    remaining = dict(values)
+    for i, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if key in remaining:
+            lines[i] = f"{key}={remaining.pop(key)}"
+    lines.extend(f"{key}={value}" for key, value in remaining.items())
+    
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Calibrate the password hash cost on this host")
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default=settings.PASSWORD_HASH_SCHEME)
+    parser.add_argument("--target-ms", type=float, default=settings.PASSWORD_HASH_TARGET_MS,
+                        help="Latency budget per hash (default PASSWORD_HASH_TARGET_MS)")
+    parser.add_argument("--samples", type=int, default=3, help="Hashes timed per setting (median)")
+    parser.add_argument("--argon2-memory", type=int, default=settings.ARGON2_MEMORY_COST,
+                        help="Starting argon2 memory cost in KiB")
+    parser.add_argument("--argon2-parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    parser.add_argument("--write-env", metavar="PATH", help="Store the result in this env file (e.g. .env)")
+    args = parser.parse_args(argv)
+    
+    print(f"Calibrating {args.scheme} for {args.target_ms:.0f} ms per hash", file=sys.stderr)
+    if args.scheme == "bcrypt":
+        values = calibrate_bcrypt(args.target_ms, args.samples)
+    else:
+        values = calibrate_argon2(args.target_ms, args.samples, args.argon2_memory, args.argon2_parallelism)
+    values = {'PASSWORD_HASH_SCHEME': args.scheme, **values}
+    
+    for key, value in values.items():
+        print(f"{key}={value}")
+        
+    if args.write_env:
+        write_env(args.write_env, values)
+        print(f"Written to {args.write_env}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Bulk client import from the command line
+
+Usage:
+    python -m app.cli.import_clients clients.csv
+    python -m app.cli.import_clients clients.ndjson --format ndjson --chunk-size 1000
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.db.session import get_async_db_session, dispose_engines
+from app.services.import_service import ClientImportService, IMPORT_FORMATS
+from app.utils.security import password_hasher
+
+# Bytes read from the file per chunk
+READ_SIZE = 64 * 1024
+
+async def _read_chunks(path: str):
+    """Stream a file in chunks (stdin if path is "-")"""
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while chunk := stream.read(READ_SIZE):
+            yield chunk
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import clients from CSV or NDJSON")
+    parser.add_argument("path", help="CSV/NDJSON file, or - for stdin")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, help="Rows per batch (default IMPORT_CHUNK_SIZE)")
+    args = parser.parse_args(argv)
+    
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    
+    try:
+        async with get_async_db_session() as db:
+            report = await ClientImportService.import_clients(
+                db, _read_chunks(args.path), fmt, chunk_size=args.chunk_size
+            )
+    finally:
+        password_hasher.shutdown()
+        await dispose_engines()
+        
+    print(report.model_dump_json(indent=2))
+    return 1 if report.failed else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,40 @@
+"""
+Rebuild the dashboard summaries (receipt_summaries) from the receipts
+
+Needed after a backfill, a bulk change made outside the API, or a change
+of a user's fiscal year end.
+
+Usage:
+    python -m app.cli.rebuild_summaries                    # Everyone
+    python -m app.cli.rebuild_summaries --user <user_id> [--user <user_id> ...]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+
+from app.db.session import get_async_db_session, dispose_engines
+from app.services.summary_service import SummaryService
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild receipt summaries from the receipts")
+    parser.add_argument("--user", type=uuid.UUID, action="append", help="Only this user (repeatable)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Users per transaction")
+    args = parser.parse_args(argv)
+    
+    started = time.perf_counter()
+    try:
+        async with get_async_db_session() as db:
+            report = await SummaryService.rebuild(db, user_ids=args.user, chunk_size=args.chunk_size)
+    finally:
+        await dispose_engines()
+        
+    report['seconds'] = round(time.perf_counter() - started, 2)
+    print(json.dumps(report))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,70 @@
+"""
+Receipt processing worker
+
+Usage:
+    python -m app.cli.receipt_worker                     # Run until SIGTERM/Ctrl-C
+    python -m app.cli.receipt_worker --ocr-workers 8
+    python -m app.cli.receipt_worker --once              # Drain due jobs, then exit
+    python -m app.cli.receipt_worker --stats             # Jobs per status
+    python -m app.cli.receipt_worker --requeue-dead      # Retry dead-lettered jobs
+    python -m app.cli.receipt_worker --requeue-dead <receipt_id>
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import sys
+
+from app.db.session import get_async_db_session, dispose_engines
+from app.storage import close_storage
+from app.services.receipt_jobs import ReceiptJobQueue
+from app.workers.ocr import OcrPool
+from app.workers.receipt_worker import ReceiptWorker
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Process queued receipts")
+    parser.add_argument("--ocr-workers", type=int, help="OCR processes (default OCR_WORKERS: one per core)")
+    parser.add_argument("--once", action="store_true", help="Exit when no job is due")
+    parser.add_argument("--stats", action="store_true", help="Print jobs per status and exit")
+    parser.add_argument("--requeue-dead", nargs="?", const="all", metavar="RECEIPT_ID",
+                        help="Requeue dead jobs (all, or one receipt's) and exit")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    
+    try:
+        if args.stats:
+            async with get_async_db_session() as db:
+                print(json.dumps(await ReceiptJobQueue.stats(db)))
+            return 0
+        
+        if args.requeue_dead:
+            async with get_async_db_session() as db:
+                count = await ReceiptJobQueue.requeue_dead(
+                    db, None if args.requeue_dead == "all" else args.requeue_dead
+                )
+            print(f"Requeued {count} job(s)")
+            return 0
+        
+        worker = ReceiptWorker(ocr_pool=OcrPool(max_workers=args.ocr_workers))
+        try:
+            if args.once:
+                await worker.run_once()
+            else:
+                # Finish the jobs in progress on SIGTERM/SIGINT
+                loop = asyncio.get_running_loop()
+                for sig in (signal.SIGTERM, signal.SIGINT):
+                    loop.add_signal_handler(sig, worker.stop)
+                await worker.run()
+        finally:
+            await worker.close()
+        print(json.dumps(worker.stats()))
+        return 1 if args.once and worker.dead else 0
+    finally:
+        await close_storage()
+        await dispose_engines()
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
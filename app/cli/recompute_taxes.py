@@ -0,0 +1,55 @@
+"""
+Recompute line item taxes after a tax rule change (app/tax/rules.py)
+
+Usage:
+    python -m app.cli.recompute_taxes                          # Items computed with older rules
+    python -m app.cli.recompute_taxes --user <user_id> --year 2025
+    python -m app.cli.recompute_taxes --user <user_id> --from 2025-04-01 --to 2026-03-31 --all
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from datetime import date
+
+from app.db.session import get_async_db_session, dispose_engines
+from app.services.tax_service import TaxService
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Recompute receipt line item taxes with the current rules")
+    parser.add_argument("--user", type=uuid.UUID, help="Only this user's line items")
+    parser.add_argument("--year", type=int, help="Only items dated in this calendar year")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="Only items dated on or after (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="Only items dated on or before (YYYY-MM-DD)")
+    parser.add_argument("--all", action="store_true", help="Also items already computed with the current rules")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Line items per round")
+    args = parser.parse_args(argv)
+    
+    start, end = args.start, args.end
+    if args.year:
+        start = max(start or date.min, date(args.year, 1, 1))
+        end = min(end or date.max, date(args.year, 12, 31))
+        
+    started = time.perf_counter()
+    try:
+        async with get_async_db_session() as db:
+            report = await TaxService.recompute(
+                db,
+                user_id=args.user,
+                start=start,
+                end=end,
+                stale_only=not args.all,
+                chunk_size=args.chunk_size
+            )
+    finally:
+        await dispose_engines()
+        
+    report['seconds'] = round(time.perf_counter() - started, 2)
+    print(json.dumps(report))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,288 @@
+# app/core/cache.py
+
+from collections import OrderedDict
+from typing import Optional
+import time
+
+from app.core.config import settings
+
+# What is this?
+# ─────────────
+# A small pluggable key-value cache used by the service layer.
+#
+# Backends (CACHE_BACKEND setting):
+#   - "memory" → in-process LRU + TTL (per worker process: an invalidation
+#                only clears the worker that made the change, the others
+#                serve the old entry for up to CACHE_TTL_SECONDS; one worker
+#                or DEBUG only, settings refuse it otherwise)
+#   - "redis"  → shared store at REDIS_URL (all workers see invalidations)
+#   - "local"  → in-process stand-in for the shared store (tests/dev)
+#   - "none"   → caching disabled
+#
+# Values are bytes (callers serialize), and every method is async so the
+# shared backend never blocks the event loop.
+
+class CacheBackend:
+    """Base cache backend (also the "none" backend: never stores anything)"""
+    
+    name = "none"
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.sets = 0
+        self.deletes = 0
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        self.misses += 1
+        return None
+    
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        pass
+    
+    async def delete(self, *keys: str) -> None:
+        pass
+    
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            'evictions': self.evictions,
+            'sets': self.sets,
+            'deletes': self.deletes
+        }
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache with per-entry TTL
+    
+    Entries expire after ttl seconds; when max_entries is reached the least
+    recently used entry is evicted.
+    """
+    
+    name = "memory"
+    
+    def __init__(self, max_entries: int = 10000, default_ttl: int = 60):
+        super().__init__()
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.expirations = 0
+        self._entries = OrderedDict()  # key → (expires_at, value)
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+            
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+            
+        self._entries.move_to_end(key)  # Mark as recently used
+        self.hits += 1
+        return value
+    
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        self._entries[key] = (time.monotonic() + (ttl or self.default_ttl), value)
+        self._entries.move_to_end(key)
+        self.sets += 1
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)  # Least recently used
+            self.evictions += 1
+    
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                self.deletes += 1
+    
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'expirations': self.expirations
+        })
+        return stats
+
+
+class LocalKeyValueStore:
+    """
+    In-process stand-in for the shared key-value store (Redis)
+    
+    Implements the subset of the redis.asyncio client API the app uses,
+    so KeyValueCache and the login rate limiter can run without a Redis
+    server (per process). Expired keys are dropped when read and swept
+    every SWEEP_INTERVAL writes.
+    """
+    
+    SWEEP_INTERVAL = 1000
+    
+    def __init__(self):
+        self._data = {}  # key → (expires_at or None, value)
+        self._writes = 0
+    
+    def _written(self) -> None:
+        self._writes += 1
+        if self._writes % self.SWEEP_INTERVAL == 0:
+            now = time.monotonic()
+            for key in [k for k, (expires_at, _) in self._data.items() if expires_at is not None and expires_at <= now]:
+                del self._data[key]
+    
+    def _live(self, key: str):
+        entry = self._data.get(key)
+        if entry is not None and entry[0] is not None and entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._live(key)
+        return entry[1] if entry else None
+    
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if nx and self._live(key) is not None:
+            return None
+        self._data[key] = (time.monotonic() + ex if ex else None, value)
+        self._written()
+        return True
+    
+    async def delete(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+    
+    async def incr(self, key: str) -> int:
+        """Add 1 to an integer value (a missing key counts as 0; the TTL is kept)"""
+        entry = self._live(key)
+        expires_at, value = entry if entry else (None, 0)
+        value = int(value) + 1
+        self._data[key] = (expires_at, value)
+        self._written()
+        return value
+    
+    async def expire(self, key: str, seconds: int) -> bool:
+        """Set a key's TTL (False if the key does not exist)"""
+        entry = self._live(key)
+        if entry is None:
+            return False
+        self._data[key] = (time.monotonic() + seconds, entry[1])
+        return True
+    
+    def pipeline(self, transaction: bool = True) -> "LocalPipeline":
+        """Queue commands and run them together (nothing else runs in between)"""
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    """
+    Stand-in for a redis.asyncio pipeline on a LocalKeyValueStore
+    
+    The store's commands never wait, so running the queued ones back to
+    back in execute() is atomic with respect to other coroutines, like a
+    MULTI/EXEC transaction on Redis.
+    """
+    
+    def __init__(self, store: LocalKeyValueStore):
+        self.store = store
+        self._commands = []
+    
+    def __getattr__(self, name: str):
+        command = getattr(self.store, name)
+        
+        def queue(*args, **kwargs) -> "LocalPipeline":
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+    
+    async def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        return [await command(*args, **kwargs) for command, args, kwargs in commands]
+    
+    async def __aenter__(self) -> "LocalPipeline":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        self._commands = []
+
+
+class KeyValueCache(CacheBackend):
+    """
+    Cache backed by a shared key-value store (Redis or LocalKeyValueStore)
+    
+    TTL and eviction are handled by the store itself (configure Redis with
+    an LRU maxmemory-policy); the counters here are per process.
+    """
+    
+    def __init__(self, client, default_ttl: int = 60, name: str = "redis"):
+        super().__init__()
+        self.client = client
+        self.default_ttl = default_ttl
+        self.name = name
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.client.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+    
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        await self.client.set(key, value, ex=ttl or self.default_ttl)
+        self.sets += 1
+    
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            self.deletes += await self.client.delete(*keys)
+
+
+def create_redis_client(url: str):
+    """Create a redis.asyncio client (redis is an optional dependency)"""
+    try:
+        import redis.asyncio as redis
+    except ImportError as e:
+        raise RuntimeError("The 'redis' package is required for the redis backend") from e
+    return redis.from_url(url)
+
+
+def create_cache(backend: str) -> CacheBackend:
+    """
+    Build a cache backend by name
+    
+    Args:
+        backend: "memory", "redis", "local" or "none"
+    """
+    if backend == "memory":
+        return MemoryCache(
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            default_ttl=settings.CACHE_TTL_SECONDS
+        )
+    if backend == "redis":
+        if not settings.REDIS_URL:
+            raise RuntimeError("REDIS_URL must be set for the redis cache backend")
+        return KeyValueCache(create_redis_client(settings.REDIS_URL), settings.CACHE_TTL_SECONDS)
+    if backend == "local":
+        return KeyValueCache(LocalKeyValueStore(), settings.CACHE_TTL_SECONDS, name="local")
+    if backend == "none":
+        return CacheBackend()
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+# Global cache instance (created on first use)
+_cache: Optional[CacheBackend] = None
+
+def get_cache() -> CacheBackend:
+    """Get the configured cache backend"""
+    global _cache
+    if _cache is None:
+        _cache = create_cache(settings.CACHE_BACKEND)
+    return _cache
@@ -0,0 +1,21 @@
+# app/core/categories.py
+
+# Expense categories
+# ──────────────────
+# What a receipt is filed under (Receipt.category). The extraction model
+# must answer with one of these; anything else becomes "Other".
+EXPENSE_CATEGORIES = (
+    "Fuel & Vehicle",
+    "Meals & Entertainment",
+    "Office Supplies",
+    "Travel",
+    "Telephone & Internet",
+    "Professional Fees",
+    "Advertising",
+    "Rent",
+    "Utilities",
+    "Insurance",
+    "Other",
+)
+
+DEFAULT_CATEGORY = "Other"
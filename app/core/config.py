@@ -1,8 +1,12 @@
 # app/core/config.py
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from typing import Optional
 
+# Development-only signing key: refused when DEBUG is off
+DEV_JWT_SECRET_KEY = "change-me-in-production"
+
 class Settings(BaseSettings):
     """
     Application settings loaded from environment variables
@@ -10,15 +14,140 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # Defaults to DATABASE_URL with asyncpg
+    DATABASE_REPLICA_URLS: Optional[str] = None  # Comma-separated read replicas (same form as DATABASE_URL)
+    REPLICA_STICKINESS_SECONDS: int = 5  # Reads about a user go to the primary this long after a write
+    REPLICA_RETRY_SECONDS: int = 30      # Skip a failing replica this long
     DB_HOST: str = "localhost"
     DB_PORT: int = 5432
     DB_NAME: str = "taxflow_db"
     DB_USER: str = "taxflow_user"
     DB_PASSWORD: str = "secure_password"
+    DB_ECHO: bool = False  # Log every SQL statement (debugging only: slow)
+    DB_RAISE_ON_LAZY_LOAD: bool = False  # Test/CI: lazy relationship loads raise (N+1 guard)
+    
+    # Connection pool (per engine, per worker process)
+    DB_POOL_SIZE: int = 5          # Connections kept open
+    DB_MAX_OVERFLOW: int = 10      # Extra connections allowed under load
+    DB_POOL_TIMEOUT: float = 5.0   # Seconds to wait for a connection before failing
+    DB_POOL_RECYCLE: int = -1      # Reconnect connections older than this (seconds, -1 = never)
+    DB_POOL_PRE_PING: bool = True  # Test connections before using them
+    DB_USE_NULLPOOL: bool = False  # No pooling in the app (an external pooler such as PgBouncer does it)
+    DB_PGBOUNCER_MODE: bool = False  # No server-side prepared statement state (PgBouncer transaction pooling)
+    
+    # Admission control for database-bound requests
+    DB_ADMISSION_LIMIT: Optional[int] = None  # None = DB_POOL_SIZE + DB_MAX_OVERFLOW, 0 = off
+    DB_ADMISSION_TIMEOUT: float = 1.0  # Seconds to wait for a slot before answering 503
+    DB_RETRY_AFTER_SECONDS: int = 1    # Retry-After on 503 responses
     
     # Application
     APP_NAME: str = "TaxFlow AI"
     DEBUG: bool = True
+    WEB_CONCURRENCY: int = 1  # Server worker processes (gunicorn.conf.py sets it from its own count)
+    STARTUP_WARMUP: bool = True  # Warm connections, schemas and the password pool before serving
+    DB_WARM_CONNECTIONS: Optional[int] = None  # Opened at startup: None = DB_POOL_SIZE, 0 = none
+    
+    # Password hashing
+    # Cost: run "python -m app.cli.calibrate_password_hash" on the deployment
+    # host; tests can use BCRYPT_ROUNDS=4 (the minimum) to keep the KDF cheap
+    PASSWORD_HASH_SCHEME: str = "bcrypt"  # bcrypt or argon2 (for new hashes)
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_TARGET_MS: int = 250  # Calibration target per hash
+    PASSWORD_REHASH_ON_LOGIN: bool = True  # Upgrade outdated hashes on successful login
+    # None = one worker process per CPU core, 0 = run in a thread (no processes)
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # Calls allowed to wait before rejecting
+    
+    # Authentication (JWT)
+    JWT_SECRET_KEY: str = DEV_JWT_SECRET_KEY  # HS* algorithms (must be set when DEBUG is off)
+    JWT_ALGORITHM: str = "HS256"
+    JWT_PRIVATE_KEY: Optional[str] = None  # PEM, RS*/ES* algorithms
+    JWT_PUBLIC_KEY: Optional[str] = None   # PEM, RS*/ES* algorithms
+    JWT_ISSUER: str = "taxflow"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    
+    # Login throttling (checked before any bcrypt or database work)
+    LOGIN_THROTTLE_BACKEND: str = "memory"  # memory (per process, DEBUG only), redis (shared, REDIS_URL)
+    LOGIN_RATE_WINDOW_SECONDS: int = 60
+    LOGIN_RATE_LIMIT_PER_IP: int = 20      # Attempts per window, 0 = no limit (behind a proxy see FORWARDED_ALLOW_IPS, gunicorn.conf.py)
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 10
+    LOGIN_RATE_LIMIT_GLOBAL: int = 0       # Across all clients (per process with "memory")
+    
+    # Permissions
+    PERMISSION_CACHE_TTL_SECONDS: int = 60  # Compiled masks kept this long at most
+    PERMISSION_CHANGE_POLL_MS: int = 1000   # Role changes made in another worker show up within this
+    
+    # Cache
+    # memory, redis, local (in-process stand-in for redis), none. Only redis
+    # invalidates across workers: with the others, a worker keeps serving a
+    # user another worker just updated for up to CACHE_TTL_SECONDS, so they
+    # are refused with several workers (WEB_CONCURRENCY) when DEBUG is off
+    CACHE_BACKEND: str = "memory"
+    CACHE_TTL_SECONDS: int = 60
+    CACHE_MAX_ENTRIES: int = 10000  # memory backend only
+    REDIS_URL: Optional[str] = None
+    
+    # Bulk client import
+    IMPORT_CHUNK_SIZE: int = 500  # Rows validated, hashed and inserted per batch
+    
+    # Receipts
+    RECEIPT_MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    STORAGE_BACKEND: str = "local"  # local, s3, s3-local (in-process stand-in for s3, files under STORAGE_LOCAL_DIR)
+    STORAGE_LOCAL_DIR: str = "./storage"
+    STORAGE_S3_BUCKET: str = "taxflow-receipts"
+    STORAGE_S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://localhost:9000 for MinIO, None = AWS
+    STORAGE_S3_REGION: str = "us-east-1"
+    STORAGE_S3_ACCESS_KEY_ID: Optional[str] = None  # None = the default AWS credential chain
+    STORAGE_S3_SECRET_ACCESS_KEY: Optional[str] = None
+    STORAGE_S3_PART_SIZE: int = 8 * 1024 * 1024  # Multipart upload part (bounds memory per streamed upload)
+    
+    # Receipt job queue (Postgres, SELECT ... FOR UPDATE SKIP LOCKED)
+    RECEIPT_JOB_MAX_ATTEMPTS: int = 5          # Then the job is dead-lettered
+    RECEIPT_JOB_BACKOFF_SECONDS: float = 10.0  # First retry delay, doubled per attempt
+    RECEIPT_JOB_BACKOFF_MAX_SECONDS: float = 600.0
+    RECEIPT_JOB_LOCK_TIMEOUT_SECONDS: int = 300  # A running job older than this is requeued (worker died)
+    RECEIPT_WORKER_POLL_SECONDS: float = 1.0   # Idle wait between empty polls
+    RECEIPT_CLAIM_BATCH_SIZE: int = 16         # Jobs claimed per query
+    
+    # Receipt processing pipeline (fetch → OCR → LLM → save, see app/workers)
+    RECEIPT_PIPELINE_QUEUE_SIZE: int = 16  # Items waiting between two stages (backpressure)
+    RECEIPT_APPROVAL_CONFIDENCE: float = 0.90  # At or above: APPROVED, below: REVIEW
+    OCR_ENGINE: str = "fake"  # tesseract (pytesseract + Pillow, pdf2image for PDFs), fake (in-process stand-in, tests/dev)
+    OCR_WORKERS: Optional[int] = None  # Processes: None = one per available core, 0 = run in a thread
+    FAKE_OCR_CPU_MS: int = 0  # CPU time the fake engine burns per receipt (benchmarks)
+    LLM_BACKEND: str = "fake"  # http (OpenAI-compatible /completions, e.g. vLLM, llama.cpp), fake (in-process stand-in)
+    LLM_ENDPOINT_URL: str = "http://localhost:8001/v1"
+    LLM_MODEL: str = "llama3"
+    LLM_TIMEOUT_SECONDS: float = 120.0
+    LLM_BATCH_SIZE: int = 8        # Receipts per model request
+    LLM_BATCH_WAIT_MS: int = 50    # Wait this long for a batch to fill
+    LLM_MAX_CONCURRENT_BATCHES: int = 2
+    
+    @model_validator(mode="after")
+    def check_deployment(self) -> "Settings":
+        """Refuse combinations that are unsafe once there are several worker processes"""
+        # The read-your-writes marker (app/db/replicas.py) lives in the cache:
+        # it has to be seen by every worker, or a client's next read can hit
+        # a replica that doesn't have its write yet
+        if self.DATABASE_REPLICA_URLS and self.CACHE_BACKEND != "redis":
+            raise ValueError("DATABASE_REPLICA_URLS requires CACHE_BACKEND=redis (shared by all workers)")
+        # Anyone who knows the development key can sign tokens
+        if not self.DEBUG and self.JWT_ALGORITHM.startswith("HS") and self.JWT_SECRET_KEY == DEV_JWT_SECRET_KEY:
+            raise ValueError("JWT_SECRET_KEY must be set when DEBUG is off")
+        # Per-process counters multiply every login limit by the worker count
+        if not self.DEBUG and self.LOGIN_THROTTLE_BACKEND != "redis":
+            raise ValueError("LOGIN_THROTTLE_BACKEND=redis is required when DEBUG is off")
+        # Invalidations reach the other workers only through a shared cache:
+        # in a per-process one they keep serving an updated user for up to
+        # CACHE_TTL_SECONDS (app/services/user_cache.py), and a revoked role
+        # for PERMISSION_CACHE_TTL_SECONDS (app/services/permission_service.py)
+        if not self.DEBUG and self.WEB_CONCURRENCY > 1 and self.CACHE_BACKEND != "redis":
+            raise ValueError("CACHE_BACKEND=redis is required with several workers when DEBUG is off")
+        return self
     
     class Config:
         env_file = ".env"  # Load from .env file
@@ -0,0 +1,31 @@
+# app/core/cpus.py
+
+import math
+import os
+
+# What is this?
+# ─────────────
+# How many CPUs this process can actually keep busy, for sizing process
+# pools (gunicorn workers, OCR processes, password hashing processes).
+# os.cpu_count() is the host's count; in a container limited to 2 CPUs on
+# a 64-core host, 64 processes would just fight over the 2.
+#
+# No settings or other app imports: gunicorn.conf.py uses this before the
+# app is loaded.
+
+def available_cpus() -> int:
+    """CPUs this process may use (CPU affinity and cgroup quota aware)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not on Linux
+        cpus = os.cpu_count() or 1
+        
+    # Container CPU limit (cgroup v2), e.g. "150000 100000" = 1.5 CPUs
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(math.ceil(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+    return cpus
@@ -0,0 +1,102 @@
+# app/core/metrics.py
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    CONTENT_TYPE_LATEST,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+import os
+
+# What is this?
+# ─────────────
+# Prometheus metrics served at /metrics.
+#
+# With several server worker processes each process only sees its own
+# requests and its own connection pool. Set PROMETHEUS_MULTIPROC_DIR (an
+# empty directory, before the app is imported) and every process writes
+# its values to files there; /metrics then merges all of them, whichever
+# worker serves the scrape. run.sh prod does this.
+#
+# Histograms are summed across processes, pool gauges use "livesum"
+# (sum over live processes).
+
+# Content type of the /metrics response
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# HTTP
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency (until the response body is sent)',
+    ['method', 'route', 'status']
+)
+
+# Password hashing
+PASSWORD_HASH_DURATION = Histogram(
+    'password_hash_duration_seconds',
+    'Time a password hashing pool task spends running in a worker',
+    ['operation'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0, 10.0)
+)
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    'password_hash_queue_wait_seconds',
+    'Time a password hashing pool task waits for a free worker',
+    ['operation'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+# Login throttling
+LOGIN_THROTTLED = Counter(
+    'login_throttled',
+    'Login attempts rejected by a rate limit before any password check',
+    ['scope']
+)
+
+# Database connection pools (label "pool": sync or async)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time to get a connection from the pool (waiting or opening a new one)',
+    ['pool'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out',
+    'Connections currently checked out of the pool',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+DB_POOL_OVERFLOW = Gauge(
+    'db_pool_overflow',
+    'Connections open beyond pool_size (max_overflow in use)',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+DB_POOL_SIZE = Gauge(
+    'db_pool_size',
+    'Configured pool_size',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+
+# Database admission control
+DB_ADMISSION_IN_FLIGHT = Gauge(
+    'db_admission_in_flight',
+    'Database-bound requests currently holding an admission slot',
+    multiprocess_mode='livesum'
+)
+DB_ADMISSION_REJECTED = Counter(
+    'db_admission_rejected',
+    'Requests rejected with 503 because no database slot freed up in time'
+)
+
+def render_metrics() -> bytes:
+    """All metrics in the Prometheus text format (merged across processes)"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
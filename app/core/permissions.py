@@ -0,0 +1,157 @@
+# app/core/permissions.py
+
+from enum import IntFlag
+from typing import Dict, Iterable, Optional, Tuple
+import time
+
+# What is this?
+# ─────────────
+# Role-based permissions compiled into a bitset.
+#
+# Each permission is one bit; each role maps to a mask of bits. A user's
+# active roles are OR-ed together once, cached, and every permission check
+# after that is a dict lookup plus a bitwise AND.
+
+class Permission(IntFlag):
+    """Individual permissions (one bit each)"""
+    USERS_READ = 1 << 0
+    USERS_LIST = 1 << 1
+    USERS_IMPORT = 1 << 2
+    USERS_MANAGE = 1 << 3
+    ROLES_MANAGE = 1 << 4
+    RECEIPTS_READ = 1 << 5
+    RECEIPTS_WRITE = 1 << 6
+    RECEIPTS_REVIEW = 1 << 7
+    CLIENTS_READ = 1 << 8
+    DASHBOARD_READ = 1 << 9
+    REPORTS_READ = 1 << 10
+
+# Permission names used by require_permission("receipts:read")
+PERMISSION_NAMES: Dict[str, Permission] = {
+    'users:read': Permission.USERS_READ,
+    'users:list': Permission.USERS_LIST,
+    'users:import': Permission.USERS_IMPORT,
+    'users:manage': Permission.USERS_MANAGE,
+    'roles:manage': Permission.ROLES_MANAGE,
+    'receipts:read': Permission.RECEIPTS_READ,
+    'receipts:write': Permission.RECEIPTS_WRITE,
+    'receipts:review': Permission.RECEIPTS_REVIEW,
+    'clients:read': Permission.CLIENTS_READ,
+    'dashboard:read': Permission.DASHBOARD_READ,
+    'reports:read': Permission.REPORTS_READ,
+}
+
+_CLIENT = (
+    Permission.RECEIPTS_READ
+    | Permission.RECEIPTS_WRITE
+    | Permission.DASHBOARD_READ
+    | Permission.REPORTS_READ
+)
+
+# Role name → permission mask
+ROLE_PERMISSIONS: Dict[str, int] = {
+    'client': _CLIENT,
+    'accountant': (
+        _CLIENT
+        | Permission.USERS_READ
+        | Permission.USERS_LIST
+        | Permission.USERS_IMPORT
+        | Permission.RECEIPTS_REVIEW
+        | Permission.CLIENTS_READ
+    ),
+    'admin': sum(PERMISSION_NAMES.values()),
+}
+
+def permission_bit(name: str) -> int:
+    """Resolve a permission name to its bit (raises ValueError if unknown)"""
+    try:
+        return PERMISSION_NAMES[name]
+    except KeyError:
+        raise ValueError(f"Unknown permission: {name}") from None
+
+def compile_permissions(role_names: Iterable[str]) -> int:
+    """OR the masks of the given roles together (unknown roles grant nothing)"""
+    mask = 0
+    for role_name in role_names:
+        mask |= ROLE_PERMISSIONS.get(role_name, 0)
+    return mask
+
+
+class PermissionCache:
+    """
+    Compiled permission masks per (user_id, organization_id)
+    
+    Each entry has a deadline: the earliest expires_at of the roles it was
+    compiled from, capped at ttl seconds, and remembers when it was
+    compiled. Role assignment/revocation invalidates the user's entries in
+    this process; other worker processes learn about it through a
+    timestamp in the shared cache (see PermissionService) and pass it to
+    get() as not_before.
+    """
+    
+    def __init__(self, ttl: int = 60, max_users: int = 100000):
+        self.ttl = ttl
+        self.max_users = max_users
+        # user_id → {organization_id → (mask, deadline, compiled_at)}
+        self._entries: Dict[str, Dict[Optional[str], Tuple[int, float, float]]] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def get(
+        self,
+        user_id: str,
+        organization_id: Optional[str] = None,
+        not_before: Optional[float] = None
+    ) -> Optional[int]:
+        """
+        Cached mask, or None if missing/expired
+        
+        Args:
+            not_before: Unix time of the user's last role change; entries
+                compiled before it are stale
+        """
+        entry = self._entries.get(user_id, {}).get(organization_id)
+        if entry is None or entry[1] <= time.time() or (not_before is not None and entry[2] <= not_before):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+    
+    def set(
+        self,
+        user_id: str,
+        organization_id: Optional[str],
+        mask: int,
+        expires_at: Optional[float] = None,
+        compiled_at: Optional[float] = None
+    ) -> None:
+        """
+        Store a mask
+        
+        Args:
+            expires_at: Unix time at which a role behind the mask expires
+            compiled_at: Unix time the roles were read (default: now)
+        """
+        now = time.time()
+        deadline = now + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+            
+        if user_id not in self._entries and len(self._entries) >= self.max_users:
+            # Drop the oldest user (dicts keep insertion order)
+            self._entries.pop(next(iter(self._entries)))
+        self._entries.setdefault(user_id, {})[organization_id] = (mask, deadline, compiled_at or now)
+    
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every organization's entry for a user"""
+        self._entries.pop(user_id, None)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def stats(self) -> dict:
+        return {
+            'users': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -0,0 +1,126 @@
+# app/core/rate_limit.py
+
+from typing import Optional
+import math
+import time
+
+from app.core.cache import LocalKeyValueStore, create_redis_client
+from app.core.config import settings
+
+# What is this?
+# ─────────────
+# Sliding-window rate limiting on top of a key-value store.
+#
+# Each key has one counter per window, created with its TTL and then
+# incremented in one transaction (SET NX EX + INCR, see incr_counter), so
+# a counter can never be left without an expiry. A hit is allowed while
+#
+#     current_count + previous_count * (share of the previous window
+#                                       still inside the sliding window)
+#
+# stays within the limit. That is two small integers per key and window,
+# and works the same on Redis (shared by all workers) and on the
+# in-process LocalKeyValueStore.
+#
+# Backends (LOGIN_THROTTLE_BACKEND setting):
+#   - "memory" → in-process store (per worker process: development only,
+#                settings refuse it when DEBUG is off)
+#   - "redis"  → shared store at REDIS_URL (limits hold across workers)
+
+async def incr_counter(store, key: str, ttl: int) -> int:
+    """
+    Add 1 to a counter that expires ttl seconds after its first hit
+    
+    The TTL is set when the counter is created, in the same transaction
+    as the increment: a crash between the two can't leave a counter that
+    never expires, and later hits don't extend it.
+    
+    Returns:
+        The counter's value after this hit
+    """
+    async with store.pipeline(transaction=True) as pipe:
+        pipe.set(key, 0, ex=ttl, nx=True)
+        pipe.incr(key)
+        _, count = await pipe.execute()
+    return int(count)
+
+
+class RateLimited(Exception):
+    """Raised when a rate limit is exceeded"""
+    
+    def __init__(self, scope: str, retry_after: int):
+        super().__init__(f"Rate limit exceeded ({scope})")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Sliding-window counters in a key-value store
+    
+    Usage:
+        limiter = RateLimiter(store)
+        retry_after = await limiter.hit("login:ip:1.2.3.4", limit=20, window=60)
+        if retry_after:
+            ...  # Reject
+    """
+    
+    def __init__(self, store, prefix: str = "rl"):
+        self.store = store
+        self.prefix = prefix
+    
+    async def hit(self, key: str, limit: int, window: int) -> Optional[int]:
+        """
+        Count one hit against key
+        
+        Args:
+            key: What is being limited (e.g. "login:ip:1.2.3.4")
+            limit: Hits allowed per window (0 or less = unlimited)
+            window: Window length in seconds
+            
+        Returns:
+            None if allowed, otherwise seconds until a retry may succeed
+        """
+        if limit <= 0:
+            return None
+            
+        now = time.time()
+        current = int(now // window)
+        elapsed = now - current * window
+        current_key = f"{self.prefix}:{key}:{current}"
+        
+        count = await incr_counter(self.store, current_key, window * 2)  # Still needed as "previous"
+            
+        previous = await self.store.get(f"{self.prefix}:{key}:{current - 1}")
+        weighted = count + int(previous or 0) * (window - elapsed) / window
+        
+        if weighted <= limit:
+            return None
+        return max(math.ceil(window - elapsed), 1)
+
+
+def create_rate_limit_store(backend: str):
+    """
+    Build the store behind the rate limiter by name
+    
+    Args:
+        backend: "memory" or "redis"
+    """
+    if backend == "memory":
+        return LocalKeyValueStore()
+    if backend == "redis":
+        if not settings.REDIS_URL:
+            raise RuntimeError("REDIS_URL must be set for the redis rate limit backend")
+        return create_redis_client(settings.REDIS_URL)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+# Global store (created on first use)
+_store = None
+
+def get_rate_limit_store():
+    """Get the configured rate limit store"""
+    global _store
+    if _store is None:
+        _store = create_rate_limit_store(settings.LOGIN_THROTTLE_BACKEND)
+    return _store
@@ -0,0 +1,104 @@
+# app/db/admission.py
+
+from contextlib import asynccontextmanager
+from typing import Optional
+import asyncio
+
+from app.core.metrics import DB_ADMISSION_IN_FLIGHT, DB_ADMISSION_REJECTED
+
+# What is this?
+# ─────────────
+# Admission control for database-bound requests.
+#
+# Every request that opens a database session (the get_db dependency)
+# takes a slot first. There are as many slots as the pool can hand out
+# connections (pool_size + max_overflow by default). When all slots are in
+# use a request waits at most DB_ADMISSION_TIMEOUT seconds for one; after
+# that it is rejected with DatabaseOverloaded, which the app turns into
+# 503 + Retry-After. Under overload requests fail fast instead of queueing
+# for the full pool timeout and dragging every other request down with
+# them.
+
+class DatabaseOverloaded(RuntimeError):
+    """Raised when a request could not get a database slot in time"""
+
+
+class DatabaseAdmission:
+    """
+    Bounded number of in-flight database-bound requests (per process)
+    
+    Usage:
+        async with db_admission.slot():
+            ...  # use the database
+    """
+    
+    def __init__(self, limit: Optional[int] = None, timeout: Optional[float] = None):
+        self._limit = limit
+        self._timeout = timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.rejected = 0
+    
+    @property
+    def limit(self) -> int:
+        """Number of slots (0 means admission control is off)"""
+        if self._limit is None:
+            from app.core.config import settings
+            limit = settings.DB_ADMISSION_LIMIT
+            if limit is None:
+                limit = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+            self._limit = limit
+        return self._limit
+    
+    @property
+    def timeout(self) -> float:
+        """Seconds a request may wait for a slot"""
+        if self._timeout is None:
+            from app.core.config import settings
+            self._timeout = settings.DB_ADMISSION_TIMEOUT
+        return self._timeout
+    
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold one slot for the duration of the block
+        
+        Raises:
+            DatabaseOverloaded: If no slot frees up within the timeout
+        """
+        if self.limit <= 0:
+            yield
+            return
+            
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()  # Free slot: no timer needed
+        else:
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                DB_ADMISSION_REJECTED.inc()
+                raise DatabaseOverloaded("Too many concurrent database requests") from None
+            
+        self.in_flight += 1
+        DB_ADMISSION_IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            DB_ADMISSION_IN_FLIGHT.dec()
+            self._semaphore.release()
+    
+    def stats(self) -> dict:
+        return {
+            'limit': self.limit,
+            'timeout_seconds': self.timeout,
+            'in_flight': self.in_flight,
+            'rejected': self.rejected
+        }
+
+
+# Global admission controller (one per server process)
+db_admission = DatabaseAdmission()
@@ -0,0 +1,41 @@
+# app/db/guards.py
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, raiseload
+
+# What is this?
+# ─────────────
+# A test-mode guard against N+1 queries.
+#
+# When installed, every ORM SELECT gets raiseload("*"), so touching a
+# relationship that the query did not eager-load (user.profile, user.roles)
+# raises InvalidRequestError instead of silently running one more SELECT.
+# Loader options named explicitly on the query (the USER_LOAD_PROFILES in
+# the user service) take precedence over the wildcard and keep working.
+#
+# Enabled with DB_RAISE_ON_LAZY_LOAD=true (set it in CI / test runs).
+
+_installed = False
+
+def _raise_on_lazy_load(orm_execute_state) -> None:
+    # Leave the follow-up SELECTs of selectinload/column loads alone
+    if (
+        orm_execute_state.is_select
+        and not orm_execute_state.is_relationship_load
+        and not orm_execute_state.is_column_load
+    ):
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
+
+def install_lazy_load_guard() -> None:
+    """Make lazy relationship loads raise for every Session (sync and async)"""
+    global _installed
+    if not _installed:
+        event.listen(Session, "do_orm_execute", _raise_on_lazy_load)
+        _installed = True
+
+def remove_lazy_load_guard() -> None:
+    """Undo install_lazy_load_guard()"""
+    global _installed
+    if _installed:
+        event.remove(Session, "do_orm_execute", _raise_on_lazy_load)
+        _installed = False
@@ -0,0 +1,76 @@
+# app/db/instrumentation.py
+
+from contextvars import ContextVar
+from typing import Optional
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# What is this?
+# ─────────────
+# Per-request SQL statistics.
+#
+# Two engine events time every statement the driver executes. The numbers
+# go to the QueryStats object of the current request (a contextvar set by
+# RequestTimingMiddleware), so each request knows how many statements it
+# ran and how long it spent in the database. Outside a request (scripts,
+# workers) nothing is recorded.
+#
+# The cost is two perf_counter() calls and a contextvar lookup per
+# statement, cheap enough to leave on in production (unlike echo=True).
+
+class QueryStats:
+    """Statement count and database time for one request"""
+    
+    __slots__ = ('count', 'total_ms')
+    
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+    
+    def record(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar('request_query_stats', default=None)
+
+def start_query_stats():
+    """
+    Start collecting stats for the current request
+    
+    Returns:
+        (stats, token) - pass token to stop_query_stats()
+    """
+    stats = QueryStats()
+    return stats, _request_stats.set(stats)
+
+def stop_query_stats(token) -> None:
+    """Stop collecting stats for the current request"""
+    _request_stats.reset(token)
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the current request (None outside a request)"""
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started_at = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    started_at = getattr(context, '_query_started_at', None)
+    if stats is not None and started_at is not None:
+        stats.record((time.perf_counter() - started_at) * 1000)
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Time every statement run through an engine
+    
+    For an AsyncEngine pass async_engine.sync_engine.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -5,9 +5,14 @@ Database models (SQLAlchemy ORM)
 from .user import User
 from .user_profile import UserProfile
 from .user_role import UserRole
+from .receipt import Receipt, ReceiptJob, ReceiptLineItem, ReceiptSummary
 
 __all__ = [
     'User',
     'UserProfile',
-    'UserRole'
+    'UserRole',
+    'Receipt',
+    'ReceiptJob',
+    'ReceiptLineItem',
+    'ReceiptSummary'
 ]
\ No newline at end of file
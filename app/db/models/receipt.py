@@ -0,0 +1,212 @@
+from sqlalchemy import Column, String, Date, DateTime, Float, ForeignKey, Integer, BigInteger, Numeric, Text, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from datetime import datetime
+import uuid
+
+from app.db.session import Base
+
+# Receipt statuses
+# ────────────────
+# PENDING  → stored, waiting for the processing worker (a receipt_jobs row)
+# APPROVED → extracted with confidence above the threshold
+# REVIEW   → needs a human look (low confidence)
+# FAILED   → processing gave up (the job was dead-lettered)
+RECEIPT_STATUSES = ("PENDING", "APPROVED", "REVIEW", "FAILED")
+
+class Receipt(Base):
+    """
+    An uploaded receipt (the file lives in object storage, see app/storage)
+    """
+    
+    __tablename__ = "receipts"
+    __table_args__ = (
+        Index('ix_receipts_user_id_created_at', 'user_id', 'created_at'),  # "my receipts, newest first"
+        # Deduplication: the same file uploaded twice by a user is one receipt
+        Index('ix_receipts_user_id_content_sha256', 'user_id', 'content_sha256', unique=True),
+    )
+    
+    # Primary Key
+    receipt_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    
+    # Owner
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('users.user_id', ondelete='CASCADE'),
+        nullable=False
+    )
+    
+    status = Column(String(20), nullable=False, default='PENDING')
+    
+    # Stored file
+    storage_key = Column(String(500), nullable=False)
+    original_filename = Column(String(255))
+    content_type = Column(String(100))
+    size_bytes = Column(BigInteger)
+    content_sha256 = Column(String(64))  # Hex digest of the file
+    
+    # Extracted data (filled in by the processing worker)
+    vendor_name = Column(String(255))
+    receipt_date = Column(Date)
+    total_amount = Column(Numeric(12, 2))
+    currency = Column(String(3), default='CAD')
+    category = Column(String(100))
+    confidence = Column(Float)
+    extracted_data = Column(JSONB)
+    error_message = Column(Text)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<Receipt(receipt_id='{self.receipt_id}', status='{self.status}')>"
+
+
+# Job statuses
+# ────────────
+# queued    → waiting (run_after says when it may run: retries back off)
+# running   → claimed by a worker (locked_by/locked_at)
+# succeeded → done
+# dead      → failed max_attempts times (dead letter: kept for inspection
+#             and requeueable with "python -m app.cli.receipt_worker --requeue-dead")
+JOB_STATUSES = ("queued", "running", "succeeded", "dead")
+
+class ReceiptJob(Base):
+    """
+    Durable processing job for a receipt (the queue is this table)
+    
+    Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    workers never take the same job and no broker is needed.
+    """
+    
+    __tablename__ = "receipt_jobs"
+    __table_args__ = (
+        # Claim query: next due queued jobs
+        Index(
+            'ix_receipt_jobs_queued_run_after', 'run_after',
+            postgresql_where=text("status = 'queued'")
+        ),
+        # Stale-lock recovery: running jobs by lock age
+        Index(
+            'ix_receipt_jobs_running_locked_at', 'locked_at',
+            postgresql_where=text("status = 'running'")
+        ),
+    )
+    
+    job_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    
+    receipt_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('receipts.receipt_id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    
+    status = Column(String(20), nullable=False, default='queued')
+    attempts = Column(Integer, nullable=False, default=0)  # Claims so far
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Lock (while running)
+    locked_by = Column(String(100))
+    locked_at = Column(DateTime)
+    
+    last_error = Column(Text)
+    timings = Column(JSONB)  # Per-stage durations of the last run (ms), see app/workers
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime)
+    
+    def __repr__(self):
+        return f"<ReceiptJob(job_id='{self.job_id}', status='{self.status}', attempts={self.attempts})>"
+
+
+class ReceiptLineItem(Base):
+    """
+    A line of a receipt, with its taxes (computed by the tax rules engine, app/tax)
+    
+    The processing worker files each receipt as one line (its total). The
+    computed columns depend on the rules version that produced them
+    (rules_version); "python -m app.cli.recompute_taxes" brings older rows
+    up to date.
+    """
+    
+    __tablename__ = "receipt_line_items"
+    __table_args__ = (
+        # A client's year; also the order recompute pages through (line_item_id breaks ties)
+        Index('ix_receipt_line_items_user_id_item_date', 'user_id', 'item_date', 'line_item_id'),
+    )
+    
+    line_item_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    
+    receipt_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('receipts.receipt_id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    
+    # Owner (copied from the receipt: recomputing a client's year reads no receipts)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('users.user_id', ondelete='CASCADE'),
+        nullable=False
+    )
+    
+    line_number = Column(Integer, nullable=False, default=1)
+    description = Column(String(255))
+    category = Column(String(100), nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)  # As paid, taxes included
+    item_date = Column(Date, nullable=False)  # Purchase date (picks the tax rates)
+    province = Column(String(2), nullable=False)  # Where taxed (two-letter code, "--" if unknown)
+    
+    # Computed by the tax rules engine
+    subtotal = Column(Numeric(12, 2))
+    gst_amount = Column(Numeric(12, 2))
+    hst_amount = Column(Numeric(12, 2))
+    pst_amount = Column(Numeric(12, 2))  # PST, RST or QST
+    itc_amount = Column(Numeric(12, 2))  # Input tax credit (GST/HST registrants)
+    deductible_amount = Column(Numeric(12, 2))  # Deductible from income
+    rules_version = Column(String(20))
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<ReceiptLineItem(line_item_id='{self.line_item_id}', category='{self.category}', amount={self.amount})>"
+
+
+class ReceiptSummary(Base):
+    """
+    Precomputed receipt totals per (user, fiscal year, month, category)
+    
+    What the dashboard reads instead of aggregating receipts. Counts only
+    categorized receipts (APPROVED or REVIEW), by receipt date (upload
+    date if unknown). The fiscal year is the calendar year in which it
+    ends (UserProfile.fiscal_year_end; December 31 if not set).
+    
+    Kept up to date by SummaryService in the same transaction as each
+    receipt change; "python -m app.cli.rebuild_summaries" recomputes it
+    from the receipts (backfills, fiscal year end changes).
+    """
+    
+    __tablename__ = "receipt_summaries"
+    
+    # Primary Key (the dashboard reads a (user_id, fiscal_year) prefix)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('users.user_id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    fiscal_year = Column(Integer, primary_key=True)
+    month = Column(Date, primary_key=True)  # First day of the month
+    category = Column(String(100), primary_key=True)
+    
+    receipt_count = Column(Integer, nullable=False, default=0)
+    review_count = Column(Integer, nullable=False, default=0)  # Of which waiting for review
+    total_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<ReceiptSummary(user_id='{self.user_id}', month='{self.month}', category='{self.category}')>"
@@ -1,6 +1,6 @@
 # app/db/models/user.py
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, String, Boolean, DateTime, Integer
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -25,6 +25,19 @@ class User(Base):
     # Table name in the database
     __tablename__ = "users"
     
+    # Composite indexes for keyset pagination on (created_at, user_id),
+    # covering only live (not soft-deleted) users
+    __table_args__ = (
+        Index(
+            'ix_users_created_at_user_id', 'created_at', 'user_id',
+            postgresql_where=text('deleted_at IS NULL')
+        ),
+        Index(
+            'ix_users_account_type_created_at_user_id', 'account_type', 'created_at', 'user_id',
+            postgresql_where=text('deleted_at IS NULL')
+        ),
+    )
+    
     # Columns
     # ───────
     
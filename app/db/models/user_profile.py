@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Date, ForeignKey, Integer, DateTime
+from sqlalchemy import Column, String, Boolean, Date, ForeignKey, Integer, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -13,6 +13,9 @@ class UserProfile(Base):
     """
     
     __tablename__ = "user_profiles"
+    __table_args__ = (
+        Index('ix_user_profiles_province_city', 'province', 'city'),  # Location filters
+    )
     
     # Primary Key
     profile_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
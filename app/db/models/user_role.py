@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -13,6 +13,9 @@ class UserRole(Base):
     """
     
     __tablename__ = "user_roles"
+    __table_args__ = (
+        Index('ix_user_roles_role_name_user_id', 'role_name', 'user_id'),  # "users with role X"
+    )
     
     role_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
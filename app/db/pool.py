@@ -0,0 +1,51 @@
+# app/db/pool.py
+
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+import time
+
+from app.core.metrics import (
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_OVERFLOW,
+    DB_POOL_SIZE,
+)
+
+# What is this?
+# ─────────────
+# Connection pools that report to /metrics.
+#
+# Same behaviour as SQLAlchemy's QueuePool; on every checkout they time
+# how long the caller waited for a connection, and on checkout and checkin
+# they refresh the checked-out / overflow / size gauges. The pool label is
+# the engine's pool_logging_name ("sync" or "async").
+
+class _PoolMetricsMixin:
+    
+    def _metrics_label(self) -> str:
+        return self.logging_name or "default"
+    
+    def _update_gauges(self) -> None:
+        label = self._metrics_label()
+        DB_POOL_CHECKED_OUT.labels(label).set(self.checkedout())
+        DB_POOL_OVERFLOW.labels(label).set(max(self.overflow(), 0))  # Negative below pool_size
+        DB_POOL_SIZE.labels(label).set(self.size())
+    
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self._metrics_label()).observe(time.perf_counter() - started_at)
+            self._update_gauges()
+    
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+
+class TimedQueuePool(_PoolMetricsMixin, QueuePool):
+    """QueuePool with checkout wait and usage metrics (sync engine)"""
+
+
+class TimedAsyncAdaptedQueuePool(_PoolMetricsMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with checkout wait and usage metrics (async engine)"""
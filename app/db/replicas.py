@@ -0,0 +1,110 @@
+# app/db/replicas.py
+
+from typing import List, Optional
+from uuid import UUID
+import itertools
+import time
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.cache import get_cache
+from app.core.config import settings
+
+# What is this?
+# ─────────────
+# Routing of read-only requests to read replicas.
+#
+#   - Replicas are picked round-robin; one that fails with a connection
+#     error is skipped for REPLICA_RETRY_SECONDS, and when none is healthy
+#     reads fall back to the primary.
+#   - Writes always use the primary (get_db). After a write that touches a
+#     user, reads about that user go to the primary for
+#     REPLICA_STICKINESS_SECONDS (longer than the replication lag), so
+#     people see their own changes and stale replica rows never end up
+#     back in the user cache. The marker lives in the cache backend, which
+#     must be shared by all workers: settings refuse replicas without
+#     CACHE_BACKEND=redis.
+
+def replica_urls() -> List[str]:
+    """DATABASE_REPLICA_URLS as a list"""
+    return [url.strip() for url in (settings.DATABASE_REPLICA_URLS or "").split(",") if url.strip()]
+
+def is_connection_error(exc: BaseException) -> bool:
+    """True for errors that mean the database itself is unreachable"""
+    if isinstance(exc, (OperationalError, InterfaceError, OSError)):
+        return True
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+
+class ReplicaRouter:
+    """
+    Round-robin, health-aware choice of a replica engine
+    
+    Usage:
+        engine = replica_router.choose()  # None → use the primary
+        try:
+            ...
+        except Exception as e:
+            if is_connection_error(e):
+                replica_router.mark_down(engine)
+    """
+    
+    def __init__(self, engines: List[AsyncEngine], retry_seconds: int = 30):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._next = itertools.count()
+        self._down_until = {}  # engine → time.monotonic() deadline
+        self.reads = {}        # engine name → reads routed there
+    
+    def choose(self) -> Optional[AsyncEngine]:
+        """Next healthy replica (None if there are none)"""
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._next) % len(self.engines)]
+            if self._down_until.get(engine, 0) <= now:
+                return engine
+        return None
+    
+    def mark_down(self, engine: AsyncEngine) -> None:
+        """Skip a replica for retry_seconds"""
+        self._down_until[engine] = time.monotonic() + self.retry_seconds
+    
+    def record_read(self, engine: Optional[AsyncEngine]) -> None:
+        name = engine.pool.logging_name if engine is not None else "primary"
+        self.reads[name] = self.reads.get(name, 0) + 1
+    
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            'replicas': [
+                {
+                    'name': engine.pool.logging_name,
+                    'healthy': self._down_until.get(engine, 0) <= now
+                }
+                for engine in self.engines
+            ],
+            'reads': dict(self.reads)
+        }
+
+
+# Read-your-writes stickiness
+# ───────────────────────────
+
+def _recent_write_key(user_id) -> Optional[str]:
+    """Marker key in the canonical UUID form, whatever the spelling (None if not a UUID)"""
+    try:
+        return f"recent-write:{UUID(str(user_id))}"
+    except ValueError:
+        return None
+
+async def mark_user_written(user_id) -> None:
+    """Send reads about this user to the primary for a while (no-op without replicas)"""
+    key = _recent_write_key(user_id)
+    if settings.DATABASE_REPLICA_URLS and key is not None:
+        await get_cache().set(key, b"1", ttl=settings.REPLICA_STICKINESS_SECONDS)
+
+async def has_recent_write(user_id) -> bool:
+    """True if the user was written within the stickiness window (False for non-UUIDs)"""
+    key = _recent_write_key(user_id)
+    return key is not None and await get_cache().get(key) is not None
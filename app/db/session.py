@@ -1,55 +1,263 @@
 # app/db/session.py
 
+from contextlib import asynccontextmanager
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from app.core.config import settings
+from app.db.guards import install_lazy_load_guard
+from app.db.instrumentation import instrument_engine
+from app.db.pool import TimedQueuePool, TimedAsyncAdaptedQueuePool
+from app.db.admission import db_admission
+from app.db.replicas import ReplicaRouter, replica_urls
+from typing import Optional
+from uuid import uuid4
+import asyncio
 
 # What is this?
 # ─────────────
 # This file sets up the connection to your PostgreSQL database
+#
+# There are two paths:
+#   - async (AsyncEngine + AsyncSession) → used by the FastAPI app
+#   - sync  (Engine + Session)           → used by scripts, Alembic, workers
 
-# Create database engine
-# ──────────────────────
-# The engine is like a "connection pool" to your database
-engine = create_engine(
-    settings.DATABASE_URL,
-    # echo=True will print all SQL commands (useful for learning!)
-    echo=True,
-    # Connection pool settings
-    pool_pre_ping=True,  # Test connections before using them
-    pool_size=5,          # Keep 5 connections ready
-    max_overflow=10       # Allow up to 10 extra connections if needed
-)
+def _async_database_url(url: str) -> str:
+    """
+    Turn the sync DATABASE_URL into an asyncpg URL
+    
+    postgresql://...          → postgresql+asyncpg://...
+    postgresql+psycopg2://... → postgresql+asyncpg://...
+    """
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+def _pool_options(poolclass, name: str) -> dict:
+    """
+    Connection pool settings from Settings (DB_POOL_*)
+    
+    With DB_USE_NULLPOOL every session opens and closes its own connection
+    (pooling is left to PgBouncer or similar).
+    """
+    if settings.DB_USE_NULLPOOL:
+        return {
+            'poolclass': NullPool,
+            'pool_logging_name': name
+        }
+    return {
+        'poolclass': poolclass,                      # QueuePool + /metrics gauges
+        'pool_logging_name': name,
+        'pool_size': settings.DB_POOL_SIZE,          # Connections kept ready
+        'max_overflow': settings.DB_MAX_OVERFLOW,    # Extra connections allowed under load
+        'pool_timeout': settings.DB_POOL_TIMEOUT,    # Wait this long for a connection, then fail
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING   # Test connections before using them
+    }
+
+def _async_connect_args() -> dict:
+    """
+    asyncpg connection arguments
+    
+    PgBouncer in transaction mode hands each transaction to a different
+    server connection, so named prepared statements (and asyncpg's
+    statement cache) would point at the wrong backend. DB_PGBOUNCER_MODE
+    turns both caches off and gives every statement a unique name.
+    """
+    if not settings.DB_PGBOUNCER_MODE:
+        return {}
+    return {
+        'statement_cache_size': 0,           # asyncpg's own cache
+        'prepared_statement_cache_size': 0,  # SQLAlchemy's asyncpg adapter cache
+        'prepared_statement_name_func': lambda: f"__asyncpg_{uuid4()}__"
+    }
+
+# Engines (created on first use)
+# ──────────────────────────────
+# Nothing connects, and no DBAPI driver (psycopg2/asyncpg) is imported,
+# until an engine is first asked for: importing the app stays cheap, and
+# the web app never loads the sync driver at all. The app lifespan
+# (app/main.py) opens the first connections before traffic arrives.
+_engine = None
+_async_engine = None
+_replica_router: Optional[ReplicaRouter] = None
 
 # Create SessionLocal class
 # ─────────────────────────
 # A Session is like a "workspace" where you interact with the database
-# Each request will create its own session
+# Each request will create its own session (bound by get_engine())
 SessionLocal = sessionmaker(
     autocommit=False,  # Don't auto-save changes
-    autoflush=False,   # Don't auto-send changes to DB
-    bind=engine        # Connect to our engine
+    autoflush=False    # Don't auto-send changes to DB
 )
 
+# Create AsyncSessionLocal class
+# ──────────────────────────────
+# expire_on_commit=False: attribute access after commit would otherwise
+# trigger an implicit (and in async, illegal) refresh query
+# (bound by get_async_engine())
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False,
+    expire_on_commit=False
+)
+
+def get_engine():
+    """The sync engine (scripts, Alembic, workers)"""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            settings.DATABASE_URL,
+            # DB_ECHO=true will print all SQL commands (useful for debugging, slow
+            # in production: per-request query stats come from instrumentation.py)
+            echo=settings.DB_ECHO,
+            **_pool_options(TimedQueuePool, "sync")
+        )
+        instrument_engine(_engine)  # Per-request SQL timing
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+def get_async_engine() -> AsyncEngine:
+    """The async engine (the FastAPI app; same pool settings, awaited connections)"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL or _async_database_url(settings.DATABASE_URL),
+            echo=settings.DB_ECHO,
+            connect_args=_async_connect_args(),
+            **_pool_options(TimedAsyncAdaptedQueuePool, "async")
+        )
+        instrument_engine(_async_engine.sync_engine)  # Per-request SQL timing
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+def get_replica_router() -> ReplicaRouter:
+    """
+    Router over the read replica engines
+    
+    Replicas are optional (DATABASE_REPLICA_URLS); only read-only endpoints
+    use them, through get_read_db in app/api/deps.py
+    """
+    global _replica_router
+    if _replica_router is None:
+        replica_engines = []
+        for index, url in enumerate(replica_urls()):
+            replica_engine = create_async_engine(
+                _async_database_url(url),
+                echo=settings.DB_ECHO,
+                connect_args=_async_connect_args(),
+                **_pool_options(TimedAsyncAdaptedQueuePool, f"replica{index}")
+            )
+            instrument_engine(replica_engine.sync_engine)
+            replica_engines.append(replica_engine)
+        _replica_router = ReplicaRouter(replica_engines, retry_seconds=settings.REPLICA_RETRY_SECONDS)
+    return _replica_router
+
+async def warm_pool(engine: AsyncEngine, connections: int) -> int:
+    """
+    Open connections up front so the first requests don't pay for them
+    
+    The connections are held at the same time (otherwise the pool would
+    hand out the same one each time) and then returned to the pool.
+    
+    Returns:
+        Number of connections opened
+    """
+    if connections <= 0:
+        return 0
+    results = await asyncio.gather(
+        *(engine.connect() for _ in range(connections)),
+        return_exceptions=True
+    )
+    opened = [conn for conn in results if not isinstance(conn, BaseException)]
+    for conn in opened:
+        await conn.exec_driver_sql("SELECT 1")
+    await asyncio.gather(*(conn.close() for conn in opened))
+    
+    errors = [e for e in results if isinstance(e, BaseException)]
+    if errors and not opened:
+        raise errors[0]
+    return len(opened)
+
+def reset_engines_after_fork() -> None:
+    """
+    Give a forked worker process fresh connection pools
+    
+    Pooled connections inherited from the parent must never be used (two
+    processes would talk over the same socket), so each engine gets a new,
+    empty pool. close=False leaves the parent's connections alone.
+    """
+    if _engine is not None:
+        _engine.dispose(close=False)
+    if _async_engine is not None:
+        _async_engine.sync_engine.dispose(close=False)
+    if _replica_router is not None:
+        for replica_engine in _replica_router.engines:
+            replica_engine.sync_engine.dispose(close=False)
+
+async def dispose_engines() -> None:
+    """Close every pooled connection (shutdown, or after forking a worker)"""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _replica_router is not None:
+        for replica_engine in _replica_router.engines:
+            await replica_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+
+# N+1 guard (tests/CI)
+# ────────────────────
+# Lazy relationship loads raise instead of quietly querying per row
+if settings.DB_RAISE_ON_LAZY_LOAD:
+    install_lazy_load_guard()
+
 # Create Base class
 # ─────────────────
 # All your database models will inherit from this
 Base = declarative_base()
 
+@asynccontextmanager
+async def db_session():
+    """
+    An async session (with an admission slot) for part of a request
+    
+    For endpoints that do slow non-database work, such as receiving an
+    upload, and must not hold a connection slot meanwhile.
+    
+    Usage:
+        async with db_session() as db:
+            result = await db.execute(select(User))
+    """
+    get_async_engine()  # Binds AsyncSessionLocal on first use
+    async with db_admission.slot():
+        async with AsyncSessionLocal() as db:
+            yield db
+
 # Dependency function for FastAPI
 # ────────────────────────────────
-def get_db():
+async def get_db():
     """
-    Create a new database session for each request
+    Create a new async database session for each request
     Automatically closes the session when done
     
+    Each request holds an admission slot while it has a session, so when
+    the database is saturated new requests get a 503 (DatabaseOverloaded)
+    after DB_ADMISSION_TIMEOUT instead of queueing for a connection.
+    
     Usage in FastAPI:
         @app.get("/users")
-        def get_users(db: Session = Depends(get_db)):
-            users = db.query(User).all()
-            return users
+        async def get_users(db: AsyncSession = Depends(get_db)):
+            result = await db.execute(select(User))
+            return result.scalars().all()
+    """
+    async with db_session() as db:
+        yield db  # Give the session to the request
+
+def get_sync_db():
     """
-    db = SessionLocal()
+    Create a new sync database session for each request
+    (for endpoints that still use blocking code)
+    """
+    db = get_db_session()
     try:
         yield db  # Give the session to the request
     finally:
@@ -68,4 +276,17 @@ def get_db_session():
         finally:
             db.close()
     """
-    return SessionLocal()
\ No newline at end of file
+    get_engine()  # Binds SessionLocal on first use
+    return SessionLocal()
+
+# Helper function to get an async session (for async scripts/workers)
+def get_async_db_session() -> AsyncSession:
+    """
+    Get an async database session for use in scripts/workers
+    
+    Usage:
+        async with get_async_db_session() as db:
+            result = await db.execute(select(User))
+    """
+    get_async_engine()  # Binds AsyncSessionLocal on first use
+    return AsyncSessionLocal()
@@ -2,35 +2,120 @@
 TaxFlow AI - Main FastAPI Application
 """
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
+
+from fastapi import APIRouter, FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.v1 import users
+from app.api.v1 import users, receipts, dashboard
+from app.api.middleware import RequestTimingMiddleware
+from app.api.responses import ORJSONResponse
 from app.core.config import settings
+from app.core.cache import get_cache
+from app.core.metrics import render_metrics, METRICS_CONTENT_TYPE
+from app.db.admission import DatabaseOverloaded, db_admission
+from app.db.session import get_async_engine, get_replica_router, warm_pool, dispose_engines
+from app.storage import close_storage
+from app.utils.security import password_hasher, hash_password
+from app.utils.tokens import load_keys
 
-# Create FastAPI app
-app = FastAPI(
-    title="TaxFlow AI API",
-    description="AI-powered tax receipt management system",
-    version="0.1.0",
-    docs_url="/docs",  # Swagger UI
-    redoc_url="/redoc"  # ReDoc
-)
-
-# CORS middleware (allow frontend to connect)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify exact origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
+logger = logging.getLogger("app.startup")
+
+# Startup warm-up
+# ───────────────
+# Without it the first requests after a deploy pay for opening database
+# connections, spawning the password hashing processes (and importing
+# passlib/bcrypt in them) and building the OpenAPI schema. The lifespan
+# does that work before the server accepts traffic (STARTUP_WARMUP).
+
+async def warm_up(app: FastAPI) -> dict:
+    """
+    Get the app ready for traffic
+    
+    Returns:
+        Milliseconds spent per step
+    """
+    timings = {}
+    
+    def step(name: str, started: float) -> None:
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+        
+    # Database: open DB_WARM_CONNECTIONS pooled connections per engine
+    started = time.perf_counter()
+    connections = settings.DB_WARM_CONNECTIONS
+    if connections is None:
+        connections = 0 if settings.DB_USE_NULLPOOL else settings.DB_POOL_SIZE
+    replica_router = get_replica_router()
+    for engine in [get_async_engine(), *replica_router.engines]:
+        try:
+            await warm_pool(engine, connections)
+        except Exception:
+            # Serve anyway: requests fail (503) until the database is back,
+            # and reads skip an unreachable replica from the start
+            logger.warning("Could not warm connection pool %s", engine.pool.logging_name, exc_info=True)
+            if engine in replica_router.engines:
+                replica_router.mark_down(engine)
+    step('database', started)
+    
+    # Schemas and keys: JSON schemas for every route, parsed JWT keys
+    started = time.perf_counter()
+    app.openapi()
+    load_keys()
+    get_cache()
+    step('schemas', started)
+    
+    # Password hashing: one dummy hash per worker process starts the
+    # processes and loads the KDF in each
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        password_hasher.run(hash_password, "warm-up")
+        for _ in range(max(password_hasher.max_workers, 1))
+    ))
+    step('password_hasher', started)
+    
+    return timings
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up before serving; release processes and connections on shutdown"""
+    if settings.STARTUP_WARMUP:
+        started = time.perf_counter()
+        timings = await warm_up(app)
+        logger.info(
+            "Warm-up done in %.0f ms",
+            (time.perf_counter() - started) * 1000,
+            extra={'warmup_ms': timings}
+        )
+    try:
+        yield
+    finally:
+        # Stop the password hashing worker processes
+        password_hasher.shutdown()
+        await close_storage()
+        await dispose_engines()
+
+# Load shedding
+# ─────────────
+# No admission slot (DatabaseOverloaded) or no pooled connection within
+# DB_POOL_TIMEOUT (sqlalchemy TimeoutError): answer 503 right away so the
+# client backs off, instead of letting requests pile up
+async def database_overloaded_handler(request: Request, exc: Exception):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service is busy, please retry"},
+        headers={"Retry-After": str(settings.DB_RETRY_AFTER_SECONDS)}
+    )
+
+# Health, metrics and root endpoints
+router = APIRouter()
 
 # Health check endpoint
-@app.get("/health")
+@router.get("/health")
 def health_check():
     """Check if API is running"""
     return {
@@ -39,8 +124,34 @@ def health_check():
         "version": "0.1.0"
     }
 
+# Password hashing pool stats
+@router.get("/health/password-hasher")
+def password_hasher_stats():
+    """Queue depth and latency of the password hashing pool"""
+    return password_hasher.stats()
+
+# Cache stats
+@router.get("/health/cache")
+def cache_stats():
+    """Hit/miss/eviction counters of the cache"""
+    return get_cache().stats()
+
+# Database admission and read routing stats
+@router.get("/health/database")
+def database_stats():
+    """Admission slots in use, requests shed and read replica routing"""
+    stats = db_admission.stats()
+    stats['read_routing'] = get_replica_router().stats()
+    return stats
+
+# Prometheus metrics
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Request latency, password hashing and connection pool metrics"""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 # Root endpoint
-@app.get("/")
+@router.get("/")
 def root():
     """API root"""
     return {
@@ -48,3 +159,47 @@ def root():
         "docs": "/docs",
         "health": "/health"
     }
+
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application
+    
+    Usage:
+        uvicorn app.main:app                      # Module-level instance
+        uvicorn --factory app.main:create_app     # Fresh instance
+    """
+    app = FastAPI(
+        title="TaxFlow AI API",
+        description="AI-powered tax receipt management system",
+        version="0.1.0",
+        docs_url="/docs",  # Swagger UI
+        redoc_url="/redoc",  # ReDoc
+        default_response_class=ORJSONResponse,  # orjson instead of json.dumps
+        lifespan=lifespan
+    )
+    
+    # CORS middleware (allow frontend to connect)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # In production, specify exact origins
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    # Per-request SQL timing (Server-Timing header + request log line)
+    app.add_middleware(RequestTimingMiddleware)
+    
+    app.add_exception_handler(DatabaseOverloaded, database_overloaded_handler)
+    app.add_exception_handler(PoolTimeoutError, database_overloaded_handler)
+    
+    # Include routers
+    app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
+    app.include_router(receipts.router, prefix="/api/v1/receipts", tags=["receipts"])
+    app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["dashboard"])
+    app.include_router(router)
+    
+    return app
+
+# Create FastAPI app
+app = create_app()
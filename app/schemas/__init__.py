@@ -5,17 +5,41 @@ from .user import (
     UserLoginRequest,
     UserUpdateRequest,
     UserResponse,
+    UserProfileResponse,
+    UserRoleResponse,
+    UserDetailResponse,
+    UserListResponse,
     UserRegisterResponse,
     UserLoginResponse,
-    MessageResponse
+    TokenRefreshRequest,
+    TokenResponse,
+    CurrentUser,
+    RoleAssignRequest,
+    MessageResponse,
+    ImportRowError,
+    ClientImportResponse
 )
+from .receipt import ReceiptResponse, ReceiptUpdateRequest, DashboardResponse
 
 __all__ = [
     'UserRegisterRequest',
     'UserLoginRequest',
     'UserUpdateRequest',
     'UserResponse',
+    'UserProfileResponse',
+    'UserRoleResponse',
+    'UserDetailResponse',
+    'UserListResponse',
     'UserRegisterResponse',
     'UserLoginResponse',
-    'MessageResponse'
+    'TokenRefreshRequest',
+    'TokenResponse',
+    'CurrentUser',
+    'RoleAssignRequest',
+    'MessageResponse',
+    'ImportRowError',
+    'ClientImportResponse',
+    'ReceiptResponse',
+    'ReceiptUpdateRequest',
+    'DashboardResponse'
 ]
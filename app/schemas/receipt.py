@@ -0,0 +1,107 @@
+"""Pydantic schemas for Receipt API responses"""
+
+from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, List, Optional
+from datetime import datetime, date
+from decimal import Decimal
+from uuid import UUID
+
+from app.core.categories import EXPENSE_CATEGORIES
+
+# Request Schemas (Input)
+# ───────────────────────
+
+class ReceiptUpdateRequest(BaseModel):
+    """Schema for correcting a receipt's extracted fields (all optional)"""
+    vendor_name: Optional[str] = Field(None, max_length=255)
+    receipt_date: Optional[date] = None
+    total_amount: Optional[Annotated[Decimal, Field(max_digits=12, decimal_places=2)]] = None
+    currency: Optional[str] = Field(None, pattern="^[A-Z]{3}$")
+    category: Optional[str] = None
+    
+    @field_validator('category')
+    def known_category(cls, v):
+        """Only the expense categories the rest of the app knows"""
+        if v is not None and v not in EXPENSE_CATEGORIES:
+            raise ValueError(f"Unknown category; expected one of: {', '.join(EXPENSE_CATEGORIES)}")
+        return v
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "vendor_name": "Shell",
+                "total_amount": "65.50",
+                "category": "Fuel & Vehicle"
+            }
+        }
+    }
+
+# Response Schemas (Output)
+# ─────────────────────────
+
+class ReceiptResponse(BaseModel):
+    """Schema for a receipt and its processing status"""
+    receipt_id: str
+    status: str  # PENDING, APPROVED, REVIEW, FAILED
+    original_filename: Optional[str] = None
+    content_type: Optional[str] = None
+    size_bytes: Optional[int] = None
+    vendor_name: Optional[str] = None
+    receipt_date: Optional[date] = None
+    total_amount: Optional[Decimal] = None
+    currency: Optional[str] = None
+    category: Optional[str] = None
+    confidence: Optional[float] = None
+    error_message: Optional[str] = None
+    created_at: datetime
+    processed_at: Optional[datetime] = None
+    
+    @field_validator('receipt_id', mode='before')
+    def stringify_receipt_id(cls, v):
+        """ORM rows carry receipt_id as a UUID object"""
+        return str(v) if isinstance(v, UUID) else v
+    
+    model_config = {
+        "from_attributes": True,
+        "json_schema_extra": {
+            "example": {
+                "receipt_id": "3f2b8c1e-8d4a-4f6e-9b1a-2c3d4e5f6a7b",
+                "status": "PENDING",
+                "original_filename": "coffee.jpg",
+                "content_type": "image/jpeg",
+                "size_bytes": 482113,
+                "created_at": "2024-12-02T10:30:00Z"
+            }
+        }
+    }
+
+
+# Dashboard
+# ─────────
+
+class CategoryTotals(BaseModel):
+    """Receipts of one category"""
+    category: str
+    receipt_count: int
+    review_count: int
+    total_amount: Decimal
+    share: float  # Of the period's total amount (0 to 1)
+
+class MonthTotals(BaseModel):
+    """Receipts of one month"""
+    month: date  # First day of the month
+    receipt_count: int
+    review_count: int
+    total_amount: Decimal
+    categories: List[CategoryTotals]
+
+class DashboardResponse(BaseModel):
+    """Schema for the dashboard: a fiscal year's receipts by month and category"""
+    fiscal_year: int  # Calendar year in which the fiscal year ends
+    start_date: date
+    end_date: date
+    receipt_count: int
+    review_count: int  # Waiting for review
+    total_amount: Decimal
+    categories: List[CategoryTotals]
+    months: List[MonthTotals]
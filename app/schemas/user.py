@@ -1,8 +1,9 @@
 """Pydantic schemas for User API requests/responses"""
 
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional
-from datetime import datetime
+from typing import Optional, List
+from datetime import datetime, date
+from uuid import UUID
 import re
 
 # Request Schemas (Input)
@@ -85,6 +86,11 @@ class UserResponse(BaseModel):
     email_verified: bool
     created_at: datetime
     
+    @field_validator('user_id', mode='before')
+    def stringify_user_id(cls, v):
+        """ORM rows carry user_id as a UUID object"""
+        return str(v) if isinstance(v, UUID) else v
+    
     model_config = {
         "from_attributes": True,
         "json_schema_extra": {
@@ -101,6 +107,47 @@ class UserResponse(BaseModel):
         }
     }
 
+class UserProfileResponse(BaseModel):
+    """Schema for user profile data in responses"""
+    business_name: Optional[str] = None
+    business_number: Optional[str] = None
+    hst_number: Optional[str] = None
+    industry: Optional[str] = None
+    fiscal_year_end: Optional[date] = None
+    address_line1: Optional[str] = None
+    address_line2: Optional[str] = None
+    city: Optional[str] = None
+    province: Optional[str] = None
+    postal_code: Optional[str] = None
+    country: Optional[str] = None
+    language: Optional[str] = None
+    currency: Optional[str] = None
+    timezone: Optional[str] = None
+    profile_completed: Optional[bool] = None
+    profile_completion_percentage: Optional[int] = None
+    
+    model_config = {"from_attributes": True}
+
+class UserRoleResponse(BaseModel):
+    """Schema for user role data in responses"""
+    role_name: str
+    organization_id: Optional[UUID] = None
+    is_active: Optional[bool] = None
+    assigned_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    
+    model_config = {"from_attributes": True}
+
+class UserDetailResponse(UserResponse):
+    """Schema for user data with profile and roles"""
+    profile: Optional[UserProfileResponse] = None
+    roles: List[UserRoleResponse] = []
+
+class UserListResponse(BaseModel):
+    """Schema for one page of users (keyset pagination)"""
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+
 class UserRegisterResponse(BaseModel):
     """Schema for registration response"""
     success: bool
@@ -110,10 +157,48 @@ class UserRegisterResponse(BaseModel):
 class UserLoginResponse(BaseModel):
     """Schema for login response"""
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
+    expires_in: Optional[int] = None  # Access token lifetime (seconds)
     user: UserResponse
 
+class TokenRefreshRequest(BaseModel):
+    """Schema for exchanging a refresh token"""
+    refresh_token: str
+
+class TokenResponse(BaseModel):
+    """Schema for refreshed tokens"""
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+class CurrentUser(BaseModel):
+    """Caller identity taken from the access token claims (no DB lookup)"""
+    user_id: str
+    account_type: str
+    roles: List[str] = []
+
+class RoleAssignRequest(BaseModel):
+    """Schema for assigning a role to a user"""
+    role_name: str = Field(..., pattern="^(client|accountant|admin)$")
+    organization_id: Optional[UUID] = None
+    expires_at: Optional[datetime] = None
+
 class MessageResponse(BaseModel):
     """Generic message response"""
     success: bool
     message: str
+
+class ImportRowError(BaseModel):
+    """One rejected row of a bulk client import"""
+    row: int
+    email: Optional[str] = None
+    errors: List[str]
+
+class ClientImportResponse(BaseModel):
+    """Schema for bulk client import report"""
+    total_rows: int
+    created: int
+    failed: int
+    errors: List[ImportRowError]
@@ -0,0 +1,274 @@
+"""Import service - Bulk client onboarding for accounting firms"""
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from typing import AsyncIterator, List, Optional, Tuple
+from datetime import datetime
+import codecs
+import csv
+import json
+
+from app.core.config import settings
+from app.db.models import User, UserProfile, UserRole
+from app.utils.security import hash_passwords_async
+from app.schemas.user import UserRegisterRequest, ClientImportResponse, ImportRowError
+
+# Supported input formats
+IMPORT_FORMATS = ("csv", "ndjson")
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a stream of byte chunks into text lines (without newlines)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+            
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield buffer.rstrip("\r")
+
+def _in_quoted_field(line: str, in_quotes: bool) -> bool:
+    """
+    Whether a CSV record continues past this line (open quoted field)
+    
+    Follows the csv module's default dialect: a quote opens a quoted
+    field only at the start of a field ('O"Brien' is a plain value), and
+    '""' inside a quoted field is an escaped quote.
+    
+    Args:
+        line: One physical line
+        in_quotes: Whether the line starts inside a quoted field
+    """
+    field_start = not in_quotes
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if in_quotes:
+            if char == '"':
+                if line[i + 1:i + 2] == '"':
+                    i += 1  # Escaped quote
+                else:
+                    in_quotes = False
+        elif char == '"' and field_start:
+            in_quotes = True
+        field_start = not in_quotes and char == ','
+        i += 1
+    return in_quotes
+
+async def iter_records(
+    chunks: AsyncIterator[bytes],
+    fmt: str
+) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Stream client records out of a CSV or NDJSON upload
+    
+    CSV needs a header row naming the UserRegisterRequest fields
+    (email, password, first_name, last_name, account_type, phone).
+    
+    Args:
+        chunks: Raw body chunks (request.stream() or a file reader)
+        fmt: "csv" or "ndjson"
+        
+    Yields:
+        (row_number, record, None) for parsed rows
+        (row_number, None, error) for rows that could not be parsed
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+        
+    row_number = 0
+    header = None
+    pending = []  # Lines of a CSV record spanning several physical lines
+    in_quotes = False
+    
+    async for line in _iter_lines(chunks):
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Each line must be a JSON object"
+                continue
+            yield row_number, record, None
+            continue
+            
+        # CSV: a quoted field may contain newlines, so collect lines until
+        # the record's quoted fields are closed, then parse them together
+        pending.append(line)
+        in_quotes = _in_quoted_field(line, in_quotes)
+        if in_quotes:
+            continue
+        lines, pending = pending, []
+        
+        if len(lines) == 1 and not lines[0].strip():
+            continue
+        values = next(csv.reader(["\n".join(lines)]))
+        
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+            
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+            
+        # Empty CSV cells mean "not provided"
+        yield row_number, {
+            key: value for key, value in zip(header, values) if value != ""
+        }, None
+        
+    if pending:
+        yield row_number + 1, None, "Unterminated quoted field"
+
+class ClientImportService:
+    """Service for bulk client imports"""
+    
+    @staticmethod
+    async def import_clients(
+        db: AsyncSession,
+        chunks: AsyncIterator[bytes],
+        fmt: str,
+        chunk_size: Optional[int] = None
+    ) -> ClientImportResponse:
+        """
+        Import clients from a CSV/NDJSON stream
+        
+        Rows are validated with UserRegisterRequest, hashed in parallel in
+        the password pool and inserted in batches of chunk_size. Each batch
+        is its own transaction, so a bad row never rolls back other rows.
+        
+        Args:
+            db: Database session
+            chunks: Raw body chunks
+            fmt: "csv" or "ndjson"
+            chunk_size: Rows per batch (default IMPORT_CHUNK_SIZE)
+            
+        Returns:
+            Import report with a per-row error list
+        """
+        chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+        report = ClientImportResponse(total_rows=0, created=0, failed=0, errors=[])
+        seen_emails = set()
+        batch = []
+        
+        async for row_number, record, error in iter_records(chunks, fmt):
+            report.total_rows += 1
+            if error:
+                report.errors.append(ImportRowError(row=row_number, errors=[error]))
+                continue
+                
+            batch.append((row_number, record))
+            if len(batch) >= chunk_size:
+                await ClientImportService._import_batch(db, batch, report, seen_emails)
+                batch = []
+                
+        if batch:
+            await ClientImportService._import_batch(db, batch, report, seen_emails)
+            
+        report.errors.sort(key=lambda error: error.row)
+        report.failed = len(report.errors)
+        return report
+    
+    @staticmethod
+    async def _import_batch(
+        db: AsyncSession,
+        batch: List[Tuple[int, dict]],
+        report: ClientImportResponse,
+        seen_emails: set
+    ) -> None:
+        """Validate, hash and insert one batch of rows"""
+        valid = []
+        for row_number, record in batch:
+            email = record.get("email")
+            try:
+                user_data = UserRegisterRequest.model_validate(record)
+            except ValidationError as e:
+                report.errors.append(ImportRowError(
+                    row=row_number,
+                    email=email if isinstance(email, str) else None,
+                    errors=[
+                        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+                        for err in e.errors()
+                    ]
+                ))
+                continue
+                
+            if user_data.email in seen_emails:
+                report.errors.append(ImportRowError(
+                    row=row_number, email=user_data.email, errors=["Duplicate email in file"]
+                ))
+                continue
+            seen_emails.add(user_data.email)
+            valid.append((row_number, user_data))
+            
+        if not valid:
+            return
+            
+        # Hash the whole batch in parallel (in the password pool)
+        password_hashes = await hash_passwords_async([user_data.password for _, user_data in valid])
+        
+        now = datetime.utcnow()
+        user_rows = [
+            {
+                'email': user_data.email,
+                'password_hash': password_hash,
+                'first_name': user_data.first_name,
+                'last_name': user_data.last_name,
+                'phone': user_data.phone,
+                'account_type': user_data.account_type,
+                'is_active': True,
+                'email_verified': False,
+                'created_at': now,
+                'updated_at': now
+            }
+            for (_, user_data), password_hash in zip(valid, password_hashes)
+        ]
+        
+        # Multi-row INSERTs: users (skipping existing emails), then profiles
+        # and default roles for the users actually created
+        result = await db.execute(
+            pg_insert(User)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.user_id, User.email, User.account_type),
+            user_rows
+        )
+        created = result.all()
+        
+        if created:
+            await db.execute(insert(UserProfile), [
+                {
+                    'user_id': row.user_id,
+                    'profile_completed': False,
+                    'profile_completion_percentage': 25  # Has basic info
+                }
+                for row in created
+            ])
+            await db.execute(insert(UserRole), [
+                {
+                    'user_id': row.user_id,
+                    'role_name': "accountant" if row.account_type == "accountant" else "client",
+                    'is_active': True
+                }
+                for row in created
+            ])
+        await db.commit()
+        
+        created_emails = {row.email for row in created}
+        report.created += len(created_emails)
+        for row_number, user_data in valid:
+            if user_data.email not in created_emails:
+                report.errors.append(ImportRowError(
+                    row=row_number, email=user_data.email, errors=["Email already registered"]
+                ))
@@ -0,0 +1,76 @@
+"""Login throttle - Rate limits and failed-attempt tracking for /login"""
+
+from app.core.config import settings
+from app.core.metrics import LOGIN_THROTTLED
+from app.core.rate_limit import RateLimited, RateLimiter, get_rate_limit_store, incr_counter
+
+class LoginThrottle:
+    """
+    Cheap checks that run before any bcrypt or database work on login
+    
+    - Rate limits per client IP, per email and overall
+      (LOGIN_RATE_LIMIT_*, per LOGIN_RATE_WINDOW_SECONDS)
+    - Failed attempts per email. They are counted in the rate limit store,
+      not in Postgres, and only the attempt that trips the lockout writes
+      to the users table. A lockout is also remembered in the store, so
+      later attempts are rejected without touching the database.
+    """
+    
+    @staticmethod
+    def _failures_key(email: str) -> str:
+        return f"login:failures:{email.lower()}"
+    
+    @staticmethod
+    def _locked_key(email: str) -> str:
+        return f"login:locked:{email.lower()}"
+    
+    @staticmethod
+    async def check(client_ip: str, email: str) -> None:
+        """
+        Count one login attempt against every limit
+        
+        Raises:
+            RateLimited: If any limit is exceeded
+        """
+        limiter = RateLimiter(get_rate_limit_store())
+        window = settings.LOGIN_RATE_WINDOW_SECONDS
+        
+        for scope, key, limit in (
+            ('ip', f"login:ip:{client_ip}", settings.LOGIN_RATE_LIMIT_PER_IP),
+            ('email', f"login:email:{email.lower()}", settings.LOGIN_RATE_LIMIT_PER_EMAIL),
+            ('global', "login:global", settings.LOGIN_RATE_LIMIT_GLOBAL),
+        ):
+            retry_after = await limiter.hit(key, limit, window)
+            if retry_after:
+                LOGIN_THROTTLED.labels(scope).inc()
+                raise RateLimited(scope, retry_after)
+    
+    @staticmethod
+    async def is_locked(email: str) -> bool:
+        """True while a lockout recorded in the store is active"""
+        return await get_rate_limit_store().get(LoginThrottle._locked_key(email)) is not None
+    
+    @staticmethod
+    async def record_failure(email: str, window_seconds: int) -> int:
+        """
+        Count a failed attempt
+        
+        Args:
+            window_seconds: How long failures are remembered
+            
+        Returns:
+            Failed attempts within the window, including this one
+        """
+        return await incr_counter(get_rate_limit_store(), LoginThrottle._failures_key(email), window_seconds)
+    
+    @staticmethod
+    async def lock(email: str, seconds: int) -> None:
+        """Remember a lockout and restart the failure count"""
+        store = get_rate_limit_store()
+        await store.set(LoginThrottle._locked_key(email), b"1", ex=seconds)
+        await store.delete(LoginThrottle._failures_key(email))
+    
+    @staticmethod
+    async def clear_failures(email: str) -> None:
+        """Forget failed attempts (after a successful login)"""
+        await get_rate_limit_store().delete(LoginThrottle._failures_key(email))
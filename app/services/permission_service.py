@@ -0,0 +1,173 @@
+"""Permission service - RBAC resolution and role management"""
+
+from sqlalchemy import select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Optional, Tuple
+from datetime import datetime, timezone
+from uuid import UUID
+import time
+
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.core.permissions import PermissionCache, compile_permissions
+from app.db.models import UserRole
+from app.db.replicas import mark_user_written
+
+# Global cache instance (one per server process)
+permission_cache = PermissionCache(ttl=settings.PERMISSION_CACHE_TTL_SECONDS)
+
+# Cross-process invalidation
+# ──────────────────────────
+# A role change stores its time under "permissions-changed:<user_id>" in
+# the shared cache backend; every process compares it with the compile
+# time of its own entries, so a revoked role stops working in all workers
+# within PERMISSION_CHANGE_POLL_MS. Each process rereads a user's marker
+# at most that often, so a permission check stays a dict lookup instead of
+# a cache round trip. The marker only has to outlive the entries (ttl cap).
+
+# user_id → (time.monotonic() of the last read, marker value)
+_changes_seen: Dict[str, Tuple[float, Optional[float]]] = {}
+
+def _changed_key(user_id) -> str:
+    return f"permissions-changed:{user_id}"
+
+async def _last_change(user_id: str) -> Optional[float]:
+    """Time of the user's last role change (shared cache, reread at most every PERMISSION_CHANGE_POLL_MS)"""
+    now = time.monotonic()
+    seen = _changes_seen.get(user_id)
+    if seen is not None and now - seen[0] < settings.PERMISSION_CHANGE_POLL_MS / 1000:
+        return seen[1]
+    changed_at = await get_cache().get(_changed_key(user_id))
+    if seen is None and len(_changes_seen) >= permission_cache.max_users:
+        _changes_seen.pop(next(iter(_changes_seen)))  # Oldest user
+    _changes_seen[user_id] = (now, float(changed_at) if changed_at else None)
+    return _changes_seen[user_id][1]
+
+class PermissionService:
+    """Service for permission checks and role assignment"""
+    
+    @staticmethod
+    async def get_permissions(
+        db: AsyncSession,
+        user_id: str,
+        organization_id: Optional[str] = None
+    ) -> int:
+        """
+        Get the user's compiled permission mask
+        
+        Uses the cache; on a miss, the user's active, unexpired roles
+        (global roles plus roles scoped to organization_id) are loaded
+        with one query and compiled.
+        
+        Args:
+            db: Database session
+            user_id: User ID
+            organization_id: Organization scope (None = global roles only)
+            
+        Returns:
+            Permission bitset
+        """
+        mask = permission_cache.get(user_id, organization_id, await _last_change(user_id))
+        if mask is not None:
+            return mask
+        
+        compiled_at = time.time()
+        now = datetime.utcnow()
+        scope = UserRole.organization_id.is_(None)
+        if organization_id:
+            scope = or_(scope, UserRole.organization_id == organization_id)
+        
+        result = await db.execute(
+            select(UserRole.role_name, UserRole.expires_at)
+            .where(
+                UserRole.user_id == user_id,
+                UserRole.is_active.is_(True),
+                or_(UserRole.expires_at.is_(None), UserRole.expires_at > now),
+                scope
+            )
+        )
+        roles = result.all()
+        
+        mask = compile_permissions(role.role_name for role in roles)
+        
+        # The entry must not outlive the first role to expire
+        expirations = [role.expires_at for role in roles if role.expires_at]
+        expires_at = min(expirations).replace(tzinfo=timezone.utc).timestamp() if expirations else None
+        
+        permission_cache.set(user_id, organization_id, mask, expires_at, compiled_at)
+        return mask
+    
+    @staticmethod
+    async def assign_role(
+        db: AsyncSession,
+        user_id: str,
+        role_name: str,
+        assigned_by: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        expires_at: Optional[datetime] = None
+    ) -> UserRole:
+        """Assign a role to a user and invalidate their cached permissions"""
+        if expires_at is not None and expires_at.tzinfo is not None:
+            # Columns store naive UTC
+            expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        role = UserRole(
+            user_id=user_id,
+            role_name=role_name,
+            assigned_by=assigned_by,
+            organization_id=organization_id,
+            expires_at=expires_at,
+            is_active=True
+        )
+        db.add(role)
+        await db.commit()
+        
+        await PermissionService.invalidate(user_id)
+        return role
+    
+    @staticmethod
+    async def revoke_role(
+        db: AsyncSession,
+        user_id: str,
+        role_name: str,
+        organization_id: Optional[str] = None
+    ) -> bool:
+        """
+        Deactivate a user's role and invalidate their cached permissions
+        
+        Returns:
+            True if an active role was revoked
+        """
+        scope = (
+            UserRole.organization_id == organization_id
+            if organization_id else UserRole.organization_id.is_(None)
+        )
+        result = await db.execute(
+            update(UserRole)
+            .where(
+                UserRole.user_id == user_id,
+                UserRole.role_name == role_name,
+                UserRole.is_active.is_(True),
+                scope
+            )
+            .values(is_active=False)
+            .returning(UserRole.role_id)
+        )
+        revoked = result.first() is not None
+        await db.commit()
+        
+        await PermissionService.invalidate(user_id)
+        return revoked
+    
+    @staticmethod
+    async def invalidate(user_id) -> None:
+        """Drop a user's cached permissions in every process (call after the commit)"""
+        user_id = str(UUID(str(user_id)))  # Same form as the token's subject
+        permission_cache.invalidate_user(user_id)
+        _changes_seen.pop(user_id, None)
+        await get_cache().set(
+            _changed_key(user_id),
+            repr(time.time()).encode(),
+            ttl=settings.PERMISSION_CACHE_TTL_SECONDS
+        )
+        await mark_user_written(user_id)
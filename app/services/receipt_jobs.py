@@ -0,0 +1,277 @@
+from sqlalchemy import select, update, insert, and_, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime, timedelta
+import random
+
+from app.core.config import settings
+from app.db.models import Receipt, ReceiptJob
+from app.services.summary_service import SummaryService
+
+# What is this?
+# ─────────────
+# A durable job queue in Postgres (no broker).
+#
+#   enqueue  → INSERT a 'queued' row, in the same transaction as the receipt,
+#              so a stored receipt always has its job (and vice versa)
+#   claim    → UPDATE ... WHERE job_id IN (SELECT ... FOR UPDATE SKIP LOCKED):
+#              concurrent workers skip each other's rows instead of waiting
+#   complete → 'succeeded', committed together with the job's own writes
+#   fail     → back to 'queued' with exponential backoff (run_after), or
+#              'dead' after RECEIPT_JOB_MAX_ATTEMPTS (dead letter)
+#
+# A worker that dies leaves its jobs 'running'; requeue_stale puts jobs
+# locked for longer than RECEIPT_JOB_LOCK_TIMEOUT_SECONDS back in the queue
+# with the same backoff as fail(), or dead-letters them once they have used
+# their attempts (a receipt that crashes every worker stops there).
+# Live workers refresh locked_at of their jobs (heartbeat) well within that
+# timeout, and complete/fail only touch a job that is still the caller's
+# run (same locked_by and attempts): a worker that lost its job to the
+# reaper can't overwrite the newer run's outcome.
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retry number `attempts` (exponential, capped, ±20% jitter)"""
+    delay = min(
+        settings.RECEIPT_JOB_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.RECEIPT_JOB_BACKOFF_MAX_SECONDS
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+def backoff_seconds_sql(attempts):
+    """backoff_seconds() as a SQL expression (per row of an UPDATE)"""
+    delay = func.least(
+        settings.RECEIPT_JOB_BACKOFF_SECONDS * func.power(2, func.greatest(attempts - 1, 0)),
+        settings.RECEIPT_JOB_BACKOFF_MAX_SECONDS
+    )
+    return delay * (0.8 + func.random() * 0.4)
+
+class ReceiptJobQueue:
+    """Receipt processing jobs (the receipt_jobs table)"""
+    
+    @staticmethod
+    async def enqueue(db: AsyncSession, receipt_id) -> None:
+        """Add a job for a receipt (part of the caller's transaction)"""
+        await db.execute(
+            insert(ReceiptJob).values(receipt_id=receipt_id, status='queued', run_after=datetime.utcnow())
+        )
+    
+    @staticmethod
+    async def claim(db: AsyncSession, worker_id: str, limit: int = 1) -> List[ReceiptJob]:
+        """
+        Take up to `limit` due jobs and mark them running (commits)
+        
+        Returns:
+            The claimed jobs (attempts already counts this run)
+        """
+        now = datetime.utcnow()
+        due = (
+            select(ReceiptJob.job_id)
+            .where(ReceiptJob.status == 'queued', ReceiptJob.run_after <= now)
+            .order_by(ReceiptJob.run_after)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(ReceiptJob)
+            .where(ReceiptJob.job_id.in_(due.scalar_subquery()))
+            .values(
+                status='running',
+                attempts=ReceiptJob.attempts + 1,
+                locked_by=worker_id,
+                locked_at=now
+            )
+            .returning(ReceiptJob)
+            .execution_options(synchronize_session=False)
+        )
+        jobs = list(result.scalars().all())
+        await db.commit()
+        return jobs
+    
+    @staticmethod
+    def _owned(job: ReceiptJob):
+        """WHERE clause: the job is still in the run `job` was claimed for"""
+        return and_(
+            ReceiptJob.job_id == job.job_id,
+            ReceiptJob.status == 'running',
+            ReceiptJob.locked_by == job.locked_by,
+            ReceiptJob.attempts == job.attempts
+        )
+    
+    @staticmethod
+    async def heartbeat(db: AsyncSession, worker_id: str, job_ids: List) -> int:
+        """
+        Refresh the lock of jobs still being worked on (commits)
+        
+        Returns:
+            Number of jobs still locked by this worker
+        """
+        if not job_ids:
+            return 0
+        result = await db.execute(
+            update(ReceiptJob)
+            .where(
+                ReceiptJob.job_id.in_(job_ids),
+                ReceiptJob.status == 'running',
+                ReceiptJob.locked_by == worker_id
+            )
+            .values(locked_at=datetime.utcnow())
+            .returning(ReceiptJob.job_id)
+            .execution_options(synchronize_session=False)
+        )
+        count = len(result.all())
+        await db.commit()
+        return count
+    
+    @staticmethod
+    async def complete(db: AsyncSession, job: ReceiptJob, timings: Optional[dict] = None) -> bool:
+        """
+        Mark a job done (part of the caller's transaction)
+        
+        Returns:
+            False if the run was taken away (requeued as stale): roll back
+            instead of committing its writes
+        """
+        result = await db.execute(
+            update(ReceiptJob)
+            .where(ReceiptJobQueue._owned(job))
+            .values(
+                status='succeeded',
+                locked_by=None,
+                locked_at=None,
+                last_error=None,
+                timings=timings,
+                finished_at=datetime.utcnow()
+            )
+            .returning(ReceiptJob.job_id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.first() is not None
+    
+    @staticmethod
+    async def fail(db: AsyncSession, job: ReceiptJob, error: str, timings: Optional[dict] = None) -> bool:
+        """
+        Record a failed run: retry later, or dead-letter the job (commits)
+        
+        Nothing happens if the run was taken away (requeued as stale).
+        
+        Returns:
+            True if the job is dead (no retries left)
+        """
+        now = datetime.utcnow()
+        dead = job.attempts >= settings.RECEIPT_JOB_MAX_ATTEMPTS
+        values = dict(locked_by=None, locked_at=None, last_error=error[:4000], timings=timings)
+        if dead:
+            values.update(status='dead', finished_at=now)
+        else:
+            values.update(status='queued', run_after=now + timedelta(seconds=backoff_seconds(job.attempts)))
+            
+        result = await db.execute(
+            update(ReceiptJob)
+            .where(ReceiptJobQueue._owned(job))
+            .values(**values)
+            .returning(ReceiptJob.job_id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.first() is None:
+            await db.rollback()
+            return False
+        if dead:
+            async with SummaryService.tracking(db, job.receipt_id):
+                await db.execute(
+                    update(Receipt)
+                    .where(Receipt.receipt_id == job.receipt_id)
+                    .values(status='FAILED', error_message=error[:4000])
+                    .execution_options(synchronize_session=False)
+                )
+        await db.commit()
+        return dead
+    
+    @staticmethod
+    async def requeue_stale(db: AsyncSession, lock_timeout: Optional[int] = None) -> int:
+        """
+        Take back jobs whose worker stopped responding (commits)
+        
+        Each goes back to the queue with a backoff, like a failed run, or
+        is dead-lettered (receipt FAILED) if that was its last attempt.
+        
+        Returns:
+            Number of stale jobs (requeued or dead)
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=lock_timeout or settings.RECEIPT_JOB_LOCK_TIMEOUT_SECONDS)
+        dead = ReceiptJob.attempts >= settings.RECEIPT_JOB_MAX_ATTEMPTS
+        error = "Worker stopped responding"
+        result = await db.execute(
+            update(ReceiptJob)
+            .where(ReceiptJob.status == 'running', ReceiptJob.locked_at < cutoff)
+            .values(
+                status=case((dead, 'dead'), else_='queued'),
+                run_after=case(
+                    (dead, ReceiptJob.run_after),
+                    else_=now + func.make_interval(0, 0, 0, 0, 0, 0, backoff_seconds_sql(ReceiptJob.attempts))
+                ),
+                finished_at=case((dead, now), else_=None),
+                locked_by=None,
+                locked_at=None,
+                last_error=error
+            )
+            .returning(ReceiptJob.receipt_id, ReceiptJob.status)
+            .execution_options(synchronize_session=False)
+        )
+        jobs = result.all()
+        # Same order as in fail(): the job, then its receipt
+        for receipt_id, status in jobs:
+            if status == 'dead':
+                async with SummaryService.tracking(db, receipt_id):
+                    await db.execute(
+                        update(Receipt)
+                        .where(Receipt.receipt_id == receipt_id)
+                        .values(status='FAILED', error_message=error)
+                        .execution_options(synchronize_session=False)
+                    )
+        await db.commit()
+        return len(jobs)
+        
+    @staticmethod
+    async def requeue_dead(db: AsyncSession, receipt_id=None) -> int:
+        """
+        Give dead-lettered jobs (all, or one receipt's) a fresh set of attempts (commits)
+        
+        Only receipts that are still FAILED: one corrected by hand since is
+        APPROVED and counted in the summaries, and reprocessing it would
+        overwrite the correction.
+        """
+        conditions = [ReceiptJob.status == 'dead', Receipt.status == 'FAILED']
+        if receipt_id is not None:
+            conditions.append(ReceiptJob.receipt_id == receipt_id)
+        # Lock the receipts: a concurrent edit waits, or wins and is skipped
+        result = await db.execute(
+            select(Receipt.receipt_id)
+            .join(ReceiptJob, ReceiptJob.receipt_id == Receipt.receipt_id)
+            .where(and_(*conditions))
+            .with_for_update(of=Receipt)
+        )
+        receipt_ids = list(result.scalars())
+        if receipt_ids:
+            await db.execute(
+                update(ReceiptJob)
+                .where(ReceiptJob.status == 'dead', ReceiptJob.receipt_id.in_(receipt_ids))
+                .values(status='queued', attempts=0, run_after=datetime.utcnow(), finished_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            await db.execute(
+                update(Receipt)
+                .where(Receipt.receipt_id.in_(receipt_ids))
+                .values(status='PENDING', error_message=None)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+        return len(receipt_ids)
+    
+    @staticmethod
+    async def stats(db: AsyncSession) -> dict:
+        """Number of jobs per status"""
+        result = await db.execute(
+            select(ReceiptJob.status, func.count()).group_by(ReceiptJob.status)
+        )
+        return {status: count for status, count in result.all()}
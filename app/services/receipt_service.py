@@ -0,0 +1,245 @@
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterable, AsyncIterator, Optional, Tuple
+import hashlib
+import uuid
+
+from app.core.categories import DEFAULT_CATEGORY
+from app.core.config import settings
+from app.db.models import Receipt
+from app.db.replicas import mark_user_written
+from app.services.receipt_jobs import ReceiptJobQueue
+from app.services.summary_service import SummaryService
+from app.services.tax_service import TaxService
+from app.storage import get_storage
+
+# Accepted upload types → file extension in storage
+RECEIPT_CONTENT_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/heic': '.heic',
+    'application/pdf': '.pdf',
+}
+
+def receipt_storage_key(user_id, receipt_id, content_type: str) -> str:
+    """Where a receipt's file is stored"""
+    return f"receipts/{user_id}/{receipt_id}{RECEIPT_CONTENT_TYPES.get(content_type, '')}"
+
+class StoredUpload:
+    """A file written to storage by ReceiptService.store_upload (no receipt yet)"""
+    
+    def __init__(self, receipt_id, storage_key: str, content_type: str, size_bytes: int, content_sha256: str):
+        self.receipt_id = receipt_id
+        self.storage_key = storage_key
+        self.content_type = content_type
+        self.size_bytes = size_bytes
+        self.content_sha256 = content_sha256
+
+class ReceiptService:
+    """Business logic for receipt ingestion"""
+    
+    @staticmethod
+    async def store_upload(
+        user_id,
+        chunks: AsyncIterable[bytes],
+        content_type: str,
+        expected_sha256: Optional[str] = None
+    ) -> StoredUpload:
+        """
+        Stream an uploaded file to storage, hashing it on the way
+        
+        Needs no database session: call it before opening one, so a slow
+        upload doesn't hold a connection. Memory use does not depend on the
+        file size (see StorageBackend.save_stream).
+        
+        Args:
+            user_id: Owner
+            chunks: The file's bytes, as they arrive
+            content_type: One of RECEIPT_CONTENT_TYPES
+            expected_sha256: Hex digest announced by the client, checked
+                before the file is committed to storage
+            
+        Returns:
+            Where the file went, its size and SHA-256
+            
+        Raises:
+            ValueError: If the file type, size or digest is not accepted
+                (nothing is stored)
+        """
+        if content_type not in RECEIPT_CONTENT_TYPES:
+            raise ValueError(f"Unsupported file type: {content_type}")
+        
+        digest = hashlib.sha256()
+        max_bytes = settings.RECEIPT_MAX_UPLOAD_BYTES
+        
+        async def hashed() -> AsyncIterator[bytes]:
+            size = 0
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError(f"File is larger than {max_bytes} bytes")
+                digest.update(chunk)
+                yield chunk
+            if not size:
+                raise ValueError("Empty file")
+            if expected_sha256 and digest.hexdigest() != expected_sha256.lower():
+                raise ValueError("File does not match its SHA-256")
+        
+        receipt_id = uuid.uuid4()
+        storage_key = receipt_storage_key(user_id, receipt_id, content_type)
+        size = await get_storage().save_stream(storage_key, hashed(), content_type)
+        return StoredUpload(receipt_id, storage_key, content_type, size, digest.hexdigest())
+    
+    @staticmethod
+    async def find_duplicate(db: AsyncSession, user_id, content_sha256: str) -> Optional[Receipt]:
+        """The user's receipt with this file content, if any"""
+        result = await db.execute(
+            select(Receipt).where(Receipt.user_id == user_id, Receipt.content_sha256 == content_sha256)
+        )
+        return result.scalars().first()
+    
+    @staticmethod
+    async def create_receipt(
+        db: AsyncSession,
+        user_id,
+        upload: StoredUpload,
+        filename: Optional[str] = None
+    ) -> Tuple[Receipt, bool]:
+        """
+        Create the receipt for a stored upload and queue it for processing
+        
+        The receipt row and its job are inserted in one transaction. Nothing
+        here waits for OCR/LLM work: the processing worker picks the job up.
+        
+        If the user already uploaded the same file (same SHA-256), the new
+        copy is deleted and the existing receipt is returned instead: no
+        second receipt, no second job. The unique index on
+        (user_id, content_sha256) settles concurrent uploads of the same file.
+        
+        Args:
+            db: Database session
+            user_id: Owner
+            upload: Result of store_upload
+            filename: Name of the file on the client
+            
+        Returns:
+            (receipt, created): created is False for a duplicate
+        """
+        storage = get_storage()
+        
+        existing = await ReceiptService.find_duplicate(db, user_id, upload.content_sha256)
+        if existing is None:
+            try:
+                receipt = Receipt(
+                    receipt_id=upload.receipt_id,
+                    user_id=user_id,
+                    status='PENDING',
+                    storage_key=upload.storage_key,
+                    original_filename=(filename or "")[:255] or None,
+                    content_type=upload.content_type,
+                    size_bytes=upload.size_bytes,
+                    content_sha256=upload.content_sha256
+                )
+                db.add(receipt)
+                await db.flush()
+                await ReceiptJobQueue.enqueue(db, upload.receipt_id)
+                await db.commit()
+            except IntegrityError:
+                # The same file was inserted by a concurrent upload
+                await db.rollback()
+                existing = await ReceiptService.find_duplicate(db, user_id, upload.content_sha256)
+                if existing is None:
+                    await storage.delete(upload.storage_key)
+                    raise
+            except Exception:
+                await db.rollback()
+                await storage.delete(upload.storage_key)  # Don't leave an orphaned file
+                raise
+            else:
+                await mark_user_written(user_id)  # Status polls read the primary for a while
+                return receipt, True
+        
+        await storage.delete(upload.storage_key)  # Keep one copy
+        return existing, False
+    
+    @staticmethod
+    async def get_receipt(db: AsyncSession, user_id, receipt_id) -> Optional[Receipt]:
+        """A receipt of this user (None if missing or someone else's)"""
+        result = await db.execute(
+            select(Receipt).where(Receipt.receipt_id == receipt_id, Receipt.user_id == user_id)
+        )
+        return result.scalars().first()
+    
+    @staticmethod
+    async def update_receipt(db: AsyncSession, user_id, receipt_id, changes: dict) -> Optional[Receipt]:
+        """
+        Correct a processed receipt's fields (vendor, date, amount, currency, category)
+        
+        A person has now checked the receipt, so it becomes APPROVED. Its
+        line item is recomputed by the tax rules engine, and the dashboard
+        summaries follow, in the same transaction.
+        
+        Args:
+            db: Database session
+            user_id: Owner
+            receipt_id: The receipt
+            changes: Fields to set (ReceiptUpdateRequest, unset fields left out)
+            
+        Returns:
+            The updated receipt (None if missing or someone else's)
+            
+        Raises:
+            ValueError: If the receipt is still waiting for the worker
+        """
+        async with SummaryService.tracking(db, receipt_id):
+            receipt = await ReceiptService.get_receipt(db, user_id, receipt_id)
+            if receipt is None:
+                return None
+            if receipt.status == 'PENDING':
+                raise ValueError("Receipt is still being processed")
+            
+            for field, value in changes.items():
+                setattr(receipt, field, value)
+            receipt.status = 'APPROVED'
+            receipt.error_message = None
+            
+            profiles = await TaxService.tax_profiles(db, [receipt.user_id])
+            await TaxService.replace_line_items(
+                db,
+                receipt,
+                {
+                    'vendor_name': receipt.vendor_name,
+                    'receipt_date': receipt.receipt_date,
+                    'total_amount': receipt.total_amount,
+                    'category': receipt.category or DEFAULT_CATEGORY,
+                },
+                *profiles.get(receipt.user_id, TaxService.default_tax_profile())
+            )
+        await db.commit()
+        await db.refresh(receipt)
+        await mark_user_written(user_id)
+        return receipt
+    
+    @staticmethod
+    async def delete_receipt(db: AsyncSession, user_id, receipt_id) -> bool:
+        """
+        Delete a receipt, its line items, job and file
+        
+        The dashboard summaries lose it in the same transaction; the file
+        is removed from storage after the commit.
+        
+        Returns:
+            False if the receipt is missing or someone else's
+        """
+        async with SummaryService.tracking(db, receipt_id):
+            receipt = await ReceiptService.get_receipt(db, user_id, receipt_id)
+            if receipt is None:
+                return False
+            storage_key = receipt.storage_key
+            await db.delete(receipt)
+        await db.commit()
+        await get_storage().delete(storage_key)
+        await mark_user_written(user_id)
+        return True
@@ -0,0 +1,310 @@
+"""Summary service - Precomputed receipt totals for the dashboard"""
+
+from sqlalchemy import select, delete, insert, func, case, cast, extract, tuple_, Date, Integer
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import calendar
+
+from app.db.models import Receipt, ReceiptSummary, UserProfile
+
+# What is this?
+# ─────────────
+# receipt_summaries holds a receipt count and total per (user, fiscal year,
+# month, category), so the dashboard reads a few dozen rows instead of
+# aggregating every receipt of the user on each page load.
+#
+# Incremental upkeep: each receipt change runs inside
+#
+#     async with SummaryService.tracking(db, receipt_id):
+#         ...change the receipt...
+#
+# which reads the receipt's contribution before (locking the receipt) and
+# after the change, and adds the difference to the affected rows with
+# INSERT ... ON CONFLICT DO UPDATE (count = count + delta): the totals
+# commit or roll back together with the change, and concurrent changes
+# to the same row add up instead of overwriting each other.
+#
+# Rebuild: rebuild() recomputes users' rows from their receipts with one
+# INSERT ... SELECT ... GROUP BY per chunk of users (backfills, or after
+# a user's fiscal year end changes).
+
+# Receipts that count (categorized)
+SUMMARY_STATUSES = ('APPROVED', 'REVIEW')
+
+def fiscal_year(day: date, fiscal_year_end: Optional[date]) -> int:
+    """
+    Fiscal year of a date: the calendar year in which that fiscal year ends
+    
+    Args:
+        day: The date
+        fiscal_year_end: UserProfile.fiscal_year_end (only month and day
+            matter; None = December 31)
+    """
+    end = (fiscal_year_end.month, fiscal_year_end.day) if fiscal_year_end else (12, 31)
+    return day.year + (1 if (day.month, day.day) > end else 0)
+
+def fiscal_year_sql(day, fiscal_year_end):
+    """fiscal_year() as a SQL expression (for rebuilds)"""
+    end = tuple_(
+        func.coalesce(extract('month', fiscal_year_end), 12),
+        func.coalesce(extract('day', fiscal_year_end), 31)
+    )
+    after_end = tuple_(extract('month', day), extract('day', day)) > end
+    return cast(extract('year', day), Integer) + case((after_end, 1), else_=0)
+
+def fiscal_year_bounds(year: int, fiscal_year_end: Optional[date]) -> Tuple[date, date]:
+    """First and last day of a fiscal year"""
+    def year_end(y):
+        month, day = (fiscal_year_end.month, fiscal_year_end.day) if fiscal_year_end else (12, 31)
+        return date(y, month, min(day, calendar.monthrange(y, month)[1]))  # February 29
+    return year_end(year - 1) + timedelta(days=1), year_end(year)
+
+class Contribution:
+    """What one receipt adds to one summary row"""
+    
+    def __init__(self, user_id, fiscal_year: int, month: date, category: str, review: bool, total_amount: Decimal):
+        self.key = (user_id, fiscal_year, month, category)
+        self.review = review
+        self.total_amount = total_amount
+        
+    def __eq__(self, other):
+        return (
+            isinstance(other, Contribution)
+            and (self.key, self.review, self.total_amount) == (other.key, other.review, other.total_amount)
+        )
+
+class SummaryService:
+    """Upkeep and reads of receipt_summaries"""
+    
+    @staticmethod
+    async def contribution(db: AsyncSession, receipt_id, lock: bool = False) -> Optional[Contribution]:
+        """
+        A receipt's current contribution to the summaries
+        
+        Args:
+            lock: Lock the receipt row (FOR UPDATE) until the transaction ends
+            
+        Returns:
+            None if the receipt is missing or doesn't count (not categorized)
+        """
+        query = (
+            select(
+                Receipt.user_id,
+                Receipt.status,
+                Receipt.category,
+                Receipt.receipt_date,
+                Receipt.total_amount,
+                Receipt.created_at,
+                UserProfile.fiscal_year_end
+            )
+            .outerjoin(UserProfile, UserProfile.user_id == Receipt.user_id)
+            .where(Receipt.receipt_id == receipt_id)
+        )
+        if lock:
+            query = query.with_for_update(of=Receipt)
+        row = (await db.execute(query)).first()
+        if row is None or row.status not in SUMMARY_STATUSES or not row.category:
+            return None
+        day = row.receipt_date or row.created_at.date()
+        return Contribution(
+            row.user_id,
+            fiscal_year(day, row.fiscal_year_end),
+            day.replace(day=1),
+            row.category,
+            row.status == 'REVIEW',
+            row.total_amount or Decimal(0)
+        )
+        
+    @staticmethod
+    async def apply(db: AsyncSession, before: Optional[Contribution], after: Optional[Contribution]) -> None:
+        """Move a receipt's contribution from `before` to `after` (part of the caller's transaction)"""
+        if before == after:
+            return
+        deltas = {}
+        for contribution, sign in ((before, -1), (after, 1)):
+            if contribution is None:
+                continue
+            count, review, total = deltas.get(contribution.key, (0, 0, Decimal(0)))
+            deltas[contribution.key] = (
+                count + sign,
+                review + sign * contribution.review,
+                total + sign * contribution.total_amount
+            )
+            
+        # Same order in every transaction: no deadlocks between two receipt changes
+        for key in sorted(deltas, key=lambda key: (str(key[0]), key[1], key[2], key[3])):
+            count, review, total = deltas[key]
+            user_id, year, month, category = key
+            statement = pg_insert(ReceiptSummary).values(
+                user_id=user_id,
+                fiscal_year=year,
+                month=month,
+                category=category,
+                receipt_count=count,
+                review_count=review,
+                total_amount=total,
+                updated_at=datetime.utcnow()
+            )
+            await db.execute(statement.on_conflict_do_update(
+                index_elements=['user_id', 'fiscal_year', 'month', 'category'],
+                set_={
+                    'receipt_count': ReceiptSummary.receipt_count + statement.excluded.receipt_count,
+                    'review_count': ReceiptSummary.review_count + statement.excluded.review_count,
+                    'total_amount': ReceiptSummary.total_amount + statement.excluded.total_amount,
+                    'updated_at': statement.excluded.updated_at,
+                }
+            ))
+            if count < 0:
+                await db.execute(
+                    delete(ReceiptSummary).where(
+                        ReceiptSummary.user_id == user_id,
+                        ReceiptSummary.fiscal_year == year,
+                        ReceiptSummary.month == month,
+                        ReceiptSummary.category == category,
+                        ReceiptSummary.receipt_count <= 0
+                    )
+                )
+                
+    @staticmethod
+    @asynccontextmanager
+    async def tracking(db: AsyncSession, receipt_id) -> AsyncIterator[None]:
+        """
+        Update the summaries for whatever the block does to a receipt
+        
+        Part of the caller's transaction (commit after the block). The
+        receipt stays locked from the start of the block to the commit.
+        """
+        before = await SummaryService.contribution(db, receipt_id, lock=True)
+        yield
+        await db.flush()
+        await SummaryService.apply(db, before, await SummaryService.contribution(db, receipt_id))
+        
+    @staticmethod
+    async def rebuild(db: AsyncSession, user_ids: Optional[Iterable] = None, chunk_size: int = 500) -> dict:
+        """
+        Recompute summaries from the receipts (commits per chunk of users)
+        
+        Args:
+            user_ids: Only these users (default: everyone with receipts or summaries)
+            chunk_size: Users per transaction
+            
+        Returns:
+            {'users', 'rows'}
+        """
+        if user_ids is None:
+            result = await db.execute(
+                select(Receipt.user_id).union(select(ReceiptSummary.user_id))
+            )
+            user_ids = [row[0] for row in result]
+        user_ids = sorted(set(user_ids), key=str)
+        
+        day = func.coalesce(Receipt.receipt_date, cast(Receipt.created_at, Date))
+        year = fiscal_year_sql(day, UserProfile.fiscal_year_end)
+        month = cast(func.date_trunc('month', day), Date)
+        
+        rows = 0
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            totals = (
+                select(
+                    Receipt.user_id,
+                    year,
+                    month,
+                    Receipt.category,
+                    func.count(),
+                    func.count().filter(Receipt.status == 'REVIEW'),
+                    func.coalesce(func.sum(Receipt.total_amount), 0),
+                    func.now()
+                )
+                .outerjoin(UserProfile, UserProfile.user_id == Receipt.user_id)
+                .where(
+                    Receipt.user_id.in_(chunk),
+                    Receipt.status.in_(SUMMARY_STATUSES),
+                    Receipt.category.isnot(None)
+                )
+                .group_by(Receipt.user_id, year, month, Receipt.category)
+            )
+            await db.execute(delete(ReceiptSummary).where(ReceiptSummary.user_id.in_(chunk)))
+            result = await db.execute(
+                insert(ReceiptSummary)
+                .from_select(
+                    ['user_id', 'fiscal_year', 'month', 'category',
+                     'receipt_count', 'review_count', 'total_amount', 'updated_at'],
+                    totals
+                )
+            )
+            rows += result.rowcount
+            await db.commit()
+            
+        return {'users': len(user_ids), 'rows': rows}
+        
+    @staticmethod
+    async def dashboard(db: AsyncSession, user_id, year: Optional[int] = None) -> dict:
+        """
+        Dashboard totals for a fiscal year (from receipt_summaries only)
+        
+        Args:
+            year: Fiscal year (default: the one today is in)
+            
+        Returns:
+            DashboardResponse fields
+        """
+        result = await db.execute(
+            select(UserProfile.fiscal_year_end).where(UserProfile.user_id == user_id)
+        )
+        fiscal_year_end = result.scalar()
+        if year is None:
+            year = fiscal_year(datetime.utcnow().date(), fiscal_year_end)
+        start, end = fiscal_year_bounds(year, fiscal_year_end)
+        
+        result = await db.execute(
+            select(
+                ReceiptSummary.month,
+                ReceiptSummary.category,
+                ReceiptSummary.receipt_count,
+                ReceiptSummary.review_count,
+                ReceiptSummary.total_amount
+            )
+            .where(ReceiptSummary.user_id == user_id, ReceiptSummary.fiscal_year == year)
+            .order_by(ReceiptSummary.month, ReceiptSummary.category)
+        )
+        summaries = result.all()
+        
+        def totals(rows) -> dict:
+            return {
+                'receipt_count': sum(row.receipt_count for row in rows),
+                'review_count': sum(row.review_count for row in rows),
+                'total_amount': sum((row.total_amount for row in rows), Decimal("0.00")),
+            }
+            
+        def by_category(rows) -> List[dict]:
+            categories = {}
+            for row in rows:
+                categories.setdefault(row.category, []).append(row)
+            overall = sum((row.total_amount for row in rows), Decimal(0))
+            items = []
+            for category, category_rows in categories.items():
+                item = {'category': category, **totals(category_rows)}
+                item['share'] = round(float(item['total_amount'] / overall), 4) if overall else 0.0
+                items.append(item)
+            return sorted(items, key=lambda item: item['total_amount'], reverse=True)
+            
+        months = {}
+        for row in summaries:
+            months.setdefault(row.month, []).append(row)
+            
+        return {
+            'fiscal_year': year,
+            'start_date': start,
+            'end_date': end,
+            **totals(summaries),
+            'categories': by_category(summaries),
+            'months': [
+                {'month': month, **totals(rows), 'categories': by_category(rows)}
+                for month, rows in months.items()
+            ],
+        }
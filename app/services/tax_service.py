@@ -0,0 +1,207 @@
+"""Tax service - Line items and their taxes (see app/tax)"""
+
+from sqlalchemy import select, update, delete, insert, or_, tuple_, func, bindparam, literal, BigInteger, Numeric
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import date, datetime
+
+import numpy as np
+
+from app.db.models import Receipt, ReceiptLineItem, UserProfile
+from app.tax import get_tax_engine, normalize_province, to_cents
+
+# What is this?
+# ─────────────
+# The database side of the tax rules engine:
+#
+#   tax_profiles       → each user's province and GST/HST registration
+#                        (UserProfile.province, hst_number)
+#   replace_line_items → (re)file a processed receipt as line items with
+#                        their taxes, in the caller's transaction
+#   recompute          → bring a client's (or everyone's) line items up to
+#                        the current rules: read in chunks, evaluate each
+#                        chunk in one engine call, write it back in one
+#                        UPDATE ... FROM unnest(...) statement
+
+# Engine result → line item column
+RESULT_COLUMNS = {
+    'subtotal': 'subtotal',
+    'gst': 'gst_amount',
+    'hst': 'hst_amount',
+    'pst': 'pst_amount',
+    'itc': 'itc_amount',
+    'deductible': 'deductible_amount',
+}
+
+# Cents → amount, in SQL
+CENTS = literal(100, Numeric(12, 2))
+
+class TaxService:
+    """Receipt line items and their taxes"""
+    
+    @staticmethod
+    async def tax_profiles(db: AsyncSession, user_ids: Iterable) -> Dict[object, Tuple[str, bool]]:
+        """
+        Tax context of users
+        
+        Returns:
+            user_id → (province code, GST/HST registrant); users without a
+            profile are missing (see default_tax_profile)
+        """
+        user_ids = list(set(user_ids))
+        if not user_ids:
+            return {}
+        result = await db.execute(
+            select(UserProfile.user_id, UserProfile.province, UserProfile.hst_number)
+            .where(UserProfile.user_id.in_(user_ids))
+        )
+        return {
+            user_id: (normalize_province(province), bool(hst_number and hst_number.strip()))
+            for user_id, province, hst_number in result
+        }
+        
+    @staticmethod
+    def default_tax_profile() -> Tuple[str, bool]:
+        """Tax context of a user without a profile: unknown province, not registered"""
+        return normalize_province(None), False
+        
+    @staticmethod
+    async def replace_line_items(
+        db: AsyncSession,
+        receipt: Receipt,
+        fields: dict,
+        province: str,
+        registered: bool
+    ) -> Optional[dict]:
+        """
+        File a receipt as one line item (its total) with computed taxes
+        
+        Replaces the receipt's previous line items. Part of the caller's
+        transaction.
+        
+        Args:
+            receipt: The receipt (user_id, receipt_id, created_at)
+            fields: Its extracted fields (total_amount, category, receipt_date, vendor_name)
+            province: Province code (see tax_profiles)
+            registered: GST/HST registrant
+            
+        Returns:
+            The line item's values, or None without a total amount
+        """
+        await db.execute(delete(ReceiptLineItem).where(ReceiptLineItem.receipt_id == receipt.receipt_id))
+        if fields.get('total_amount') is None:
+            return None
+            
+        engine = get_tax_engine()
+        item_date = fields.get('receipt_date') or receipt.created_at.date()
+        taxes = engine.evaluate_one(fields['total_amount'], fields['category'], province, item_date, registered)
+        values = {
+            'receipt_id': receipt.receipt_id,
+            'user_id': receipt.user_id,
+            'line_number': 1,
+            'description': fields.get('vendor_name'),
+            'category': fields['category'],
+            'amount': fields['total_amount'],
+            'item_date': item_date,
+            'province': province,
+            **{RESULT_COLUMNS[name]: value for name, value in taxes.items()},
+            'rules_version': engine.version,
+        }
+        await db.execute(insert(ReceiptLineItem).values(**values))
+        return values
+        
+    @staticmethod
+    async def recompute(
+        db: AsyncSession,
+        user_id=None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        stale_only: bool = True,
+        chunk_size: int = 10000
+    ) -> dict:
+        """
+        Recompute line item taxes with the current rules (commits per chunk)
+        
+        GST/HST registration is read from the profiles as they are now;
+        province and date are the line item's.
+        
+        Args:
+            user_id: Only this user's line items (default: everyone's)
+            start, end: Only items dated in [start, end]
+            stale_only: Skip items already computed with the current rules
+            chunk_size: Line items per read/evaluate/write round
+            
+        Returns:
+            {'rules_version', 'line_items', 'chunks'}
+        """
+        engine = get_tax_engine()
+        conditions = []
+        if user_id is not None:
+            conditions.append(ReceiptLineItem.user_id == user_id)
+        if start is not None:
+            conditions.append(ReceiptLineItem.item_date >= start)
+        if end is not None:
+            conditions.append(ReceiptLineItem.item_date <= end)
+        if stale_only:
+            conditions.append(or_(
+                ReceiptLineItem.rules_version.is_(None),
+                ReceiptLineItem.rules_version != engine.version
+            ))
+            
+        # Keyset pagination in index order (ix_receipt_line_items_user_id_item_date)
+        key = tuple_(ReceiptLineItem.user_id, ReceiptLineItem.item_date, ReceiptLineItem.line_item_id)
+        total = chunks = 0
+        last_key = None
+        while True:
+            query = (
+                select(
+                    ReceiptLineItem.line_item_id,
+                    ReceiptLineItem.amount,
+                    ReceiptLineItem.category,
+                    ReceiptLineItem.province,
+                    ReceiptLineItem.item_date,
+                    UserProfile.hst_number,
+                    ReceiptLineItem.user_id
+                )
+                .outerjoin(UserProfile, UserProfile.user_id == ReceiptLineItem.user_id)
+                .where(*conditions)
+                .order_by(ReceiptLineItem.user_id, ReceiptLineItem.item_date, ReceiptLineItem.line_item_id)
+                .limit(chunk_size)
+            )
+            if last_key is not None:
+                query = query.where(key > tuple_(*last_key))
+            rows = (await db.execute(query)).all()
+            if not rows:
+                break
+                
+            ids, amounts, categories, provinces, dates, hst_numbers, user_ids = zip(*rows)
+            result = engine.evaluate(
+                to_cents(amounts),
+                categories,
+                provinces,
+                np.array(dates, dtype='datetime64[D]'),
+                np.array([bool(number and number.strip()) for number in hst_numbers])
+            )
+            # One UPDATE ... FROM unnest(arrays) per chunk (an executemany would be a round trip per row)
+            computed = func.unnest(
+                bindparam('ids', list(ids), type_=ARRAY(UUID(as_uuid=True))),
+                *(bindparam(name, values.tolist(), type_=ARRAY(BigInteger)) for name, values in result.items())
+            ).table_valued('line_item_id', *result).render_derived(name='computed')
+            await db.execute(
+                update(ReceiptLineItem)
+                .where(ReceiptLineItem.line_item_id == computed.c.line_item_id)
+                .values(
+                    **{column: computed.c[name] / CENTS for name, column in RESULT_COLUMNS.items()},
+                    rules_version=engine.version,
+                    updated_at=datetime.utcnow()
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            
+            total += len(rows)
+            chunks += 1
+            last_key = (user_ids[-1], dates[-1], ids[-1])
+            
+        return {'rules_version': engine.version, 'line_items': total, 'chunks': chunks}
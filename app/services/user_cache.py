@@ -0,0 +1,63 @@
+"""User cache - Read-through cache of serialized UserResponse payloads"""
+
+from typing import Optional
+from uuid import UUID
+
+from app.core.cache import get_cache
+from app.db.replicas import mark_user_written
+from app.schemas.user import UserResponse
+
+class UserCache:
+    """
+    Cache of UserResponse payloads keyed by user_id and by email
+    
+    Entries are JSON bytes (the serialized UserResponse) so any backend,
+    including the shared one, can store them as-is, and endpoints can send
+    a hit to the client without parsing it.
+    """
+    
+    @staticmethod
+    def id_key(user_id) -> str:
+        # Canonical form: an id spelled in upper case must hit (and drop) the same entry
+        return f"user:id:{UUID(str(user_id))}"
+    
+    @staticmethod
+    def email_key(email: str) -> str:
+        return f"user:email:{email.lower()}"
+    
+    @staticmethod
+    async def get_json_by_id(user_id) -> Optional[bytes]:
+        """Cached user by ID as UserResponse JSON (None on miss)"""
+        return await get_cache().get(UserCache.id_key(user_id))
+    
+    @staticmethod
+    async def get_by_id(user_id) -> Optional[UserResponse]:
+        """Cached user by ID (None on miss)"""
+        payload = await UserCache.get_json_by_id(user_id)
+        return UserResponse.model_validate_json(payload) if payload else None
+    
+    @staticmethod
+    async def get_by_email(email: str) -> Optional[UserResponse]:
+        """Cached user by email (None on miss)"""
+        payload = await get_cache().get(UserCache.email_key(email))
+        return UserResponse.model_validate_json(payload) if payload else None
+    
+    @staticmethod
+    async def set(user: UserResponse) -> bytes:
+        """Store a user under both keys (returns the stored JSON)"""
+        cache = get_cache()
+        payload = user.__pydantic_serializer__.to_json(user)
+        await cache.set(UserCache.id_key(user.user_id), payload)
+        await cache.set(UserCache.email_key(user.email), payload)
+        return payload
+    
+    @staticmethod
+    async def invalidate(user_id, email: str) -> None:
+        """
+        Drop both keys for a user (call after the write is committed)
+        
+        Also routes reads about the user to the primary for a few seconds,
+        so a lagging replica cannot put the old row back into the cache.
+        """
+        await get_cache().delete(UserCache.id_key(user_id), UserCache.email_key(email))
+        await mark_user_written(user_id)
@@ -1,19 +1,84 @@
 """User service - Business logic for user operations"""
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, or_, literal, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from typing import Optional
-from datetime import datetime
+from sqlalchemy.orm import aliased, joinedload, selectinload
+from typing import Optional, List, Tuple
+from datetime import datetime, timedelta
+import base64
+import json
+import uuid
 
+from app.core.config import settings
 from app.db.models import User, UserProfile, UserRole
-from app.utils.security import hash_password, verify_password
-from app.schemas.user import UserRegisterRequest, UserUpdateRequest
+from app.db.session import db_session
+from app.utils.security import hash_password_async, verify_and_update_password_async
+from app.schemas.user import UserRegisterRequest, UserUpdateRequest, UserResponse, UserDetailResponse, UserListResponse
+from app.services.user_cache import UserCache
+from app.services.login_throttle import LoginThrottle
+
+# Login lockout policy
+MAX_FAILED_LOGIN_ATTEMPTS = 5
+LOCKOUT_DURATION = timedelta(minutes=30)
+
+# Loader profiles
+# ───────────────
+# Named eager-loading options for User queries. "full" loads the profile
+# in the same query (one-to-one → JOIN) and the roles with one extra
+# SELECT ... WHERE user_id IN (...) for all users at once, so a list of N
+# users costs 2 queries instead of 2N+1.
+USER_LOAD_PROFILES = {
+    'basic': (),
+    'with_profile': (joinedload(User.profile),),
+    'with_roles': (selectinload(User.roles),),
+    'full': (joinedload(User.profile), selectinload(User.roles)),
+}
+
+# Listing page size
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(created_at: datetime, user_id) -> str:
+    """Opaque keyset cursor for the row after which the next page starts"""
+    raw = json.dumps([created_at.isoformat(), str(user_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Inverse of encode_cursor (raises ValueError for a malformed cursor)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, user_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), uuid.UUID(user_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor") from None
+
+def _insert_for_new_user(model, new_user, name: str, **values):
+    """
+    INSERT INTO <model> (user_id, ...) SELECT new_user.user_id, ... FROM new_user
+    
+    Column defaults are not applied to INSERT ... SELECT, so scalar
+    defaults from the model are bound explicitly (overridden by values).
+    """
+    columns = model.__table__.c
+    row = {
+        column.name: column.default.arg
+        for column in columns
+        if column.default is not None and column.default.is_scalar
+    }
+    row.update(values)
+    
+    return insert(model).from_select(
+        ['user_id', *row],
+        select(new_user.c.user_id, *[literal(value, columns[key].type) for key, value in row.items()])
+    ).cte(name)
 
 class UserService:
     """Service for user-related operations"""
     
     @staticmethod
-    def create_user(db: Session, user_data: UserRegisterRequest) -> User:
+    async def create_user(db: AsyncSession, user_data: UserRegisterRequest) -> User:
         """
         Create a new user with profile and role
         
@@ -26,119 +91,391 @@ class UserService:
             
         Raises:
             ValueError: If email already exists
+            PasswordHasherBusy: If the password hashing queue is full
         """
-        # Check if email exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
-        if existing_user:
-            raise ValueError("Email already registered")
+        # Hash first (in the password pool) so the DB work is one statement
+        password_hash = await hash_password_async(user_data.password)
+        
+        now = datetime.utcnow()
+        user_id = uuid.uuid4()
+        
+        # Assign default role based on account type
+        role_name = "accountant" if user_data.account_type == "accountant" else "client"
+        
+        # Insert user, profile and role in ONE statement
+        # ──────────────────────────────────────────────
+        # WITH new_user AS (
+        #     INSERT INTO users ... ON CONFLICT (email) DO NOTHING RETURNING *
+        # ), new_profile AS (
+        #     INSERT INTO user_profiles ... SELECT ... FROM new_user
+        # ), new_role AS (
+        #     INSERT INTO user_roles ... SELECT ... FROM new_user
+        # )
+        # SELECT * FROM new_user
+        #
+        # The ix_users_email unique index reports duplicates: on conflict
+        # new_user is empty, so no profile/role rows are written and no
+        # user comes back. The created row is returned by the statement
+        # itself, so no refresh SELECT is needed.
+        new_user = (
+            pg_insert(User)
+            .values(
+                user_id=user_id,
+                email=user_data.email,
+                password_hash=password_hash,
+                first_name=user_data.first_name,
+                last_name=user_data.last_name,
+                phone=user_data.phone,
+                account_type=user_data.account_type,
+                is_active=True,
+                is_locked=False,
+                failed_login_attempts=0,
+                email_verified=False,
+                created_at=now,
+                updated_at=now
+            )
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(*User.__table__.c)
+            .cte("new_user")
+        )
         
-        # Create user
-        user = User(
-            email=user_data.email,
-            password_hash=hash_password(user_data.password),
-            first_name=user_data.first_name,
-            last_name=user_data.last_name,
-            phone=user_data.phone,
-            account_type=user_data.account_type,
+        # Create profile
+        new_profile = _insert_for_new_user(
+            UserProfile, new_user, "new_profile",
+            profile_id=uuid.uuid4(),
+            profile_completed=False,
+            profile_completion_percentage=25,  # Has basic info
+            created_at=now,
+            updated_at=now
+        )
+        
+        new_role = _insert_for_new_user(
+            UserRole, new_user, "new_role",
+            role_id=uuid.uuid4(),
+            role_name=role_name,
             is_active=True,
-            email_verified=False
+            assigned_at=now,
+            created_at=now
+        )
+        
+        stmt = (
+            select(aliased(User, new_user))
+            .add_cte(new_profile)
+            .add_cte(new_role)
         )
         
         try:
-            db.add(user)
-            db.flush()  # Get user_id without committing
-            
-            # Create profile
-            profile = UserProfile(
-                user_id=user.user_id,
-                profile_completed=False,
-                profile_completion_percentage=25  # Has basic info
-            )
-            db.add(profile)
-            
-            # Assign default role based on account type
-            role_name = "accountant" if user_data.account_type == "accountant" else "client"
-            role = UserRole(
-                user_id=user.user_id,
-                role_name=role_name,
-                is_active=True
-            )
-            db.add(role)
-            
-            db.commit()
-            db.refresh(user)
-            
-            return user
-            
+            result = await db.execute(stmt)
+            user = result.scalars().first()
+            await db.commit()
         except IntegrityError as e:
-            db.rollback()
+            await db.rollback()
             raise ValueError("Failed to create user") from e
+        
+        if user is None:
+            raise ValueError("Email already registered")
+        
+        return user
     
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+    async def authenticate_user(email: str, password: str) -> Optional[User]:
         """
         Authenticate user with email and password
         
         Args:
-            db: Database session
             email: User email
             password: Plain text password
             
+        Failed attempts are counted by LoginThrottle, outside Postgres; the
+        users row is only written when the lockout trips or on success.
+        A hash made with an outdated scheme or cost (see create_pwd_context)
+        is replaced on success, in the same UPDATE.
+        
+        Opens its own short sessions (db_session): one to read the user,
+        one to record the outcome. No connection or admission slot is held
+        while the password is verified, which takes far longer than both.
+        
         Returns:
             User object if authenticated, None otherwise
+            
+        Raises:
+            PasswordHasherBusy: If the password hashing queue is full
         """
-        user = db.query(User).filter(User.email == email).first()
+        # Locked out (remembered by the throttle): no query, no bcrypt
+        if await LoginThrottle.is_locked(email):
+            return None
+        
+        async with db_session() as db:
+            user = await UserService.get_user_by_email(db, email)
         
         if not user:
             return None
         
-        # Check if account is locked
-        if user.is_locked:
-            if user.locked_until and user.locked_until > datetime.utcnow():
-                return None  # Still locked
-            else:
-                # Unlock account
-                user.is_locked = False
-                user.locked_until = None
-                user.failed_login_attempts = 0
-                db.commit()
-        
-        # Verify password
-        if not verify_password(password, user.password_hash):
-            # Increment failed attempts
-            user.failed_login_attempts += 1
+        now = datetime.utcnow()
+        
+        # Check if account is locked (no write needed to reject)
+        if user.is_locked and user.locked_until and user.locked_until > now:
+            return None  # Still locked
+        
+        # Verify password (in the password pool); new_hash is set if the
+        # stored hash should be upgraded
+        password_ok, new_hash = await verify_and_update_password_async(password, user.password_hash)
+        
+        # Record the outcome with a single atomic UPDATE ... RETURNING
+        # ─────────────────────────────────────────────────────────────
+        # An expired lock is cleared in the same statement. The WHERE clause
+        # skips rows that were locked concurrently since our SELECT.
+        not_locked = or_(
+            User.is_locked.isnot(True),
+            User.locked_until.is_(None),
+            User.locked_until <= now
+        )
+        
+        if not password_ok:
+            # The throttle's counter is atomic (INCR), so concurrent bad
+            # attempts never lose increments and only one of them trips
+            # the lock
+            lockout_seconds = int(LOCKOUT_DURATION.total_seconds())
+            failures = await LoginThrottle.record_failure(email, lockout_seconds)
+            if failures < MAX_FAILED_LOGIN_ATTEMPTS:
+                return None
             
-            # Lock account after 5 failed attempts
-            if user.failed_login_attempts >= 5:
-                user.is_locked = True
-                from datetime import timedelta
-                user.locked_until = datetime.utcnow() + timedelta(minutes=30)
+            # Lock account after MAX_FAILED_LOGIN_ATTEMPTS failed attempts
+            async with db_session() as db:
+                result = await db.execute(
+                    update(User)
+                    .where(User.user_id == user.user_id, not_locked)
+                    .values(
+                        failed_login_attempts=failures,
+                        is_locked=True,
+                        locked_until=now + LOCKOUT_DURATION
+                    )
+                    .returning(User.user_id)
+                    .execution_options(synchronize_session=False)
+                )
+                locked = result.first() is not None
+                await db.commit()
+            await LoginThrottle.lock(email, lockout_seconds)
             
-            db.commit()
+            # Lockout changed → drop cached copies
+            if locked:
+                await UserCache.invalidate(user.user_id, user.email)
             return None
         
-        # Success - reset failed attempts and update last login
-        user.failed_login_attempts = 0
-        user.last_login_at = datetime.utcnow()
-        db.commit()
-        db.refresh(user)
+        # Success - reset failed attempts, clear any expired lock, update last login
+        await LoginThrottle.clear_failures(email)
+        was_locked = bool(user.is_locked)
+        values = dict(
+            failed_login_attempts=0,
+            is_locked=False,
+            locked_until=None,
+            last_login_at=now
+        )
+        if new_hash and settings.PASSWORD_REHASH_ON_LOGIN:
+            values['password_hash'] = new_hash
+        async with db_session() as db:
+            result = await db.execute(
+                update(User)
+                .where(User.user_id == user.user_id, not_locked)
+                .values(**values)
+                .returning(User)
+                .execution_options(populate_existing=True)
+            )
+            user = result.scalars().first()
+            await db.commit()
         
-        return user
+        if user and was_locked:
+            await UserCache.invalidate(user.user_id, user.email)
+        
+        return user  # None if the account got locked concurrently
     
     @staticmethod
-    def get_user_by_id(db: Session, user_id: str) -> Optional[User]:
-        """Get user by ID"""
-        return db.query(User).filter(User.user_id == user_id).first()
+    async def get_user_by_id(db: AsyncSession, user_id: str, load: str = 'basic') -> Optional[User]:
+        """Get user by ID (load: a USER_LOAD_PROFILES name)"""
+        result = await db.execute(
+            select(User).where(User.user_id == user_id).options(*USER_LOAD_PROFILES[load])
+        )
+        return result.unique().scalars().first()
     
     @staticmethod
-    def get_user_by_email(db: Session, email: str) -> Optional[User]:
-        """Get user by email"""
-        return db.query(User).filter(User.email == email).first()
+    async def get_user_by_email(db: AsyncSession, email: str, load: str = 'basic') -> Optional[User]:
+        """Get user by email (load: a USER_LOAD_PROFILES name)"""
+        result = await db.execute(
+            select(User).where(User.email == email).options(*USER_LOAD_PROFILES[load])
+        )
+        return result.unique().scalars().first()
+    
+    @staticmethod
+    async def get_active_role_names(db: AsyncSession, user_id) -> List[str]:
+        """Names of the user's active, unexpired roles"""
+        now = datetime.utcnow()
+        result = await db.execute(
+            select(UserRole.role_name)
+            .where(
+                UserRole.user_id == user_id,
+                UserRole.is_active.is_(True),
+                or_(UserRole.expires_at.is_(None), UserRole.expires_at > now)
+            )
+            .distinct()
+        )
+        return sorted(result.scalars().all())
+    
+    @staticmethod
+    async def get_user_response(db: AsyncSession, user_id: str) -> Optional[UserResponse]:
+        """
+        Get user by ID as a UserResponse, read through the user cache
+        
+        Only a cache miss touches the database. An id that isn't a UUID
+        is an unknown user.
+        """
+        try:
+            user_id = uuid.UUID(str(user_id))
+        except ValueError:
+            return None
+        
+        cached = await UserCache.get_by_id(user_id)
+        if cached:
+            return cached
+        
+        user = await UserService.get_user_by_id(db, user_id)
+        if not user:
+            return None
+        
+        response = UserResponse.model_validate(user)
+        await UserCache.set(response)
+        return response
+    
+    @staticmethod
+    async def get_user_json(db: AsyncSession, user_id: str) -> Optional[bytes]:
+        """
+        Get user by ID as UserResponse JSON, read through the user cache
+        
+        A cache hit is returned without being parsed, ready to be sent.
+        An id that isn't a UUID is an unknown user.
+        """
+        try:
+            user_id = uuid.UUID(str(user_id))
+        except ValueError:
+            return None
+        
+        cached = await UserCache.get_json_by_id(user_id)
+        if cached:
+            return cached
+        
+        user = await UserService.get_user_by_id(db, user_id)
+        if not user:
+            return None
+        
+        return await UserCache.set(UserResponse.model_validate(user))
+    
+    @staticmethod
+    async def get_user_response_by_email(db: AsyncSession, email: str) -> Optional[UserResponse]:
+        """Get user by email as a UserResponse, read through the user cache"""
+        cached = await UserCache.get_by_email(email)
+        if cached:
+            return cached
+        
+        user = await UserService.get_user_by_email(db, email)
+        if not user:
+            return None
+        
+        response = UserResponse.model_validate(user)
+        await UserCache.set(response)
+        return response
+    
+    @staticmethod
+    async def get_user_detail(db: AsyncSession, user_id: str) -> Optional[UserDetailResponse]:
+        """
+        Get user by ID with profile and roles
+        
+        Uses the "full" loader profile: 2 queries no matter how many roles
+        the user has.
+        """
+        user = await UserService.get_user_by_id(db, user_id, load='full')
+        if not user:
+            return None
+        return UserDetailResponse.model_validate(user)
+    
+    @staticmethod
+    async def list_users(
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        account_type: Optional[str] = None,
+        role: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        province: Optional[str] = None,
+        city: Optional[str] = None
+    ) -> UserListResponse:
+        """
+        List live users, newest first, with keyset pagination
+        
+        Pages are addressed by the (created_at, user_id) of the last row of
+        the previous page rather than an OFFSET, so every page is an index
+        range scan of limit rows no matter how deep it is.
+        
+        Args:
+            db: Database session
+            cursor: next_cursor from the previous page (None = first page)
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            account_type, is_active: Filters on users
+            role: Only users holding this active, unexpired role
+            province, city: Filters on user_profiles
+            
+        Returns:
+            One page of users and the cursor for the next one (None at the end)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = select(User).where(User.deleted_at.is_(None))
+        
+        if cursor:
+            created_at, user_id = decode_cursor(cursor)
+            query = query.where(tuple_(User.created_at, User.user_id) < tuple_(created_at, user_id))
+        if account_type is not None:
+            query = query.where(User.account_type == account_type)
+        if is_active is not None:
+            query = query.where(User.is_active == is_active)
+        if role is not None:
+            query = query.where(
+                select(UserRole.role_id).where(
+                    UserRole.user_id == User.user_id,
+                    UserRole.role_name == role,
+                    UserRole.is_active.is_(True),
+                    or_(UserRole.expires_at.is_(None), UserRole.expires_at > datetime.utcnow())
+                ).exists()
+            )
+        if province is not None or city is not None:
+            # One profile per user, so the join never duplicates rows
+            query = query.join(UserProfile, UserProfile.user_id == User.user_id)
+            if province is not None:
+                query = query.where(UserProfile.province == province)
+            if city is not None:
+                query = query.where(UserProfile.city == city)
+        
+        # One extra row tells us whether there is a next page
+        result = await db.execute(
+            query.order_by(User.created_at.desc(), User.user_id.desc()).limit(limit + 1)
+        )
+        users = result.scalars().all()
+        
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = encode_cursor(users[-1].created_at, users[-1].user_id)
+        
+        # One validation call for the whole page (rows read as attributes)
+        return UserListResponse.model_validate(
+            {'items': users, 'next_cursor': next_cursor},
+            from_attributes=True
+        )
     
     @staticmethod
-    def update_user(db: Session, user_id: str, user_data: UserUpdateRequest) -> Optional[User]:
+    async def update_user(db: AsyncSession, user_id: str, user_data: UserUpdateRequest) -> Optional[User]:
         """Update user information"""
-        user = db.query(User).filter(User.user_id == user_id).first()
+        user = await UserService.get_user_by_id(db, user_id)
         
         if not user:
             return None
@@ -153,7 +490,8 @@ class UserService:
         
         user.updated_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
+        await UserCache.invalidate(user.user_id, user.email)
         
         return user
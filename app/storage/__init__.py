@@ -0,0 +1,24 @@
+"""
+Object storage for uploaded files (receipts)
+
+Backends (STORAGE_BACKEND setting):
+  - "local"    → files under STORAGE_LOCAL_DIR
+  - "s3"       → S3-compatible object store (AWS S3, MinIO; needs aiobotocore)
+  - "s3-local" → in-process stand-in for the object store (tests/dev)
+"""
+
+from app.storage.base import StorageBackend, StorageError
+from app.storage.local import LocalStorage
+from app.storage.s3 import S3Storage, LocalObjectStore
+from app.storage.factory import create_storage, get_storage, close_storage
+
+__all__ = [
+    'StorageBackend',
+    'StorageError',
+    'LocalStorage',
+    'S3Storage',
+    'LocalObjectStore',
+    'create_storage',
+    'get_storage',
+    'close_storage'
+]
@@ -0,0 +1,45 @@
+# app/storage/base.py
+
+from typing import AsyncIterable
+
+class StorageError(RuntimeError):
+    """Raised when an object cannot be stored or read"""
+
+
+class StorageBackend:
+    """
+    Base class for object storage backends
+    
+    Objects are addressed by a key such as "receipts/<user_id>/<receipt_id>.jpg".
+    Every method is async so a remote store never blocks the event loop.
+    """
+    
+    name = "base"
+    
+    async def save(self, key: str, data: bytes, content_type: str = None) -> int:
+        """Store data under key (replacing it); returns the size in bytes"""
+        raise NotImplementedError
+    
+    async def save_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: str = None) -> int:
+        """
+        Store the chunks under key as they arrive; returns the size in bytes
+        
+        Memory use is bounded by the backend's buffer, not the object size.
+        If the iterator raises (client gone, size limit), nothing is stored
+        and the exception propagates.
+        """
+        raise NotImplementedError
+    
+    async def read(self, key: str) -> bytes:
+        """The whole object (raises StorageError if it does not exist)"""
+        raise NotImplementedError
+    
+    async def delete(self, key: str) -> None:
+        """Remove an object (missing objects are ignored)"""
+        raise NotImplementedError
+    
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+    
+    async def close(self) -> None:
+        """Release connections (shutdown)"""
@@ -0,0 +1,56 @@
+# app/storage/factory.py
+
+from typing import Optional
+
+from app.core.config import settings
+from app.storage.base import StorageBackend
+from app.storage.local import LocalStorage
+from app.storage.s3 import S3Storage, LocalObjectStore, create_s3_client
+
+def create_storage(backend: str) -> StorageBackend:
+    """
+    Build a storage backend by name
+    
+    Args:
+        backend: "local", "s3" or "s3-local"
+    """
+    if backend == "local":
+        return LocalStorage(settings.STORAGE_LOCAL_DIR)
+    if backend == "s3":
+        return S3Storage(
+            lambda: create_s3_client(
+                settings.STORAGE_S3_ENDPOINT_URL,
+                settings.STORAGE_S3_REGION,
+                settings.STORAGE_S3_ACCESS_KEY_ID,
+                settings.STORAGE_S3_SECRET_ACCESS_KEY
+            ),
+            settings.STORAGE_S3_BUCKET,
+            part_size=settings.STORAGE_S3_PART_SIZE
+        )
+    if backend == "s3-local":
+        store = LocalObjectStore(settings.STORAGE_LOCAL_DIR)
+        return S3Storage(
+            lambda: store,
+            settings.STORAGE_S3_BUCKET,
+            part_size=settings.STORAGE_S3_PART_SIZE,
+            name="s3-local"
+        )
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+# Global storage instance (created on first use)
+_storage: Optional[StorageBackend] = None
+
+def get_storage() -> StorageBackend:
+    """Get the configured storage backend"""
+    global _storage
+    if _storage is None:
+        _storage = create_storage(settings.STORAGE_BACKEND)
+    return _storage
+
+async def close_storage() -> None:
+    """Release the storage backend's connections (shutdown)"""
+    global _storage
+    if _storage is not None:
+        storage, _storage = _storage, None
+        await storage.close()
@@ -0,0 +1,102 @@
+# app/storage/local.py
+
+from typing import AsyncIterable
+import asyncio
+import os
+import uuid
+
+from app.storage.base import StorageBackend, StorageError
+
+class LocalStorage(StorageBackend):
+    """
+    Files under a root directory (one file per key)
+    
+    Writes go to a temporary file that is renamed into place, so a reader
+    never sees a half-written object. File I/O runs in a thread.
+    """
+    
+    name = "local"
+    
+    # Streamed chunks are collected up to this size per write (one thread hop)
+    WRITE_BUFFER_BYTES = 1024 * 1024
+    
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+    
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError(f"Invalid storage key: {key}")
+        return path
+    
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def _open_tmp(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        return tmp_path, open(tmp_path, "wb")
+    
+    def _discard(self, f, tmp_path: str) -> None:
+        f.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    def _finish(self, f, tmp_path: str, path: str) -> None:
+        f.close()
+        os.replace(tmp_path, path)
+    
+    def _read(self, path: str) -> bytes:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise StorageError(f"Object not found: {path}") from None
+    
+    def _delete(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
+    async def save(self, key: str, data: bytes, content_type: str = None) -> int:
+        await asyncio.to_thread(self._write, self._path(key), data)
+        return len(data)
+    
+    async def save_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: str = None) -> int:
+        path = self._path(key)
+        tmp_path, f = await asyncio.to_thread(self._open_tmp, path)
+        size = 0
+        buffer = bytearray()
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                if len(buffer) >= self.WRITE_BUFFER_BYTES:
+                    await asyncio.to_thread(f.write, buffer)
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(f.write, buffer)
+            await asyncio.to_thread(self._finish, f, tmp_path, path)
+        except BaseException:
+            await asyncio.shield(asyncio.to_thread(self._discard, f, tmp_path))
+            raise
+        return size
+    
+    async def read(self, key: str) -> bytes:
+        return await asyncio.to_thread(self._read, self._path(key))
+    
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, self._path(key))
+    
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self._path(key))
@@ -0,0 +1,310 @@
+# app/storage/s3.py
+
+from typing import AsyncIterable, Callable, Optional
+import asyncio
+import hashlib
+import os
+import shutil
+import uuid
+
+from app.storage.base import StorageBackend, StorageError
+
+# What is this?
+# ─────────────
+# Storage in an S3-compatible object store (AWS S3, MinIO, ...).
+#
+# Streamed uploads use the S3 multipart upload API: chunks are collected
+# into parts of part_size bytes and each part is sent as soon as it is
+# full, so memory per upload stays at about one part whatever the file
+# size. Objects smaller than one part are sent with a single PUT.
+#
+# LocalObjectStore is an in-process stand-in for the object store (the
+# subset of the S3 client API used here, objects as files), so the same
+# code path runs in tests/dev without MinIO.
+
+# S3 rejects multipart parts smaller than this (except the last one)
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+
+def _error_code(exc: Exception) -> Optional[str]:
+    """S3 error code of a client error ("NoSuchKey", "404", ...)"""
+    response = getattr(exc, 'response', None)
+    if isinstance(response, dict):
+        return response.get('Error', {}).get('Code')
+    return None
+
+def _is_not_found(exc: Exception) -> bool:
+    return _error_code(exc) in ('NoSuchKey', '404', 'NotFound')
+
+
+class S3Storage(StorageBackend):
+    """
+    Objects in one bucket of an S3-compatible store
+    
+    Args:
+        connect: Returns an async context manager yielding the client
+            (aiobotocore's session.create_client(...), or a LocalObjectStore)
+        bucket: Bucket name
+        part_size: Multipart upload part size (at least S3_MIN_PART_SIZE)
+    """
+    
+    def __init__(self, connect: Callable, bucket: str, part_size: int = 8 * 1024 * 1024, name: str = "s3"):
+        if part_size < S3_MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {S3_MIN_PART_SIZE} bytes")
+        self.connect = connect
+        self.bucket = bucket
+        self.part_size = part_size
+        self.name = name
+        self._context = None
+        self._client = None
+        self._lock = asyncio.Lock()
+        
+    async def _get_client(self):
+        """The client, connected on first use"""
+        if self._client is None:
+            async with self._lock:
+                if self._client is None:
+                    context = self.connect()
+                    self._client = await context.__aenter__()
+                    self._context = context
+        return self._client
+        
+    async def save(self, key: str, data: bytes, content_type: str = None) -> int:
+        client = await self._get_client()
+        extra = {'ContentType': content_type} if content_type else {}
+        await client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra)
+        return len(data)
+        
+    async def save_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: str = None) -> int:
+        client = await self._get_client()
+        extra = {'ContentType': content_type} if content_type else {}
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        parts = []
+        
+        async def send_part(body: bytes) -> None:
+            number = len(parts) + 1
+            response = await client.upload_part(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body
+            )
+            parts.append({'ETag': response['ETag'], 'PartNumber': number})
+            
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                while len(buffer) >= self.part_size:
+                    if upload_id is None:
+                        response = await client.create_multipart_upload(Bucket=self.bucket, Key=key, **extra)
+                        upload_id = response['UploadId']
+                    await send_part(bytes(buffer[:self.part_size]))
+                    del buffer[:self.part_size]
+                    
+            if upload_id is None:
+                # Smaller than one part: a single PUT
+                await client.put_object(Bucket=self.bucket, Key=key, Body=bytes(buffer), **extra)
+            else:
+                if buffer:
+                    await send_part(bytes(buffer))
+                await client.complete_multipart_upload(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id,
+                    MultipartUpload={'Parts': parts}
+                )
+        except BaseException:
+            if upload_id is not None:
+                # Otherwise the store keeps the uploaded parts (and bills for them)
+                await asyncio.shield(
+                    client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+                )
+            raise
+        return size
+        
+    async def read(self, key: str) -> bytes:
+        client = await self._get_client()
+        try:
+            response = await client.get_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            if _is_not_found(e):
+                raise StorageError(f"Object not found: {key}") from None
+            raise
+        body = response['Body']
+        try:
+            return await body.read()
+        finally:
+            body.close()
+            
+    async def delete(self, key: str) -> None:
+        client = await self._get_client()
+        await client.delete_object(Bucket=self.bucket, Key=key)  # No error if missing
+        
+    async def exists(self, key: str) -> bool:
+        client = await self._get_client()
+        try:
+            await client.head_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            if _is_not_found(e):
+                return False
+            raise
+        return True
+        
+    async def close(self) -> None:
+        if self._context is not None:
+            context, self._context, self._client = self._context, None, None
+            await context.__aexit__(None, None, None)
+
+
+def create_s3_client(endpoint_url: Optional[str], region: str, access_key_id: Optional[str], secret_access_key: Optional[str]):
+    """
+    An aiobotocore S3 client context (aiobotocore is an optional dependency)
+    
+    Usage:
+        async with create_s3_client(...) as client:
+            await client.put_object(...)
+    """
+    try:
+        from aiobotocore.session import get_session
+    except ImportError as e:
+        raise RuntimeError("The 'aiobotocore' package is required for the s3 storage backend") from e
+    return get_session().create_client(
+        's3',
+        endpoint_url=endpoint_url,  # e.g. http://localhost:9000 for MinIO
+        region_name=region,
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=secret_access_key
+    )
+
+
+class ObjectStoreError(Exception):
+    """Client error of LocalObjectStore (same shape as botocore's ClientError)"""
+    
+    def __init__(self, code: str, message: str):
+        super().__init__(f"{code}: {message}")
+        self.response = {'Error': {'Code': code, 'Message': message}}
+
+
+class _Body:
+    """get_object()["Body"]: the object's bytes"""
+    
+    def __init__(self, data: bytes):
+        self._data = data
+        
+    async def read(self) -> bytes:
+        return self._data
+        
+    def close(self) -> None:
+        pass
+
+
+class LocalObjectStore:
+    """
+    In-process stand-in for an S3-compatible object store (MinIO)
+    
+    Implements the subset of the aiobotocore S3 client API that S3Storage
+    uses. Objects are files under root/<bucket>/<key>; multipart uploads
+    keep their parts under root/.multipart/<upload_id>/ until completed,
+    and parts other than the last must be at least S3_MIN_PART_SIZE, like
+    on the real thing. File I/O runs in a thread.
+    """
+    
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._uploads = {}  # upload_id → (bucket, key)
+        
+    async def __aenter__(self):
+        return self
+        
+    async def __aexit__(self, *exc_info):
+        return False
+        
+    def _path(self, bucket: str, key: str) -> str:
+        bucket_root = os.path.join(self.root, bucket)
+        path = os.path.abspath(os.path.join(bucket_root, key))
+        if not path.startswith(bucket_root + os.sep):
+            raise ObjectStoreError('InvalidArgument', f"Invalid key: {key}")
+        return path
+        
+    def _upload_dir(self, upload_id: str) -> str:
+        return os.path.join(self.root, ".multipart", upload_id)
+        
+    def _check_upload(self, upload_id: str, bucket: str, key: str) -> None:
+        if self._uploads.get(upload_id) != (bucket, key):
+            raise ObjectStoreError('NoSuchUpload', f"Unknown upload: {upload_id}")
+            
+    @staticmethod
+    def _write_file(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+            
+    async def put_object(self, Bucket: str, Key: str, Body: bytes, ContentType: str = None) -> dict:
+        await asyncio.to_thread(self._write_file, self._path(Bucket, Key), Body)
+        return {'ETag': f'"{hashlib.md5(Body).hexdigest()}"'}
+        
+    async def get_object(self, Bucket: str, Key: str) -> dict:
+        try:
+            data = await asyncio.to_thread(self._read_file, self._path(Bucket, Key))
+        except FileNotFoundError:
+            raise ObjectStoreError('NoSuchKey', f"No such key: {Key}") from None
+        return {'Body': _Body(data), 'ContentLength': len(data)}
+        
+    async def head_object(self, Bucket: str, Key: str) -> dict:
+        try:
+            size = await asyncio.to_thread(os.path.getsize, self._path(Bucket, Key))
+        except FileNotFoundError:
+            raise ObjectStoreError('404', f"Not Found: {Key}") from None
+        return {'ContentLength': size}
+        
+    async def delete_object(self, Bucket: str, Key: str) -> dict:
+        try:
+            await asyncio.to_thread(os.remove, self._path(Bucket, Key))
+        except FileNotFoundError:
+            pass
+        return {}
+        
+    async def create_multipart_upload(self, Bucket: str, Key: str, ContentType: str = None) -> dict:
+        self._path(Bucket, Key)  # Validate the key
+        upload_id = uuid.uuid4().hex
+        await asyncio.to_thread(os.makedirs, self._upload_dir(upload_id))
+        self._uploads[upload_id] = (Bucket, Key)
+        return {'UploadId': upload_id}
+        
+    async def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes) -> dict:
+        self._check_upload(UploadId, Bucket, Key)
+        path = os.path.join(self._upload_dir(UploadId), f"{PartNumber:05d}")
+        await asyncio.to_thread(self._write_file, path, Body)
+        return {'ETag': f'"{hashlib.md5(Body).hexdigest()}"'}
+        
+    def _complete(self, upload_id: str, path: str, parts: list) -> None:
+        upload_dir = self._upload_dir(upload_id)
+        part_paths = [os.path.join(upload_dir, f"{part['PartNumber']:05d}") for part in parts]
+        for part_path in part_paths[:-1]:
+            if os.path.getsize(part_path) < S3_MIN_PART_SIZE:
+                raise ObjectStoreError('EntityTooSmall', f"Part smaller than {S3_MIN_PART_SIZE} bytes")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as out:
+            for part_path in part_paths:
+                with open(part_path, "rb") as part_file:
+                    shutil.copyfileobj(part_file, out)
+        os.replace(tmp_path, path)
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        
+    async def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict) -> dict:
+        self._check_upload(UploadId, Bucket, Key)
+        parts = sorted(MultipartUpload['Parts'], key=lambda part: part['PartNumber'])
+        await asyncio.to_thread(self._complete, UploadId, self._path(Bucket, Key), parts)
+        del self._uploads[UploadId]
+        return {'Bucket': Bucket, 'Key': Key}
+        
+    async def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> dict:
+        self._check_upload(UploadId, Bucket, Key)
+        del self._uploads[UploadId]
+        await asyncio.to_thread(shutil.rmtree, self._upload_dir(UploadId), True)
+        return {}
@@ -0,0 +1,18 @@
+"""
+Tax rules: sales tax split, input tax credits and deductible amounts
+
+The rules are data (app/tax/rules.py); TaxRulesEngine compiles them into
+lookup tables and evaluates whole batches of line items at once.
+"""
+
+from app.tax.rules import RULES_VERSION
+from app.tax.engine import TaxRulesEngine, get_tax_engine, normalize_province, to_cents, from_cents
+
+__all__ = [
+    'RULES_VERSION',
+    'TaxRulesEngine',
+    'get_tax_engine',
+    'normalize_province',
+    'to_cents',
+    'from_cents'
+]
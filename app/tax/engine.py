@@ -0,0 +1,224 @@
+# app/tax/engine.py
+
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from app.core.categories import EXPENSE_CATEGORIES, DEFAULT_CATEGORY
+from app.tax import rules
+
+# What is this?
+# ─────────────
+# The tax rules engine: sales tax split (GST/HST/PST), input tax credits
+# (ITC) and deductible amounts for receipt line items.
+#
+# The rules (rules.py) are compiled once into lookup tables:
+#   rate table    → one row per (province, effective from), sorted by
+#                   (province, date); a line item's row is found with a
+#                   binary search (np.searchsorted) on that key
+#   category rows → GST/HST applies, ITC share, deductible share
+#   PST matrix    → [category, province]: does PST apply
+#
+# evaluate() then runs on whole arrays of line items with no per-item
+# Python code: a batch of 100k items takes milliseconds (see
+# benchmarks/tax_rules_bench.py), so a client's year can be recomputed
+# in seconds after a rule change.
+#
+# Money is integer cents. Amounts are as paid (taxes included); taxes are
+# rounded half away from zero, and the subtotal gets the rounding remainder
+# so subtotal + GST + HST + PST is always the amount.
+
+# Days since 1970-01-01 stay below this until the year 2243
+_DAYS_STRIDE = 100_000
+
+def normalize_province(value: Optional[str]) -> str:
+    """
+    Two-letter code for a profile's province (code or name, any case)
+    
+    Returns:
+        The code, or UNKNOWN_PROVINCE ("--": GST only) if not recognized
+    """
+    if not value:
+        return rules.UNKNOWN_PROVINCE
+    value = value.strip().upper()
+    if value in rules.PROVINCES:
+        return value
+    for code, name in rules.PROVINCES.items():
+        if value == name.upper():
+            return code
+    return rules.PROVINCE_ALIASES.get(value, rules.UNKNOWN_PROVINCE)
+
+def to_cents(amounts: Iterable[Optional[Decimal]]) -> np.ndarray:
+    """Decimal amounts (None = 0) → int64 cents"""
+    return np.array(
+        [int(Decimal(amount or 0).scaleb(2).to_integral_value(ROUND_HALF_UP)) for amount in amounts],
+        dtype=np.int64
+    )
+
+def from_cents(cents: int) -> Decimal:
+    """Cents → Decimal amount (for the database)"""
+    return Decimal(int(cents)).scaleb(-2)
+
+def _round_half_away(values: np.ndarray) -> np.ndarray:
+    return (np.sign(values) * np.floor(np.abs(values) + 0.5)).astype(np.int64)
+
+
+class TaxRulesEngine:
+    """
+    Compiled tax rules
+    
+    Usage:
+        engine = get_tax_engine()
+        result = engine.evaluate(amounts, categories, provinces, dates, registered)
+        result['itc']   # int64 cents, one per line item
+    """
+    
+    def __init__(
+        self,
+        version: str = rules.RULES_VERSION,
+        tax_rates: Sequence[tuple] = rules.TAX_RATES,
+        category_rules: Optional[Dict[str, tuple]] = None,
+        pst_overrides: Optional[Dict[tuple, bool]] = None
+    ):
+        self.version = version
+        category_rules = rules.CATEGORY_RULES if category_rules is None else category_rules
+        pst_overrides = rules.PST_OVERRIDES if pst_overrides is None else pst_overrides
+        
+        # Provinces: index into the PST matrix and the rate keys
+        self.provinces = sorted({row[0] for row in tax_rates})
+        if rules.UNKNOWN_PROVINCE not in self.provinces:
+            raise ValueError(f"Tax rates need a row for the unknown province '{rules.UNKNOWN_PROVINCE}'")
+        self._province_index = {code: i for i, code in enumerate(self.provinces)}
+        self._unknown_province = self._province_index[rules.UNKNOWN_PROVINCE]
+        
+        # Rate table, sorted by (province, effective from)
+        rows = sorted(tax_rates, key=lambda row: (self._province_index[row[0]], row[1]))
+        provinces = np.array([self._province_index[row[0]] for row in rows], dtype=np.int64)
+        days = np.array([row[1] for row in rows], dtype='datetime64[D]').astype(np.int64)
+        # The first row of each province also covers earlier dates
+        first = np.r_[True, provinces[1:] != provinces[:-1]]
+        days[first] = 0
+        self._rate_keys = provinces * _DAYS_STRIDE + days
+        self._gst = np.array([row[2] for row in rows])
+        self._hst = np.array([row[3] for row in rows])
+        self._pst = np.array([row[4] for row in rows])
+        
+        # Categories: every expense category needs a rule
+        missing = set(EXPENSE_CATEGORIES) - set(category_rules)
+        if missing:
+            raise ValueError(f"No tax rule for categories: {', '.join(sorted(missing))}")
+        self.categories = list(EXPENSE_CATEGORIES)
+        self._category_index = {name: i for i, name in enumerate(self.categories)}
+        self._default_category = self._category_index[DEFAULT_CATEGORY]
+        self._taxable = np.array([category_rules[name][0] for name in self.categories], dtype=np.float64)
+        self._itc_share = np.array([category_rules[name][2] for name in self.categories])
+        self._deductible_share = np.array([category_rules[name][3] for name in self.categories])
+        
+        self._pst_applies = np.repeat(
+            np.array([category_rules[name][1] for name in self.categories], dtype=np.float64)[:, None],
+            len(self.provinces),
+            axis=1
+        )
+        for (category, province), applies in pst_overrides.items():
+            self._pst_applies[self._category_index[category], self._province_index[province]] = applies
+            
+    # Codes
+    # ─────
+    
+    def _codes(self, values, index: dict, default: int) -> np.ndarray:
+        """Strings → table indexes (one dict lookup each: cheaper than np.unique on strings)"""
+        values = values.tolist() if isinstance(values, np.ndarray) else values
+        return np.fromiter((index.get(value, default) for value in values), dtype=np.int64, count=len(values))
+        
+    def category_codes(self, categories) -> np.ndarray:
+        """Category names → indexes (unknown → "Other")"""
+        return self._codes(categories, self._category_index, self._default_category)
+        
+    def province_codes(self, provinces) -> np.ndarray:
+        """Province codes (see normalize_province) → indexes (unknown → GST only)"""
+        return self._codes(provinces, self._province_index, self._unknown_province)
+        
+    # Evaluation
+    # ──────────
+    
+    def rates(self, provinces: np.ndarray, dates: np.ndarray) -> np.ndarray:
+        """Rate table rows for (province index, date) pairs"""
+        days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+        # Keep the key inside the province's band: before 1970 uses the
+        # province's first rates, after 2243 its latest
+        days = np.clip(days, 0, _DAYS_STRIDE - 1)
+        return np.searchsorted(self._rate_keys, provinces * _DAYS_STRIDE + days, side='right') - 1
+        
+    def evaluate(self, amounts, categories, provinces, dates, registered) -> Dict[str, np.ndarray]:
+        """
+        Taxes of a batch of line items
+        
+        Args:
+            amounts: Amounts paid in cents, taxes included (int64 array)
+            categories: Category names, or indexes from category_codes()
+            provinces: Province codes, or indexes from province_codes()
+            dates: Purchase dates (datetime64[D] array or dates)
+            registered: Whether the buyer is a GST/HST registrant (ITCs)
+            
+        Returns:
+            int64 cent arrays: subtotal, gst, hst, pst, itc, deductible
+        """
+        amounts = np.asarray(amounts, dtype=np.int64)
+        categories = np.asarray(categories)
+        if categories.dtype.kind not in "iu":
+            categories = self.category_codes(categories)
+        provinces = np.asarray(provinces)
+        if provinces.dtype.kind not in "iu":
+            provinces = self.province_codes(provinces)
+        registered = np.broadcast_to(np.asarray(registered, dtype=bool), amounts.shape)
+        
+        rows = self.rates(provinces, dates)
+        taxable = self._taxable[categories]
+        gst_rate = self._gst[rows] * taxable
+        hst_rate = self._hst[rows] * taxable
+        pst_rate = self._pst[rows] * self._pst_applies[categories, provinces]
+        
+        pre_tax = amounts / (1.0 + gst_rate + hst_rate + pst_rate)
+        gst = _round_half_away(pre_tax * gst_rate)
+        hst = _round_half_away(pre_tax * hst_rate)
+        pst = _round_half_away(pre_tax * pst_rate)
+        subtotal = amounts - gst - hst - pst
+        
+        itc = np.where(registered, _round_half_away((gst + hst) * self._itc_share[categories]), 0)
+        deductible = _round_half_away((amounts - itc) * self._deductible_share[categories])
+        
+        return {
+            'subtotal': subtotal,
+            'gst': gst,
+            'hst': hst,
+            'pst': pst,
+            'itc': itc,
+            'deductible': deductible,
+        }
+        
+    def evaluate_one(
+        self,
+        amount: Decimal,
+        category: str,
+        province: str,
+        purchase_date: date,
+        registered: bool
+    ) -> Dict[str, Decimal]:
+        """Taxes of one line item, as Decimal amounts (see evaluate)"""
+        result = self.evaluate(
+            to_cents([amount]), [category], [province], np.array([purchase_date], dtype='datetime64[D]'), [registered]
+        )
+        return {name: from_cents(values[0]) for name, values in result.items()}
+
+
+# Global engine (rules compiled on first use)
+_engine: Optional[TaxRulesEngine] = None
+
+def get_tax_engine() -> TaxRulesEngine:
+    """Get the engine for the current rules (RULES_VERSION)"""
+    global _engine
+    if _engine is None:
+        _engine = TaxRulesEngine()
+    return _engine
@@ -0,0 +1,99 @@
+# app/tax/rules.py
+
+from datetime import date
+
+# What is this?
+# ─────────────
+# The sales tax and deduction rules, as data. TaxRulesEngine (engine.py)
+# compiles them into lookup tables once and applies them to whole arrays
+# of line items.
+#
+# Changing a rule: edit the tables below and bump RULES_VERSION. Line items
+# computed with an older version are then recomputed by
+#     python -m app.cli.recompute_taxes
+
+RULES_VERSION = "2025.1"
+
+# Provinces and territories (Receipt line items use the two-letter code)
+PROVINCES = {
+    'AB': "Alberta",
+    'BC': "British Columbia",
+    'MB': "Manitoba",
+    'NB': "New Brunswick",
+    'NL': "Newfoundland and Labrador",
+    'NS': "Nova Scotia",
+    'NT': "Northwest Territories",
+    'NU': "Nunavut",
+    'ON': "Ontario",
+    'PE': "Prince Edward Island",
+    'QC': "Quebec",
+    'SK': "Saskatchewan",
+    'YT': "Yukon",
+}
+
+# Other spellings found in profiles → code
+PROVINCE_ALIASES = {
+    'QUÉBEC': 'QC',
+    'PEI': 'PE',
+    'NEWFOUNDLAND': 'NL',
+    'YUKON TERRITORY': 'YT',
+}
+
+# Unknown or missing province: federal GST only
+UNKNOWN_PROVINCE = '--'
+
+# Sales tax rates
+# ───────────────
+# (province, effective from, GST, HST, PST) — PST stands for the provincial
+# sales tax of non-harmonized provinces (BC PST, MB RST, SK PST, QC QST).
+# A rate applies from its date until the next row of the same province;
+# the first row of each province also covers earlier dates.
+TAX_RATES = [
+    ('AB', date(2008, 1, 1), 0.05, 0.0, 0.0),
+    ('BC', date(2010, 7, 1), 0.0, 0.12, 0.0),
+    ('BC', date(2013, 4, 1), 0.05, 0.0, 0.07),
+    ('MB', date(2013, 7, 1), 0.05, 0.0, 0.08),
+    ('MB', date(2019, 7, 1), 0.05, 0.0, 0.07),
+    ('NB', date(2010, 7, 1), 0.0, 0.13, 0.0),
+    ('NB', date(2016, 7, 1), 0.0, 0.15, 0.0),
+    ('NL', date(2013, 1, 1), 0.0, 0.13, 0.0),
+    ('NL', date(2016, 7, 1), 0.0, 0.15, 0.0),
+    ('NS', date(2010, 7, 1), 0.0, 0.15, 0.0),
+    ('NS', date(2025, 4, 1), 0.0, 0.14, 0.0),
+    ('NT', date(2008, 1, 1), 0.05, 0.0, 0.0),
+    ('NU', date(2008, 1, 1), 0.05, 0.0, 0.0),
+    ('ON', date(2010, 7, 1), 0.0, 0.13, 0.0),
+    ('PE', date(2013, 4, 1), 0.0, 0.14, 0.0),
+    ('PE', date(2016, 10, 1), 0.0, 0.15, 0.0),
+    ('QC', date(2013, 1, 1), 0.05, 0.0, 0.09975),
+    ('SK', date(2013, 1, 1), 0.05, 0.0, 0.05),
+    ('SK', date(2017, 3, 23), 0.05, 0.0, 0.06),
+    ('YT', date(2008, 1, 1), 0.05, 0.0, 0.0),
+    (UNKNOWN_PROVINCE, date(2008, 1, 1), 0.05, 0.0, 0.0),
+]
+
+# Category rules
+# ──────────────
+# category → (GST/HST applies, PST applies, ITC share, deductible share)
+#   ITC share: part of the GST/HST a registrant gets back as an input tax
+#              credit (meals and entertainment: 50%)
+#   deductible share: part of the cost (net of ITCs) deductible from
+#                     income (meals and entertainment: 50%)
+CATEGORY_RULES = {
+    "Fuel & Vehicle": (True, True, 1.0, 1.0),
+    "Meals & Entertainment": (True, True, 0.5, 0.5),
+    "Office Supplies": (True, True, 1.0, 1.0),
+    "Travel": (True, True, 1.0, 1.0),
+    "Telephone & Internet": (True, True, 1.0, 1.0),
+    "Professional Fees": (True, False, 1.0, 1.0),
+    "Advertising": (True, False, 1.0, 1.0),
+    "Rent": (True, False, 1.0, 1.0),  # Commercial rent
+    "Utilities": (True, True, 1.0, 1.0),
+    "Insurance": (False, False, 0.0, 1.0),  # Exempt supply: no GST/HST, no ITC
+    "Other": (True, True, 1.0, 1.0),
+}
+
+# (category, province) → PST applies, where a province departs from the above
+PST_OVERRIDES = {
+    ("Meals & Entertainment", 'BC'): False,  # Restaurant food is PST-exempt in BC
+}
@@ -1,12 +1,54 @@
 """Security utilities for password hashing"""
 
 from passlib.context import CryptContext
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from typing import Optional, Tuple
+import asyncio
 import hashlib
+import multiprocessing
+import threading
+import time
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import settings
+from app.core.cpus import available_cpus
+from app.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_WAIT
+
+# Supported password hash schemes (PASSWORD_HASH_SCHEME picks the one new
+# hashes use; the others can still be verified)
+PASSWORD_HASH_SCHEMES = ("bcrypt", "argon2")
+
+def create_pwd_context(
+    scheme: Optional[str] = None,
+    bcrypt_rounds: Optional[int] = None,
+    argon2_time_cost: Optional[int] = None,
+    argon2_memory_cost: Optional[int] = None,
+    argon2_parallelism: Optional[int] = None
+) -> CryptContext:
+    """
+    Build the CryptContext for a hash configuration (defaults from Settings)
+    
+    Hashes made with another scheme or other cost parameters are reported
+    by needs_update()/verify_and_update(), so they get rehashed on login.
+    """
+    scheme = scheme or settings.PASSWORD_HASH_SCHEME
+    if scheme not in PASSWORD_HASH_SCHEMES:
+        raise ValueError(f"Unknown password hash scheme: {scheme}")
+    return CryptContext(
+        schemes=[scheme] + [other for other in PASSWORD_HASH_SCHEMES if other != scheme],
+        default=scheme,
+        deprecated="auto",  # Every scheme but the default
+        bcrypt__rounds=bcrypt_rounds or settings.BCRYPT_ROUNDS,
+        argon2__time_cost=argon2_time_cost or settings.ARGON2_TIME_COST,
+        argon2__memory_cost=argon2_memory_cost or settings.ARGON2_MEMORY_COST,
+        argon2__parallelism=argon2_parallelism or settings.ARGON2_PARALLELISM
+    )
+
+pwd_context = create_pwd_context()
 
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt
+    """Hash a password with the configured scheme (PASSWORD_HASH_SCHEME)
     
     Handles bcrypt's 72-byte limit by pre-hashing longer passwords with SHA256.
     """
@@ -28,6 +70,25 @@ def hash_password(password: str) -> str:
             return pwd_context.hash(password)
         raise
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and rehash it if its scheme or cost is outdated
+    
+    Returns:
+        (password_ok, new_hash) - new_hash is None unless the stored hash
+        should be replaced
+    """
+    password_bytes = plain_password.encode('utf-8')
+    
+    # Same pre-hash as hash_password, so the new hash verifies the same way
+    if len(password_bytes) > 72:
+        plain_password = hashlib.sha256(password_bytes).hexdigest()
+    
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except ValueError:
+        plain_password = password_bytes[:72].decode('utf-8', errors='ignore')
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     password_bytes = plain_password.encode('utf-8')
@@ -41,4 +102,254 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except ValueError:
         # If verification fails due to length, try truncated version
         plain_password = password_bytes[:72].decode('utf-8', errors='ignore')
-        return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+        return pwd_context.verify(plain_password, hashed_password)
+
+
+# Password hashing pool
+# ─────────────────────
+# bcrypt is deliberately slow (~250 ms per call). Running it inline inside a
+# request handler ties up a threadpool worker for that whole time, so a burst
+# of logins starves every other endpoint. Instead, password work is shipped
+# to a dedicated pool of processes (one per core by default) and awaited.
+#
+# The pool is bounded: once PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE
+# calls are in flight, new calls fail fast with PasswordHasherBusy instead of
+# piling up behind the KDF.
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the password hashing queue is full"""
+
+
+def _map_call(func, items):
+    """Apply func to every item (one pool task for a slice of a bulk job)"""
+    return [func(item) for item in items]
+
+
+def _timed_call(func, *args):
+    """Run func in the worker process and report when it started/finished
+    
+    Wall-clock timestamps are used because they are comparable across
+    processes (perf_counter is not guaranteed to be).
+    """
+    started_at = time.time()
+    result = func(*args)
+    return result, started_at, time.time()
+
+
+class PasswordHasherPool:
+    """
+    Bounded process pool for CPU-heavy password hashing
+    
+    The executor is created lazily on first use so that importing this
+    module (or forking a server worker) never spawns processes.
+    
+    Usage:
+        password_hash = await password_hasher.run(hash_password, "Secret123")
+    """
+    
+    # Number of recent calls kept for percentile stats
+    LATENCY_WINDOW = 1024
+    
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        
+        # Stats
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._failed = 0
+        self._latencies_ms = deque(maxlen=self.LATENCY_WINDOW)
+        self._queue_waits_ms = deque(maxlen=self.LATENCY_WINDOW)
+    
+    @property
+    def max_workers(self) -> int:
+        """Number of worker processes (0 means run in the threadpool)"""
+        if self._max_workers is None:
+            from app.core.config import settings
+            workers = settings.PASSWORD_HASH_WORKERS
+            if workers is None:
+                workers = available_cpus()
+            self._max_workers = workers
+        return self._max_workers
+    
+    @property
+    def max_queue(self) -> int:
+        """Number of calls allowed to wait for a free worker"""
+        if self._max_queue is None:
+            from app.core.config import settings
+            self._max_queue = settings.PASSWORD_HASH_MAX_QUEUE
+        return self._max_queue
+    
+    @property
+    def capacity(self) -> int:
+        """Maximum number of calls in flight (running + queued)"""
+        return max(self.max_workers, 1) + self.max_queue
+    
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers == 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # "spawn" so workers never inherit DB connections or event
+                # loop state from the parent process
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+    
+    async def run(self, func, *args):
+        """
+        Run a password function in the pool and await its result
+        
+        Args:
+            func: Module-level (picklable) function, e.g. hash_password
+            *args: Arguments for func
+            
+        Returns:
+            Whatever func returns
+            
+        Raises:
+            PasswordHasherBusy: If the queue is full
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise PasswordHasherBusy("Password hashing queue is full")
+            self._in_flight += 1
+        
+        return await self._submit(func, *args)
+    
+    async def map(self, func, items: list, batch_size: int = 16) -> list:
+        """
+        Apply a password function to many items in parallel (bulk jobs)
+        
+        Items are sent to the workers in small batches so interactive calls
+        queued behind a bulk job wait for at most one batch per worker. One
+        worker is left free for interactive traffic when there is more than
+        one. Bulk calls wait for a slot instead of being rejected.
+        
+        Args:
+            func: Module-level (picklable) function, e.g. hash_password
+            items: One argument per call
+            batch_size: Items per pool task
+            
+        Returns:
+            Results in the same order as items
+        """
+        slots = asyncio.Semaphore(max(self.max_workers - 1, 1))
+        
+        async def run_batch(batch):
+            async with slots:
+                with self._lock:
+                    self._in_flight += 1
+                return await self._submit(_map_call, func, batch)
+        
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        results = await asyncio.gather(*(run_batch(batch) for batch in batches))
+        return [result for batch_results in results for result in batch_results]
+    
+    async def _submit(self, func, *args):
+        """Send one call to the executor (caller already counted it in flight)"""
+        submitted_at = time.time()
+        loop = asyncio.get_running_loop()
+        try:
+            executor = self._get_executor()
+            result, started_at, finished_at = await loop.run_in_executor(
+                executor, _timed_call, func, *args
+            )
+        except BrokenProcessPool:
+            # A worker died; drop the executor so the next call gets a new one
+            with self._lock:
+                self._failed += 1
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        
+        queue_wait = max(started_at - submitted_at, 0.0)
+        with self._lock:
+            self._completed += 1
+            self._latencies_ms.append((finished_at - submitted_at) * 1000)
+            self._queue_waits_ms.append(queue_wait * 1000)
+        
+        # Bulk tasks are labelled e.g. "hash_password_batch"
+        operation = f"{args[0].__name__}_batch" if func is _map_call else func.__name__
+        PASSWORD_HASH_DURATION.labels(operation).observe(finished_at - started_at)
+        PASSWORD_HASH_QUEUE_WAIT.labels(operation).observe(queue_wait)
+        
+        return result
+    
+    def stats(self) -> dict:
+        """Queue depth and latency stats (latencies in milliseconds)"""
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+            waits = sorted(self._queue_waits_ms)
+            in_flight = self._in_flight
+            completed = self._completed
+            rejected = self._rejected
+            failed = self._failed
+        
+        def percentile(values, pct):
+            if not values:
+                return None
+            index = min(int(len(values) * pct / 100), len(values) - 1)
+            return round(values[index], 2)
+        
+        workers = self.max_workers
+        return {
+            'workers': workers,
+            'max_queue': self.max_queue,
+            'in_flight': in_flight,
+            'queue_depth': max(in_flight - max(workers, 1), 0),
+            'completed': completed,
+            'rejected': rejected,
+            'failed': failed,
+            'latency_ms': {
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'max': round(latencies[-1], 2) if latencies else None
+            },
+            'queue_wait_ms': {
+                'p50': percentile(waits, 50),
+                'p95': percentile(waits, 95),
+                'max': round(waits[-1], 2) if waits else None
+            }
+        }
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes (a new pool is created on next use)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global pool instance (one per server process)
+password_hasher = PasswordHasherPool()
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password in the password hashing pool"""
+    return await password_hasher.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash in the password hashing pool"""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password in the password hashing pool"""
+    return await password_hasher.run(verify_and_update_password, plain_password, hashed_password)
+
+async def hash_passwords_async(passwords: list) -> list:
+    """Hash many passwords in parallel in the password hashing pool (bulk imports)"""
+    return await password_hasher.map(hash_password, passwords)
@@ -0,0 +1,105 @@
+"""Security utilities for JWT access and refresh tokens"""
+
+from jose import jwt, jwk, JWTError
+from jose.backends.base import Key
+from functools import lru_cache
+from datetime import datetime, timedelta
+from typing import List
+import uuid
+
+from app.core.config import settings
+
+# Token types (stored in the "type" claim)
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+class TokenError(ValueError):
+    """Raised when a token is malformed, expired or of the wrong type"""
+
+
+# Keys
+# ────
+# Keys are parsed once and cached. python-jose accepts a constructed Key
+# object directly, which skips re-parsing the secret/PEM on every request.
+# HS* algorithms use JWT_SECRET_KEY; RS*/ES* use JWT_PRIVATE_KEY to sign
+# and JWT_PUBLIC_KEY to verify.
+
+@lru_cache(maxsize=1)
+def _signing_key() -> Key:
+    algorithm = settings.JWT_ALGORITHM
+    key = settings.JWT_SECRET_KEY if algorithm.startswith("HS") else settings.JWT_PRIVATE_KEY
+    if not key:
+        raise RuntimeError(f"No signing key configured for {algorithm}")
+    return jwk.construct(key, algorithm)
+
+@lru_cache(maxsize=1)
+def _verification_key() -> Key:
+    algorithm = settings.JWT_ALGORITHM
+    if algorithm.startswith("HS"):
+        return _signing_key()
+    if not settings.JWT_PUBLIC_KEY:
+        raise RuntimeError(f"No verification key configured for {algorithm}")
+    return jwk.construct(settings.JWT_PUBLIC_KEY, algorithm)
+
+def load_keys() -> None:
+    """Parse and cache the keys now (app startup) instead of on the first request"""
+    if settings.JWT_ALGORITHM.startswith("HS") or settings.JWT_PRIVATE_KEY:
+        _signing_key()
+    _verification_key()
+
+
+def _encode(claims: dict, token_type: str, expires_delta: timedelta) -> str:
+    now = datetime.utcnow()
+    claims.update({
+        'type': token_type,
+        'iss': settings.JWT_ISSUER,
+        'iat': now,
+        'exp': now + expires_delta,
+        'jti': uuid.uuid4().hex
+    })
+    return jwt.encode(claims, _signing_key(), algorithm=settings.JWT_ALGORITHM)
+
+def create_access_token(user_id, account_type: str, roles: List[str]) -> str:
+    """
+    Create a signed access token
+    
+    The claims carry everything needed to identify the caller, so
+    authenticated requests don't need a database lookup.
+    """
+    return _encode(
+        {'sub': str(user_id), 'account_type': account_type, 'roles': list(roles)},
+        ACCESS_TOKEN,
+        timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+def create_refresh_token(user_id) -> str:
+    """Create a signed refresh token (identity only; claims are re-read on refresh)"""
+    return _encode(
+        {'sub': str(user_id)},
+        REFRESH_TOKEN,
+        timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+
+def decode_token(token: str, token_type: str = ACCESS_TOKEN) -> dict:
+    """
+    Verify a token's signature, expiry, issuer and type
+    
+    Returns:
+        The token claims
+        
+    Raises:
+        TokenError: If the token is not valid
+    """
+    try:
+        claims = jwt.decode(
+            token,
+            _verification_key(),
+            algorithms=[settings.JWT_ALGORITHM],
+            issuer=settings.JWT_ISSUER
+        )
+    except JWTError as e:
+        raise TokenError(str(e)) from e
+    
+    if claims.get('type') != token_type or not claims.get('sub'):
+        raise TokenError("Invalid token type")
+    return claims
@@ -0,0 +1,3 @@
+"""
+Background workers (run as separate processes, see app/cli)
+"""
@@ -0,0 +1,339 @@
+# app/workers/llm.py
+
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional, Tuple
+import asyncio
+import json
+import logging
+import re
+import time
+
+from app.core.categories import EXPENSE_CATEGORIES, DEFAULT_CATEGORY
+
+logger = logging.getLogger("app.worker")
+
+# What is this?
+# ─────────────
+# The LLM step of receipt processing: map OCR text to structured fields
+# (vendor, date, total, currency, category, confidence).
+#
+# A model request has a high fixed cost, so calls are not made one receipt
+# at a time: LlmBatcher coalesces the receipts that arrive within
+# LLM_BATCH_WAIT_MS (up to LLM_BATCH_SIZE) into one request, with at most
+# LLM_MAX_CONCURRENT_BATCHES requests in flight. While all of them are
+# busy, waiting receipts pile up into the next (fuller) batch.
+#
+# Models (LLM_BACKEND setting):
+#   - "http" → a local model server with an OpenAI-compatible /completions
+#              endpoint that takes a list of prompts (vLLM, llama.cpp server)
+#   - "fake" → in-process stand-in (tests/dev): regular expressions over
+#              the text, with optional simulated latency
+
+PROMPT = """Extract the fields of this receipt as a JSON object with the keys:
+vendor_name, receipt_date (YYYY-MM-DD), total_amount (number), currency (ISO 4217 code),
+category (one of: {categories}), confidence (0 to 1: how sure you are of the fields).
+Answer with the JSON object only.
+
+Receipt text:
+\"\"\"
+{text}
+\"\"\"
+JSON:"""
+
+def build_prompt(text: str) -> str:
+    return PROMPT.format(categories=", ".join(EXPENSE_CATEGORIES), text=text.strip()[:8000])
+
+def parse_json_object(output: str) -> dict:
+    """The first JSON object in a model's answer ({} if there is none)"""
+    start, end = output.find("{"), output.rfind("}")
+    if start < 0 or end < start:
+        return {}
+    try:
+        value = json.loads(output[start:end + 1])
+    except ValueError:
+        return {}
+    return value if isinstance(value, dict) else {}
+
+def normalize_extraction(raw: dict) -> dict:
+    """
+    Receipt fields from a model's answer, validated
+    
+    Anything missing or malformed becomes None (category: "Other"); the
+    model's own confidence is kept, clamped to 0..1.
+    """
+    def text(value, length):
+        value = str(value).strip() if value is not None else ""
+        return value[:length] or None
+        
+    receipt_date = raw.get('receipt_date')
+    try:
+        receipt_date = date.fromisoformat(str(receipt_date)[:10]) if receipt_date else None
+    except ValueError:
+        receipt_date = None
+        
+    total_amount = raw.get('total_amount')
+    try:
+        total_amount = Decimal(str(total_amount).replace("$", "").replace(",", "")).quantize(Decimal("0.01"))
+        if not total_amount.is_finite() or abs(total_amount) >= 10 ** 10:
+            total_amount = None
+    except (InvalidOperation, ValueError):
+        total_amount = None
+        
+    currency = text(raw.get('currency'), 3)
+    category = raw.get('category')
+    try:
+        confidence = min(max(float(raw.get('confidence') or 0), 0.0), 1.0)
+    except (TypeError, ValueError):
+        confidence = 0.0
+        
+    return {
+        'vendor_name': text(raw.get('vendor_name'), 255),
+        'receipt_date': receipt_date,
+        'total_amount': total_amount,
+        'currency': currency.upper() if currency and currency.isalpha() else 'CAD',
+        'category': category if category in EXPENSE_CATEGORIES else DEFAULT_CATEGORY,
+        'confidence': confidence,
+    }
+
+
+class ExtractionModel:
+    """Base class: maps OCR texts to raw field dicts, one request per batch"""
+    
+    name = "base"
+    
+    async def extract_batch(self, texts: List[str]) -> List[dict]:
+        """One raw answer (dict, possibly empty) per text, in order"""
+        raise NotImplementedError
+        
+    async def close(self) -> None:
+        pass
+
+
+class HttpExtractionModel(ExtractionModel):
+    """
+    Local model server with an OpenAI-compatible completions endpoint
+    
+    All the prompts of a batch go in one request ("prompt" is a list); the
+    answers come back as choices with the prompt's index.
+    """
+    
+    name = "http"
+    
+    def __init__(self, base_url: str, model: str, timeout: float = 120.0, max_tokens: int = 256):
+        import httpx
+        self.model = model
+        self.max_tokens = max_tokens
+        self.client = httpx.AsyncClient(base_url=base_url.rstrip("/"), timeout=timeout)
+        
+    async def extract_batch(self, texts: List[str]) -> List[dict]:
+        response = await self.client.post("/completions", json={
+            'model': self.model,
+            'prompt': [build_prompt(text) for text in texts],
+            'max_tokens': self.max_tokens,
+            'temperature': 0
+        })
+        response.raise_for_status()
+        answers = [{} for _ in texts]
+        for choice in response.json().get('choices', []):
+            index = choice.get('index', 0)
+            if 0 <= index < len(texts):
+                answers[index] = parse_json_object(choice.get('text', ""))
+        return answers
+        
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+# Fake model: keyword → category
+FAKE_CATEGORY_KEYWORDS = {
+    "Fuel & Vehicle": ("fuel", "gas", "petro", "shell", "esso", "parking"),
+    "Meals & Entertainment": ("restaurant", "cafe", "coffee", "tim hortons", "starbucks", "bar", "grill"),
+    "Office Supplies": ("staples", "office", "paper", "printer", "toner"),
+    "Travel": ("hotel", "airline", "air canada", "westjet", "via rail", "uber", "taxi"),
+    "Telephone & Internet": ("rogers", "bell", "telus", "internet", "mobile"),
+}
+
+class FakeExtractionModel(ExtractionModel):
+    """
+    In-process stand-in for the model
+    
+    Reads "TOTAL" lines, ISO dates and known vendor keywords; confidence
+    is the share of fields it found. request_ms and item_ms simulate a
+    model server (fixed cost per request + cost per receipt).
+    """
+    
+    name = "fake"
+    
+    def __init__(self, request_ms: float = 0, item_ms: float = 0):
+        self.request_ms = request_ms
+        self.item_ms = item_ms
+        self.requests = 0
+        self.items = 0
+        
+    def _extract(self, text: str) -> dict:
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        lowered = text.lower()
+        total = None
+        for line in lines:
+            match = re.search(r"total\D*?(\d[\d,]*\.\d{2})", line, re.IGNORECASE)
+            if match and "sub" not in line.lower():
+                total = match.group(1)
+        receipt_date = re.search(r"\d{4}-\d{2}-\d{2}", text)
+        category = next(
+            (name for name, words in FAKE_CATEGORY_KEYWORDS.items() if any(word in lowered for word in words)),
+            None
+        )
+        fields = {
+            'vendor_name': lines[0] if lines else None,
+            'receipt_date': receipt_date.group(0) if receipt_date else None,
+            'total_amount': total,
+            'currency': "USD" if "usd" in lowered else "CAD",
+            'category': category,
+        }
+        found = sum(value is not None for value in fields.values()) - 1  # currency is always set
+        fields['confidence'] = round(0.2 + 0.19 * found, 2) if lines else 0.0
+        return fields
+        
+    async def extract_batch(self, texts: List[str]) -> List[dict]:
+        self.requests += 1
+        self.items += len(texts)
+        if self.request_ms or self.item_ms:
+            await asyncio.sleep((self.request_ms + self.item_ms * len(texts)) / 1000)
+        return [self._extract(text) for text in texts]
+
+
+def create_extraction_model(backend: str) -> ExtractionModel:
+    """
+    Build an extraction model by name
+    
+    Args:
+        backend: "http" or "fake"
+    """
+    from app.core.config import settings
+    if backend == "http":
+        return HttpExtractionModel(settings.LLM_ENDPOINT_URL, settings.LLM_MODEL, settings.LLM_TIMEOUT_SECONDS)
+    if backend == "fake":
+        return FakeExtractionModel()
+    raise ValueError(f"Unknown LLM backend: {backend}")
+
+
+class LlmBatcher:
+    """
+    Coalesces extraction calls into batched model requests
+    
+    Usage:
+        batcher = LlmBatcher(model)
+        fields, timing = await batcher.extract(text)   # From many tasks at once
+        await batcher.close()
+    """
+    
+    def __init__(
+        self,
+        model: ExtractionModel,
+        batch_size: Optional[int] = None,
+        max_wait_ms: Optional[int] = None,
+        max_concurrent: Optional[int] = None
+    ):
+        from app.core.config import settings
+        self.model = model
+        self.batch_size = batch_size or settings.LLM_BATCH_SIZE
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else settings.LLM_BATCH_WAIT_MS) / 1000
+        self.max_concurrent = max_concurrent or settings.LLM_MAX_CONCURRENT_BATCHES
+        self._pending: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._requests = set()
+        
+        # Stats
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        
+    @property
+    def capacity(self) -> int:
+        """Receipts worth having in flight to keep every request full"""
+        return self.batch_size * self.max_concurrent
+        
+    async def extract(self, text: str) -> Tuple[dict, dict]:
+        """
+        Fields for one OCR text (waits for its batch)
+        
+        Returns:
+            (fields, timing): normalized fields, and the model request's
+            duration (llm_ms) and size (llm_batch_size)
+        """
+        if self._loop_task is None:
+            self._pending = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self._loop_task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._pending.put((text, future))
+        return await future
+        
+    async def _run(self) -> None:
+        """Collect batches and send them (one task per request)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._pending.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                if not self._pending.empty():
+                    batch.append(self._pending.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                    
+            await self._slots.acquire()
+            # Receipts that arrived while waiting for a slot join this batch
+            while len(batch) < self.batch_size and not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+            request = asyncio.create_task(self._send(batch))
+            self._requests.add(request)
+            request.add_done_callback(self._requests.discard)
+            
+    async def _send(self, batch: list) -> None:
+        started = time.perf_counter()
+        try:
+            answers = await self.model.extract_batch([text for text, _ in batch])
+            if len(answers) != len(batch):
+                raise RuntimeError(f"Model returned {len(answers)} answers for {len(batch)} receipts")
+        except Exception as e:
+            self.failed_batches += 1
+            logger.warning("LLM batch of %d failed: %s: %s", len(batch), type(e).__name__, e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+            
+        timing = {'llm_ms': round((time.perf_counter() - started) * 1000, 1), 'llm_batch_size': len(batch)}
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result((normalize_extraction(answer), timing))
+                
+    def stats(self) -> dict:
+        return {
+            'model': self.model.name,
+            'batches': self.batches,
+            'failed_batches': self.failed_batches,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else None
+        }
+        
+    async def close(self) -> None:
+        """Stop batching (after the in-flight requests) and close the model"""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        if self._requests:
+            await asyncio.gather(*self._requests, return_exceptions=True)
+        await self.model.close()
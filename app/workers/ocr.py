@@ -0,0 +1,147 @@
+# app/workers/ocr.py
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+import asyncio
+import io
+import multiprocessing
+import threading
+import time
+
+from app.core.cpus import available_cpus
+
+# What is this?
+# ─────────────
+# Text extraction (OCR) for receipt files, run in a pool of processes.
+#
+# OCR is CPU-bound, so it runs outside the worker's event loop: one process
+# per available core by default (OCR_WORKERS). The pipeline never submits
+# more files than there are processes, so the executor's own queue stays
+# empty and the files waiting for OCR sit in the pipeline's bounded queue.
+#
+# Engines (OCR_ENGINE setting):
+#   - "tesseract" → pytesseract + Pillow (images), pdf2image (PDFs)
+#   - "fake"      → in-process stand-in (tests/dev): text files are read
+#                   as-is, anything else is "unreadable"; burns
+#                   FAKE_OCR_CPU_MS of CPU per file to stand in for the work
+
+class OcrError(RuntimeError):
+    """Raised when a file cannot be read"""
+
+
+def _tesseract(data: bytes, content_type: str) -> str:
+    try:
+        import pytesseract
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError("The 'pytesseract' and 'Pillow' packages are required for the tesseract OCR engine") from e
+        
+    if content_type == 'application/pdf':
+        try:
+            from pdf2image import convert_from_bytes
+        except ImportError as e:
+            raise RuntimeError("The 'pdf2image' package is required to OCR PDFs") from e
+        pages = convert_from_bytes(data)
+    else:
+        try:
+            pages = [Image.open(io.BytesIO(data))]
+        except Exception as e:
+            raise OcrError(f"Not a readable image: {e}") from e
+    return "\n\f".join(pytesseract.image_to_string(page) for page in pages)
+
+
+def _fake(data: bytes, content_type: str, cpu_ms: int) -> str:
+    deadline = time.process_time() + cpu_ms / 1000
+    while time.process_time() < deadline:
+        sum(range(1000))
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return ""
+
+
+def extract_text(engine: str, data: bytes, content_type: str, fake_cpu_ms: int = 0) -> Tuple[str, float, float]:
+    """
+    OCR one file (runs in a pool process)
+    
+    Returns:
+        (text, started_at, finished_at): wall-clock times, comparable
+        across processes
+    """
+    started_at = time.time()
+    if engine == "tesseract":
+        text = _tesseract(data, content_type)
+    elif engine == "fake":
+        text = _fake(data, content_type, fake_cpu_ms)
+    else:
+        raise ValueError(f"Unknown OCR engine: {engine}")
+    return text, started_at, time.time()
+
+
+class OcrPool:
+    """
+    Process pool for OCR
+    
+    Like the password hashing pool, the executor is created on first use
+    (spawned processes: nothing inherited from the worker's event loop or
+    database connections).
+    
+    Usage:
+        text, started_at, finished_at = await ocr_pool.run(data, "image/jpeg")
+    """
+    
+    def __init__(self, engine: Optional[str] = None, max_workers: Optional[int] = None):
+        from app.core.config import settings
+        self.engine = engine or settings.OCR_ENGINE
+        self.fake_cpu_ms = settings.FAKE_OCR_CPU_MS
+        workers = max_workers if max_workers is not None else settings.OCR_WORKERS
+        self.max_workers = available_cpus() if workers is None else workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        
+    @property
+    def concurrency(self) -> int:
+        """Files worth submitting at once (one per process)"""
+        return max(self.max_workers, 1)
+        
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers == 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+            
+    async def run(self, data: bytes, content_type: str) -> Tuple[str, float, float]:
+        """OCR one file in a pool process (see extract_text)"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(
+                executor, extract_text, self.engine, data, content_type, self.fake_cpu_ms
+            )
+        except BrokenProcessPool:
+            # A process died (e.g. out of memory); the next call gets a new pool
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+            
+    async def warm_up(self) -> None:
+        """Start every process before the first real file"""
+        # The empty file may not be readable by the engine; only the start-up matters
+        await asyncio.gather(
+            *(self.run(b"", "text/plain") for _ in range(self.concurrency)),
+            return_exceptions=True
+        )
+        
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
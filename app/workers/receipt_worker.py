@@ -0,0 +1,398 @@
+# app/workers/receipt_worker.py
+
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+import asyncio
+import logging
+import os
+import socket
+import time
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.models import Receipt, ReceiptJob
+from app.db.session import get_async_db_session
+from app.services.receipt_jobs import ReceiptJobQueue
+from app.services.summary_service import SummaryService
+from app.services.tax_service import TaxService
+from app.storage import get_storage
+from app.workers.llm import ExtractionModel, LlmBatcher, create_extraction_model
+from app.workers.ocr import OcrPool
+
+logger = logging.getLogger("app.worker")
+
+# What is this?
+# ─────────────
+# The receipt processing worker: a pipeline of stages joined by bounded
+# queues, each stage running several items at once.
+#
+#   fetch ─► [queue] ─► OCR ─► [queue] ─► LLM ─► [queue] ─► save
+#
+#   fetch → claims due jobs in batches (RECEIPT_CLAIM_BATCH_SIZE, no more
+#           than the next queue has room for) and loads their receipts
+#   OCR   → one task per OCR process (OcrPool, one per core): reads the
+#           file from storage and extracts its text
+#   LLM   → enough tasks to fill every concurrent model request; their
+#           calls are coalesced into batched requests (LlmBatcher)
+#   save  → confidence check (APPROVED at RECEIPT_APPROVAL_CONFIDENCE or
+#           above, else REVIEW), then the tax rules engine (app/tax) files
+#           the receipt as a line item with its taxes for the owner's
+#           province and GST/HST registration; the receipt's fields, its
+#           line item, the dashboard summaries (receipt_summaries) and the
+#           job's completion are committed together
+#
+# Backpressure: every queue holds at most RECEIPT_PIPELINE_QUEUE_SIZE
+# items. When a stage falls behind, the stages before it block on put()
+# and the fetcher stops claiming, so the backlog stays in the database
+# (claimable by other workers) instead of in this process's memory.
+# Throughput grows with the number of OCR processes (cores) until the
+# model server becomes the bottleneck.
+#
+# If a stage raises, the job is retried with backoff, and dead-lettered
+# (receipt FAILED) after RECEIPT_JOB_MAX_ATTEMPTS. Run several worker
+# processes (or machines) for more throughput: SKIP LOCKED keeps them apart.
+# While jobs are in the pipeline their locks are refreshed (heartbeat), so
+# a slow pipeline isn't mistaken for a dead worker.
+#
+# Timings
+# ───────
+# Each job records where its time went (ms) in receipt_jobs.timings:
+#   queued_ms          due → claimed
+#   ocr_queue_ms       waiting for an OCR process
+#   fetch_ms           reading the file from storage
+#   ocr_ms             text extraction
+#   llm_queue_ms       waiting for an LLM task
+#   llm_batch_wait_ms  waiting for the batch to fill / for a free request
+#   llm_ms             the model request (shared by the batch)
+#   llm_batch_size     receipts in that request
+#   save_queue_ms      waiting for a save task
+#   save_ms            database writes (including the line item's taxes)
+#   total_ms           claimed → saved
+
+class PipelineItem:
+    """A claimed job on its way through the stages"""
+    
+    def __init__(self, job: ReceiptJob, receipt: Receipt, tax_profile: tuple):
+        self.job = job
+        self.receipt = receipt
+        self.tax_profile = tax_profile  # (province code, GST/HST registrant)
+        self.text: Optional[str] = None
+        self.fields: Optional[dict] = None
+        self.timings = {}
+        if job.locked_at and job.run_after:
+            self.timings['queued_ms'] = round(max((job.locked_at - job.run_after).total_seconds(), 0) * 1000, 1)
+        self.claimed = self._mark = time.perf_counter()
+        
+    def lap(self, name: str) -> float:
+        """Record the time since the previous lap under name (ms)"""
+        now = time.perf_counter()
+        self.timings[name] = round((now - self._mark) * 1000, 1)
+        self._mark = now
+        return self.timings[name]
+
+
+class ReceiptWorker:
+    """
+    Claims receipt jobs and runs them through the pipeline until stopped
+    
+    Usage:
+        worker = ReceiptWorker()
+        await worker.run()         # Until worker.stop()
+        await worker.run_once()    # Until the queue has nothing due
+        await worker.close()       # Stop the OCR processes, close the model
+    """
+    
+    # Concurrent database writers in the save stage
+    SAVE_TASKS = 4
+    
+    # Characters of OCR text kept with the receipt (for review)
+    OCR_TEXT_LIMIT = 20000
+    
+    def __init__(
+        self,
+        ocr_pool: Optional[OcrPool] = None,
+        model: Optional[ExtractionModel] = None,
+        claim_batch_size: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        worker_id: Optional[str] = None
+    ):
+        self.ocr_pool = ocr_pool or OcrPool()
+        self.batcher = LlmBatcher(model or create_extraction_model(settings.LLM_BACKEND))
+        self.claim_batch_size = claim_batch_size or settings.RECEIPT_CLAIM_BATCH_SIZE
+        self.queue_size = queue_size or settings.RECEIPT_PIPELINE_QUEUE_SIZE
+        self.poll_interval = poll_interval if poll_interval is not None else settings.RECEIPT_WORKER_POLL_SECONDS
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+        self._queues = {}
+        self._in_flight = {}  # job_id → PipelineItem, claimed and not yet saved or failed
+        self._started = None
+        
+        # Stats
+        self.claimed = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.dead = 0
+        
+    def stop(self) -> None:
+        """Finish the jobs in progress, then return from run()"""
+        self._stopping.set()
+        
+    # Stages
+    # ──────
+    
+    async def _ocr(self, item: PipelineItem) -> None:
+        item.lap('ocr_queue_ms')
+        data = await get_storage().read(item.receipt.storage_key)
+        item.lap('fetch_ms')
+        item.text, _, _ = await self.ocr_pool.run(data, item.receipt.content_type)
+        item.lap('ocr_ms')
+        
+    async def _llm(self, item: PipelineItem) -> None:
+        item.lap('llm_queue_ms')
+        item.fields, timing = await self.batcher.extract(item.text)
+        waited = item.lap('llm_batch_wait_ms')
+        item.timings['llm_batch_wait_ms'] = round(max(waited - timing['llm_ms'], 0), 1)
+        item.timings.update(timing)
+        
+    async def _save(self, item: PipelineItem) -> None:
+        item.lap('save_queue_ms')
+        fields = item.fields
+        status = 'APPROVED' if fields['confidence'] >= settings.RECEIPT_APPROVAL_CONFIDENCE else 'REVIEW'
+        extracted = {
+            'fields': {
+                key: (str(value) if value is not None and key in ('receipt_date', 'total_amount') else value)
+                for key, value in fields.items()
+            },
+            'ocr_text': (item.text or "")[:self.OCR_TEXT_LIMIT]
+        }
+        
+        async with get_async_db_session() as db:
+            async with SummaryService.tracking(db, item.receipt.receipt_id):
+                await db.execute(
+                    update(Receipt)
+                    .where(Receipt.receipt_id == item.receipt.receipt_id)
+                    .values(
+                        **fields,
+                        status=status,
+                        extracted_data=extracted,
+                        error_message=None,
+                        processed_at=datetime.utcnow()
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await TaxService.replace_line_items(db, item.receipt, fields, *item.tax_profile)
+            item.lap('save_ms')
+            item.timings['total_ms'] = round((time.perf_counter() - item.claimed) * 1000, 1)
+            if not await ReceiptJobQueue.complete(db, item.job, item.timings):
+                # Requeued as stale meanwhile: the newer run saves the receipt
+                await db.rollback()
+                self._in_flight.pop(item.job.job_id, None)
+                logger.warning("Receipt job %s was taken over by another run, result dropped", item.job.job_id)
+                return
+            await db.commit()
+            
+        self._in_flight.pop(item.job.job_id, None)
+        self.succeeded += 1
+        logger.info(
+            "Receipt job %s done in %.0f ms (%s)",
+            item.job.job_id,
+            item.timings['total_ms'],
+            status,
+            extra={'receipt_id': str(item.job.receipt_id), 'attempt': item.job.attempts, 'timings': item.timings}
+        )
+        
+    async def _fail(self, item: PipelineItem, exc: Exception) -> None:
+        """Retry the job later, or dead-letter it"""
+        error = f"{type(exc).__name__}: {exc}"
+        item.timings['total_ms'] = round((time.perf_counter() - item.claimed) * 1000, 1)
+        self._in_flight.pop(item.job.job_id, None)
+        try:
+            async with get_async_db_session() as db:
+                dead = await ReceiptJobQueue.fail(db, item.job, error, item.timings)
+        except Exception:
+            # The job stays 'running' until requeue_stale picks it up
+            logger.exception("Could not record the failure of receipt job %s", item.job.job_id)
+            return
+        if dead:
+            self.dead += 1
+            logger.error("Receipt job %s dead after %d attempts: %s", item.job.job_id, item.job.attempts, error)
+        else:
+            self.retried += 1
+            logger.warning("Receipt job %s failed (attempt %d), will retry: %s", item.job.job_id, item.job.attempts, error)
+            
+    async def _stage(
+        self,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        work: Callable[[PipelineItem], Awaitable[None]]
+    ) -> None:
+        """One task of a stage: take an item, work on it, pass it on"""
+        while True:
+            item = await inbox.get()
+            try:
+                try:
+                    await work(item)
+                except Exception as e:
+                    await self._fail(item, e)
+                else:
+                    if outbox is not None:
+                        await outbox.put(item)  # Blocks while the next stage is full
+            finally:
+                inbox.task_done()
+                
+    async def _claim(self, limit: int) -> list:
+        """Claim up to `limit` due jobs; returns their pipeline items"""
+        async with get_async_db_session() as db:
+            jobs = await ReceiptJobQueue.claim(db, self.worker_id, limit=limit)
+            if not jobs:
+                return []
+            result = await db.execute(
+                select(Receipt).where(Receipt.receipt_id.in_([job.receipt_id for job in jobs]))
+            )
+            receipts = {receipt.receipt_id: receipt for receipt in result.scalars()}
+            tax_profiles = await TaxService.tax_profiles(db, [receipt.user_id for receipt in receipts.values()])
+            
+            items = []
+            for job in jobs:
+                receipt = receipts.get(job.receipt_id)
+                if receipt is None:  # Deleted since: nothing to do
+                    await ReceiptJobQueue.complete(db, job)
+                else:
+                    tax_profile = tax_profiles.get(receipt.user_id) or TaxService.default_tax_profile()
+                    items.append(PipelineItem(job, receipt, tax_profile))
+            await db.commit()
+        self._in_flight.update((item.job.job_id, item) for item in items)
+        self.claimed += len(jobs)
+        return items
+        
+    async def _fetch(self, until_empty: bool) -> None:
+        """Claim jobs while the first queue has room"""
+        queue = self._queues['ocr']
+        while not self._stopping.is_set():
+            room = max(queue.maxsize - queue.qsize(), 1)
+            try:
+                items = await self._claim(min(self.claim_batch_size, room))
+            except Exception:
+                logger.exception("Could not claim receipt jobs")
+                if until_empty:
+                    raise
+                await self._idle(self.poll_interval)
+                continue
+            if not items:
+                if until_empty:
+                    return
+                await self._idle(self.poll_interval)
+                continue
+            for item in items:
+                await queue.put(item)  # Blocks while OCR is behind
+                
+    async def _idle(self, seconds: float) -> None:
+        """Sleep, but wake up at once when stopped"""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+            
+    async def _heartbeat(self) -> None:
+        """Keep the locks of in-flight jobs fresh (requeue_stale skips them)"""
+        interval = max(settings.RECEIPT_JOB_LOCK_TIMEOUT_SECONDS / 4, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with get_async_db_session() as db:
+                    await ReceiptJobQueue.heartbeat(db, self.worker_id, list(self._in_flight))
+            except Exception:
+                logger.exception("Could not refresh receipt job locks")
+                
+    async def _reaper(self) -> None:
+        """Requeue jobs of workers that died mid-job"""
+        interval = max(settings.RECEIPT_JOB_LOCK_TIMEOUT_SECONDS / 4, 1)
+        while not self._stopping.is_set():
+            try:
+                async with get_async_db_session() as db:
+                    requeued = await ReceiptJobQueue.requeue_stale(db)
+                if requeued:
+                    logger.warning("Took back %d stale receipt jobs", requeued)
+            except Exception:
+                logger.exception("Could not requeue stale receipt jobs")
+            await self._idle(interval)
+            
+    async def _run(self, until_empty: bool) -> None:
+        """Start the stages, feed them until stopped (or out of jobs), drain them"""
+        await self.ocr_pool.warm_up()  # Process start-up is not part of any job's timings
+        self._queues = {name: asyncio.Queue(maxsize=self.queue_size) for name in ('ocr', 'llm', 'save')}
+        stages = [
+            (self._queues['ocr'], [
+                asyncio.create_task(self._stage(self._queues['ocr'], self._queues['llm'], self._ocr))
+                for _ in range(self.ocr_pool.concurrency)
+            ]),
+            (self._queues['llm'], [
+                asyncio.create_task(self._stage(self._queues['llm'], self._queues['save'], self._llm))
+                for _ in range(self.batcher.capacity)
+            ]),
+            (self._queues['save'], [
+                asyncio.create_task(self._stage(self._queues['save'], None, self._save))
+                for _ in range(self.SAVE_TASKS)
+            ]),
+        ]
+        background = [asyncio.create_task(self._heartbeat())]
+        if not until_empty:
+            background.append(asyncio.create_task(self._reaper()))
+        try:
+            await self._fetch(until_empty)
+            # Drain: each queue is empty once everything before it has passed through
+            for queue, tasks in stages:
+                await queue.join()
+                for task in tasks:
+                    task.cancel()
+        finally:
+            tasks = [task for _, stage_tasks in stages for task in stage_tasks] + background
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            
+    async def run(self) -> None:
+        """Process jobs until stop() is called"""
+        logger.info(
+            "Receipt worker %s started (%d OCR processes, %s model, batches of %d)",
+            self.worker_id, self.ocr_pool.max_workers, self.batcher.model.name, self.batcher.batch_size
+        )
+        if self.ocr_pool.engine == "fake" or self.batcher.model.name == "fake":
+            logger.warning("Receipt worker uses a fake OCR engine or model: extractions are not real")
+        self._started = time.monotonic()
+        await self._run(until_empty=False)
+        logger.info("Receipt worker %s stopped", self.worker_id)
+        
+    async def run_once(self) -> int:
+        """
+        Process due jobs until none are left (scripts, tests, benchmarks)
+        
+        Returns:
+            Number of jobs processed
+        """
+        before = self.succeeded + self.retried + self.dead
+        if self._started is None:
+            self._started = time.monotonic()
+        await self._run(until_empty=True)
+        return self.succeeded + self.retried + self.dead - before
+        
+    async def close(self) -> None:
+        """Stop the OCR processes and close the model client"""
+        await self.batcher.close()
+        self.ocr_pool.shutdown()
+        
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self._started if self._started else 0
+        return {
+            'worker_id': self.worker_id,
+            'ocr_workers': self.ocr_pool.max_workers,
+            'claimed': self.claimed,
+            'succeeded': self.succeeded,
+            'retried': self.retried,
+            'dead': self.dead,
+            'receipts_per_minute': round(self.succeeded / elapsed * 60, 1) if elapsed else None,
+            'queue_depths': {name: queue.qsize() for name, queue in self._queues.items()},
+            'llm': self.batcher.stats()
+        }
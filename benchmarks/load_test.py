@@ -0,0 +1,298 @@
+"""
+Load test for the users API
+
+Drives /register, /login (right and wrong password), /me and /{user_id}
+at a fixed concurrency, one scenario after the other, and writes
+throughput and latency percentiles per scenario to a JSON file. A second
+command compares two such files and fails on regressions.
+
+Usage:
+    # Against a running server (./run.sh prod)
+    python benchmarks/load_test.py run --base-url http://localhost:8000 -o baseline.json
+    
+    # In-process (no server; still needs the database from DATABASE_URL)
+    python benchmarks/load_test.py run --asgi -o current.json
+    
+    # Compare (exit code 1 if anything got worse by more than 10%)
+    python benchmarks/load_test.py compare baseline.json current.json --threshold 0.10
+
+See benchmarks/README.md for setting up the database.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+API = "/api/v1/users"
+PASSWORD = "BenchPass123"
+WRONG_PASSWORD = "WrongPass123"
+
+# Failed logins allowed per user before the account locks (see UserService)
+BAD_LOGINS_PER_USER = 4
+
+# Metrics compared by the compare command: name → True if higher is better
+COMPARED_METRICS = {
+    'throughput_rps': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+}
+
+
+def percentile(values: list, pct: float):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    index = min(max(math.ceil(len(values) * pct / 100) - 1, 0), len(values) - 1)
+    return round(values[index], 2)
+
+
+def summarize(latencies_ms: list, errors: int, elapsed: float) -> dict:
+    """Throughput and latency stats for one scenario"""
+    values = sorted(latencies_ms)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': round(len(values) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(values) / len(values), 2) if values else None,
+        'p50_ms': percentile(values, 50),
+        'p95_ms': percentile(values, 95),
+        'p99_ms': percentile(values, 99),
+        'max_ms': round(values[-1], 2) if values else None,
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, calls: list, concurrency: int) -> dict:
+    """
+    Send requests with at most `concurrency` in flight
+    
+    Args:
+        calls: (method, url, kwargs, expected_status) per request
+    """
+    latencies = []
+    errors = 0
+    next_call = 0
+    
+    async def worker():
+        nonlocal errors, next_call
+        while next_call < len(calls):
+            method, url, kwargs, expected = calls[next_call]
+            next_call += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                ok = response.status_code == expected
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - started) * 1000)
+            if not ok:
+                errors += 1
+                
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def collect(client: httpx.AsyncClient, calls: list, concurrency: int) -> list:
+    """Send requests (not measured) and return the JSON bodies of the 2xx ones"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def call(method, url, kwargs):
+        async with semaphore:
+            response = await client.request(method, url, **kwargs)
+            return response.json() if response.is_success else None
+            
+    return await asyncio.gather(*(call(method, url, kwargs) for method, url, kwargs, _ in calls))
+
+
+async def run_load_test(client: httpx.AsyncClient, users: int, concurrency: int) -> dict:
+    """Run every scenario once and return their stats"""
+    run_id = uuid.uuid4().hex[:8]
+    emails = [f"bench-{run_id}-{i}@example.com" for i in range(users)]
+    results = {}
+    
+    # Accountants, so their tokens may call GET /{user_id} (users:read)
+    results['register'] = await run_scenario(client, [
+        ("POST", f"{API}/register", {'json': {
+            'email': email,
+            'password': PASSWORD,
+            'first_name': "Bench",
+            'last_name': f"User{i}",
+            'account_type': "accountant"
+        }}, 201)
+        for i, email in enumerate(emails)
+    ], concurrency)
+    
+    login_calls = [
+        ("POST", f"{API}/login", {'json': {'email': email, 'password': PASSWORD}}, 200)
+        for email in emails
+    ]
+    results['login_ok'] = await run_scenario(client, login_calls, concurrency)
+    
+    # Tokens and ids for the authenticated scenarios (not measured)
+    sessions = [body for body in await collect(client, login_calls, concurrency) if body]
+    if not sessions:
+        raise RuntimeError("No user could log in; check the register/login_ok errors")
+        
+    results['me'] = await run_scenario(client, [
+        ("GET", f"{API}/me", {'headers': {'Authorization': f"Bearer {session['access_token']}"}}, 200)
+        for session in sessions
+    ], concurrency)
+    
+    results['get_user'] = await run_scenario(client, [
+        (
+            "GET",
+            f"{API}/{sessions[(i + 1) % len(sessions)]['user']['user_id']}",
+            {'headers': {'Authorization': f"Bearer {session['access_token']}"}},
+            200
+        )
+        for i, session in enumerate(sessions)
+    ], concurrency)
+    
+    # Wrong passwords go last and stay under the lockout threshold per user
+    results['login_bad'] = await run_scenario(client, [
+        ("POST", f"{API}/login", {'json': {'email': email, 'password': WRONG_PASSWORD}}, 401)
+        for email in emails[:max(len(emails) // BAD_LOGINS_PER_USER, 1)] * BAD_LOGINS_PER_USER
+    ], concurrency)
+    
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> int:
+    if args.asgi:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://asgi"
+    else:
+        transport = None
+        base_url = args.base_url
+        
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, transport=transport, limits=limits, timeout=args.timeout
+    ) as client:
+        scenarios = await run_load_test(client, args.users, args.concurrency)
+        
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            'git_commit': _git_commit(),
+            'target': "asgi" if args.asgi else base_url,
+            'users': args.users,
+            'concurrency': args.concurrency,
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+        },
+        'scenarios': scenarios,
+    }
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            return print_comparison(json.load(f), report, args.threshold)
+    return 0
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float, metrics: dict = None, min_delta: float = 0) -> list:
+    """
+    Compare two reports metric by metric
+    
+    Args:
+        metrics: name → True if higher is better (default COMPARED_METRICS)
+        min_delta: Absolute changes up to this are never regressions (noise)
+        
+    Returns:
+        Rows of (scenario, metric, baseline, current, change, regressed);
+        change is relative (+0.12 = 12% higher)
+    """
+    rows = []
+    for scenario, base_stats in baseline['scenarios'].items():
+        current_stats = current['scenarios'].get(scenario)
+        if current_stats is None:
+            continue
+        for metric, higher_is_better in (metrics or COMPARED_METRICS).items():
+            before, after = base_stats.get(metric), current_stats.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            regressed = -change > threshold if higher_is_better else change > threshold
+            regressed = regressed and abs(after - before) > min_delta
+            rows.append((scenario, metric, before, after, change, regressed))
+        if current_stats.get('errors', 0) > base_stats.get('errors', 0):
+            rows.append((scenario, 'errors', base_stats.get('errors', 0), current_stats['errors'], None, True))
+    return rows
+
+
+def print_comparison(baseline: dict, current: dict, threshold: float, metrics: dict = None, min_delta: float = 0) -> int:
+    """Print a comparison table; returns 1 if anything regressed"""
+    rows = compare_reports(baseline, current, threshold, metrics, min_delta)
+    print(f"\n{'scenario':<12} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>8}", file=sys.stderr)
+    for scenario, metric, before, after, change, regressed in rows:
+        change_text = f"{change:+.1%}" if change is not None else ""
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{scenario:<12} {metric:<15} {before:>10} {after:>10} {change_text:>8}{flag}", file=sys.stderr)
+        
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"\n{regressions} regression(s) beyond {threshold:.0%}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test for the users API")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = commands.add_parser("run", help="Run the load test")
+    run_parser.add_argument("--base-url", default="http://localhost:8000")
+    run_parser.add_argument("--asgi", action="store_true", help="Call the app in-process instead of over HTTP")
+    run_parser.add_argument("--users", type=int, default=200, help="Users to register (requests per scenario)")
+    run_parser.add_argument("-c", "--concurrency", type=int, default=20, help="Requests in flight")
+    run_parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (seconds)")
+    run_parser.add_argument("-o", "--output", help="Write the JSON report here")
+    run_parser.add_argument("--baseline", help="Compare against this report afterwards")
+    run_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression")
+    
+    compare_parser = commands.add_parser("compare", help="Compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        return print_comparison(baseline, current, args.threshold)
+        
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
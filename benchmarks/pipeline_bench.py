@@ -0,0 +1,153 @@
+"""
+Receipt pipeline throughput: receipts per minute vs. OCR processes
+
+For each number of OCR processes, uploads a batch of receipts (in-process,
+through the API) and times one worker draining them. OCR and the model are
+the fake stand-ins: OCR burns --ocr-ms of CPU per receipt (so it scales
+with cores like the real engine), the model sleeps --llm-request-ms per
+request plus --llm-item-ms per receipt (so batching pays off like with a
+real model server).
+
+Usage:
+    python benchmarks/pipeline_bench.py
+    python benchmarks/pipeline_bench.py --receipts 200 --workers 1,2,4,8 --ocr-ms 200 -o pipeline.json
+
+Needs the database from DATABASE_URL. Use a database with no other queued
+receipt jobs: the worker processes whatever is due.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from load_test import PASSWORD, _git_commit
+
+RECEIPT_TEXT = """Shell Canada #{n}
+2025-03-14
+Regular 40.1L
+TOTAL {total}
+"""
+
+
+async def upload_receipts(client: httpx.AsyncClient, headers: dict, count: int) -> None:
+    for _ in range(count):
+        text = RECEIPT_TEXT.format(n=uuid.uuid4().hex[:8], total="65.50")
+        response = await client.post(
+            "/api/v1/receipts?filename=bench.pdf",
+            content=text.encode(),
+            headers={**headers, 'Content-Type': "application/pdf"}
+        )
+        if response.status_code != 202:
+            raise RuntimeError(f"Upload failed: {response.status_code} {response.text[:200]}")
+
+
+async def measure(workers: int, args, client: httpx.AsyncClient, headers: dict) -> dict:
+    from app.workers.llm import FakeExtractionModel
+    from app.workers.ocr import OcrPool
+    from app.workers.receipt_worker import ReceiptWorker
+    
+    await upload_receipts(client, headers, args.receipts)
+    
+    pool = OcrPool(engine="fake", max_workers=workers)
+    pool.fake_cpu_ms = args.ocr_ms
+    model = FakeExtractionModel(request_ms=args.llm_request_ms, item_ms=args.llm_item_ms)
+    worker = ReceiptWorker(ocr_pool=pool, model=model)
+    try:
+        await pool.warm_up()
+        started = time.perf_counter()
+        processed = await worker.run_once()
+        elapsed = time.perf_counter() - started
+    finally:
+        await worker.close()
+        
+    stats = worker.stats()
+    return {
+        'ocr_workers': workers,
+        'receipts': processed,
+        'seconds': round(elapsed, 2),
+        'receipts_per_minute': round(processed / elapsed * 60, 1),
+        'llm_requests': model.requests,
+        'avg_llm_batch': stats['llm']['avg_batch_size'],
+        'failed': stats['retried'] + stats['dead'],
+    }
+
+
+async def run(args) -> dict:
+    from app.main import app
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://asgi") as client:
+        email = f"pipeline-{uuid.uuid4().hex[:12]}@example.com"
+        response = await client.post("/api/v1/users/register", json={
+            'email': email,
+            'password': PASSWORD,
+            'first_name': "Pipeline",
+            'last_name': "Bench",
+            'account_type': "individual"
+        })
+        response.raise_for_status()
+        response = await client.post("/api/v1/users/login", json={'email': email, 'password': PASSWORD})
+        response.raise_for_status()
+        headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+        
+        results = []
+        for workers in args.workers:
+            result = await measure(workers, args, client, headers)
+            print(
+                f"  {workers:>2} OCR processes: {result['receipts_per_minute']:>8.1f} receipts/min "
+                f"({result['receipts']} in {result['seconds']}s, {result['llm_requests']} LLM requests)",
+                file=sys.stderr
+            )
+            results.append(result)
+            
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'ocr_ms': args.ocr_ms,
+            'llm_request_ms': args.llm_request_ms,
+            'llm_item_ms': args.llm_item_ms,
+        },
+        'results': results,
+    }
+
+
+def main(argv=None) -> int:
+    from app.core.cpus import available_cpus
+    
+    cpus = available_cpus()
+    default_workers = sorted({1, *(2 ** i for i in range(1, 8) if 2 ** i <= cpus), cpus})
+    
+    parser = argparse.ArgumentParser(description="Receipt pipeline throughput")
+    parser.add_argument("--receipts", type=int, default=100, help="Receipts per run")
+    parser.add_argument("--workers", type=lambda value: [int(v) for v in value.split(",")],
+                        default=default_workers, help="OCR process counts, e.g. 1,2,4")
+    parser.add_argument("--ocr-ms", type=int, default=100, help="CPU time per receipt in OCR")
+    parser.add_argument("--llm-request-ms", type=float, default=200, help="Fixed cost per model request")
+    parser.add_argument("--llm-item-ms", type=float, default=10, help="Cost per receipt in a model request")
+    parser.add_argument("-o", "--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+    
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Cold-start benchmark: import time, startup and first-request latency
+
+Each sample is a fresh Python process that imports the app, runs its
+lifespan (warm-up) and sends the first requests in-process. The report
+has the same shape as load_test.py's, so the same compare logic (and
+exit code) applies.
+
+Usage:
+    python benchmarks/startup_bench.py run -n 5 -o startup.json
+    
+    # Another checkout of the repo (e.g. the base branch in CI)
+    python benchmarks/startup_bench.py run --root ../base -o baseline.json
+    
+    python benchmarks/startup_bench.py compare baseline.json startup.json --threshold 0.25
+
+Needs the database from DATABASE_URL (the first requests register and
+log in a user).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from load_test import API, PASSWORD, summarize, print_comparison, _git_commit
+
+# Measured per process, in order; "ready" = import + startup + first_health
+STEPS = ("import", "startup", "first_health", "ready", "first_register", "first_login", "first_me")
+
+# Few samples per run: compare medians only, and ignore changes of a few ms
+COMPARED_METRICS = {'p50_ms': False}
+MIN_DELTA_MS = 10
+
+
+async def measure_cold_start() -> dict:
+    """Timings (ms) of one cold start, in this process"""
+    timings = {}
+    started = time.perf_counter()
+    import app.main as main
+    timings['import'] = (time.perf_counter() - started) * 1000
+    
+    import httpx
+    # Older trees have no factory; the module-level app works everywhere
+    app = main.app
+    
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        timings['startup'] = (time.perf_counter() - started) * 1000
+        
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://asgi") as client:
+            async def timed(step, method, url, expected, **kwargs):
+                started = time.perf_counter()
+                response = await client.request(method, url, **kwargs)
+                timings[step] = (time.perf_counter() - started) * 1000
+                if response.status_code != expected:
+                    raise RuntimeError(f"{step}: {response.status_code} {response.text[:200]}")
+                return response.json()
+                
+            email = f"startup-{uuid.uuid4().hex[:12]}@example.com"
+            await timed('first_health', "GET", "/health", 200)
+            timings['ready'] = timings['import'] + timings['startup'] + timings['first_health']
+            await timed('first_register', "POST", f"{API}/register", 201, json={
+                'email': email,
+                'password': PASSWORD,
+                'first_name': "Startup",
+                'last_name': "Bench",
+                'account_type': "individual"
+            })
+            session = await timed('first_login', "POST", f"{API}/login", 200, json={
+                'email': email, 'password': PASSWORD
+            })
+            await timed('first_me', "GET", f"{API}/me", 200, headers={
+                'Authorization': f"Bearer {session['access_token']}"
+            })
+    return timings
+
+
+def run_sample(root: str) -> dict:
+    """One cold start in a fresh interpreter (cwd = root)"""
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(root))
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "sample"],
+        cwd=root, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Cold start failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(args) -> int:
+    samples = []
+    for i in range(args.samples):
+        sample = run_sample(args.root)
+        print(f"  sample {i + 1}: " + ", ".join(f"{k}={v:.0f}ms" for k, v in sample.items()), file=sys.stderr)
+        samples.append(sample)
+        
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            'git_commit': _git_commit(),
+            'target': os.path.abspath(args.root),
+            'samples': args.samples,
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+        },
+        'scenarios': {
+            step: summarize([sample[step] for sample in samples if step in sample], 0, 0)
+            for step in STEPS
+        },
+    }
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            return print_comparison(json.load(f), report, args.threshold, COMPARED_METRICS, MIN_DELTA_MS)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = commands.add_parser("run", help="Measure cold starts")
+    run_parser.add_argument("--root", default=".", help="Repository checkout to measure")
+    run_parser.add_argument("-n", "--samples", type=int, default=5, help="Cold starts (processes)")
+    run_parser.add_argument("-o", "--output", help="Write the JSON report here")
+    run_parser.add_argument("--baseline", help="Compare against this report afterwards")
+    run_parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression")
+    
+    compare_parser = commands.add_parser("compare", help="Compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression")
+    
+    commands.add_parser("sample", help=argparse.SUPPRESS)
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "sample":
+        print(json.dumps(asyncio.run(measure_cold_start())))
+        return 0
+        
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        return print_comparison(baseline, current, args.threshold, COMPARED_METRICS, MIN_DELTA_MS)
+        
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+Tax rules engine throughput: line items per second
+
+Evaluates --items random line items (all provinces and categories, dates
+from 2012 on, half of them for GST/HST registrants) with the compiled,
+vectorized engine (app/tax/engine.py) and with a per-item Python version
+of the same rules (if/else per line item, the way it would be written
+without the lookup tables), checks that both agree, and reports both.
+
+With --db it also times TaxService.recompute (what
+"python -m app.cli.recompute_taxes" runs) on --items line items of one
+throwaway client: read, evaluate and write back.
+
+Usage:
+    python benchmarks/tax_rules_bench.py
+    python benchmarks/tax_rules_bench.py --items 100000 --db -o tax_rules.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from load_test import PASSWORD, _git_commit
+
+
+def make_items(count: int, seed: int = 42) -> dict:
+    """Random line items: cents, category names, province codes, dates, registration"""
+    from app.core.categories import EXPENSE_CATEGORIES
+    from app.tax import rules
+    
+    rng = np.random.default_rng(seed)
+    provinces = np.array(sorted(rules.PROVINCES) + [rules.UNKNOWN_PROVINCE], dtype=object)
+    first_day = np.datetime64('2012-01-01')
+    return {
+        'amounts': rng.integers(-5_000, 500_000, count),
+        'categories': np.array(EXPENSE_CATEGORIES, dtype=object)[rng.integers(0, len(EXPENSE_CATEGORIES), count)],
+        'provinces': provinces[rng.integers(0, len(provinces), count)],
+        'dates': first_day + rng.integers(0, 365 * 14, count).astype('timedelta64[D]'),
+        'registered': rng.random(count) < 0.5,
+    }
+
+
+def _round(value: float) -> int:
+    return int(math.copysign(math.floor(abs(value) + 0.5), value))
+
+
+def evaluate_per_item(items: dict) -> dict:
+    """The same rules, one line item at a time"""
+    from app.tax import rules
+    
+    rates = {}
+    for province, effective, gst, hst, pst in sorted(rules.TAX_RATES, key=lambda row: row[1]):
+        rates.setdefault(province, []).append((effective, gst, hst, pst))
+        
+    result = {name: [] for name in ('subtotal', 'gst', 'hst', 'pst', 'itc', 'deductible')}
+    for amount, category, province, day, registered in zip(
+        items['amounts'].tolist(), items['categories'], items['provinces'],
+        items['dates'].tolist(), items['registered'].tolist()
+    ):
+        history = rates.get(province, rates[rules.UNKNOWN_PROVINCE])
+        _, gst_rate, hst_rate, pst_rate = history[0]
+        for effective, *row in history:
+            if effective <= day:
+                gst_rate, hst_rate, pst_rate = row
+        taxable, pst_applies, itc_share, deductible_share = rules.CATEGORY_RULES.get(
+            category, rules.CATEGORY_RULES["Other"]
+        )
+        pst_applies = rules.PST_OVERRIDES.get((category, province), pst_applies)
+        if not taxable:
+            gst_rate = hst_rate = 0.0
+        if not pst_applies:
+            pst_rate = 0.0
+            
+        pre_tax = amount / (1.0 + gst_rate + hst_rate + pst_rate)
+        gst, hst, pst = _round(pre_tax * gst_rate), _round(pre_tax * hst_rate), _round(pre_tax * pst_rate)
+        itc = _round((gst + hst) * itc_share) if registered else 0
+        result['subtotal'].append(amount - gst - hst - pst)
+        result['gst'].append(gst)
+        result['hst'].append(hst)
+        result['pst'].append(pst)
+        result['itc'].append(itc)
+        result['deductible'].append(_round((amount - itc) * deductible_share))
+    return {name: np.array(values, dtype=np.int64) for name, values in result.items()}
+
+
+def best_of(repeat: int, function, *args):
+    """(fastest time in seconds, last result)"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def measure_engine(args) -> dict:
+    from app.tax import TaxRulesEngine
+    
+    items = make_items(args.items)
+    
+    compile_seconds, engine = best_of(1, TaxRulesEngine)
+    vectorized, result = best_of(
+        args.repeat, engine.evaluate,
+        items['amounts'], items['categories'], items['provinces'], items['dates'], items['registered']
+    )
+    # Categories and provinces already coded (what a caller holding codes pays)
+    categories = engine.category_codes(items['categories'])
+    provinces = engine.province_codes(items['provinces'])
+    coded, _ = best_of(
+        args.repeat, engine.evaluate,
+        items['amounts'], categories, provinces, items['dates'], items['registered']
+    )
+    per_item, expected = best_of(1, evaluate_per_item, items)
+    
+    mismatches = {name: int((result[name] != expected[name]).sum()) for name in result}
+    if any(mismatches.values()):
+        raise RuntimeError(f"Vectorized and per-item results differ: {mismatches}")
+        
+    return {
+        'line_items': args.items,
+        'compile_ms': round(compile_seconds * 1000, 2),
+        'vectorized_ms': round(vectorized * 1000, 2),
+        'vectorized_items_per_second': round(args.items / vectorized),
+        'vectorized_coded_ms': round(coded * 1000, 2),
+        'per_item_ms': round(per_item * 1000, 2),
+        'per_item_items_per_second': round(args.items / per_item),
+        'speedup': round(per_item / vectorized, 1),
+    }
+
+
+async def measure_database(args) -> dict:
+    """Recompute one client's line items (registers a client, inserts its items)"""
+    import httpx
+    from sqlalchemy import insert, update, delete
+    
+    from app.main import app
+    from app.db.models import Receipt, ReceiptLineItem, UserProfile, User
+    from app.db.session import get_async_db_session
+    from app.services.tax_service import TaxService
+    from app.tax import from_cents
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://asgi") as client:
+        email = f"taxbench-{uuid.uuid4().hex[:12]}@example.com"
+        response = await client.post("/api/v1/users/register", json={
+            'email': email,
+            'password': PASSWORD,
+            'first_name': "Tax",
+            'last_name': "Bench",
+            'account_type': "business"
+        })
+        response.raise_for_status()
+        user_id = uuid.UUID(response.json()['user']['user_id'])
+        
+    items = make_items(args.items, seed=7)
+    receipt_id = uuid.uuid4()
+    async with get_async_db_session() as db:
+        await db.execute(
+            update(UserProfile).where(UserProfile.user_id == user_id).values(province="ON", hst_number="123456789RT0001")
+        )
+        await db.execute(insert(Receipt).values(
+            receipt_id=receipt_id, user_id=user_id, status='APPROVED', storage_key="bench/none"
+        ))
+        for start in range(0, args.items, 10000):
+            await db.execute(insert(ReceiptLineItem), [
+                {
+                    'receipt_id': receipt_id,
+                    'user_id': user_id,
+                    'line_number': start + i + 1,
+                    'category': items['categories'][start + i],
+                    'amount': from_cents(items['amounts'][start + i]),
+                    'item_date': items['dates'][start + i].item(),
+                    'province': items['provinces'][start + i],
+                }
+                for i in range(min(10000, args.items - start))
+            ])
+        await db.commit()
+        
+    try:
+        async with get_async_db_session() as db:
+            started = time.perf_counter()
+            report = await TaxService.recompute(db, user_id=user_id, stale_only=False)
+            elapsed = time.perf_counter() - started
+    finally:
+        async with get_async_db_session() as db:
+            await db.execute(delete(User).where(User.user_id == user_id))  # Cascades
+            await db.commit()
+            
+    return {
+        'line_items': report['line_items'],
+        'chunks': report['chunks'],
+        'seconds': round(elapsed, 2),
+        'items_per_second': round(report['line_items'] / elapsed),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tax rules engine throughput")
+    parser.add_argument("--items", type=int, default=100_000, help="Line items")
+    parser.add_argument("--repeat", type=int, default=5, help="Vectorized runs (fastest counts)")
+    parser.add_argument("--db", action="store_true", help="Also time a recompute in the database (DATABASE_URL)")
+    parser.add_argument("-o", "--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+    
+    engine = measure_engine(args)
+    print(
+        f"  vectorized: {engine['vectorized_ms']:>9.1f} ms ({engine['vectorized_items_per_second']:,} items/s)\n"
+        f"  per item:   {engine['per_item_ms']:>9.1f} ms ({engine['per_item_items_per_second']:,} items/s)\n"
+        f"  speedup:    {engine['speedup']}x",
+        file=sys.stderr
+    )
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'cpu_count': os.cpu_count(),
+        },
+        'engine': engine,
+    }
+    if args.db:
+        report['recompute'] = asyncio.run(measure_database(args))
+        print(
+            f"  recompute:  {report['recompute']['seconds']:>9.2f} s  "
+            f"({report['recompute']['items_per_second']:,} items/s, read + evaluate + write)",
+            file=sys.stderr
+        )
+        
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
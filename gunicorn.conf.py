@@ -0,0 +1,106 @@
+"""
+Gunicorn configuration for production (./run.sh prod)
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+What is this?
+─────────────
+Gunicorn is the pre-fork process manager; each worker runs the ASGI app
+with uvicorn's event loop (UvicornWorker).
+
+  - The app is imported once in the master (preload_app) and the workers
+    are forked from it, so the imported code and data are shared
+    copy-on-write instead of loaded once per worker.
+  - After the fork each worker gets fresh database pools (post_fork) and
+    runs the app lifespan itself (connections, password hashing processes).
+  - Workers are recycled after MAX_REQUESTS requests (with jitter, so they
+    don't all restart at once) to bound memory growth.
+  - On SIGTERM/SIGHUP a worker stops accepting, finishes its in-flight
+    requests for up to GRACEFUL_TIMEOUT seconds, then exits.
+
+Environment variables (all optional):
+    WEB_CONCURRENCY   Worker processes (default: one per available CPU; more
+                      than one requires CACHE_BACKEND=redis when DEBUG is off)
+    BIND              Listen address (default 0.0.0.0:8000)
+    MAX_REQUESTS      Requests per worker before it is recycled (0 = never)
+    GRACEFUL_TIMEOUT  Seconds to drain in-flight requests on shutdown
+    TIMEOUT           Seconds a silent worker may take before it is killed
+    FORWARDED_ALLOW_IPS
+                      Comma-separated addresses of the reverse proxies (or
+                      "*" when only the proxy can reach the app) whose
+                      X-Forwarded-For header is trusted. Default 127.0.0.1.
+                      Behind a proxy on another address this must be set,
+                      or every request appears to come from the proxy and
+                      the per-IP login limit becomes one global limit.
+
+Rolling restarts: with preload_app the code is loaded by the master, so
+SIGHUP only restarts the workers (new settings, same code). To deploy new
+code without dropping connections, start a new master with SIGUSR2, then
+stop the old one's workers with SIGWINCH and the old master with SIGQUIT.
+"""
+
+import gc
+import os
+import sys
+
+# The app's package, for app.core.cpus (no settings needed to import it)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.cpus import available_cpus
+
+# Server socket
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+backlog = 2048
+
+# Client address: trust X-Forwarded-For only from these proxies
+# (request.client.host, used by the per-IP login limit)
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Workers
+# ───────
+# Async workers: one per CPU is enough to keep every core busy
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY") or available_cpus())
+os.environ["WEB_CONCURRENCY"] = str(workers)  # Settings check what needs a shared backend
+
+# Each worker has its own password hashing pool; split the CPUs between
+# them instead of giving every worker one process per core
+os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(available_cpus() // workers, 1)))
+
+# Load the app in the master, before forking (copy-on-write sharing)
+preload_app = True
+
+# Recycle workers to bound memory growth
+max_requests = int(os.environ.get("MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+# Graceful shutdown / restart
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.environ.get("TIMEOUT", "60"))
+keepalive = 5
+
+# Logging (to stdout/stderr)
+accesslog = None  # Requests are logged by RequestTimingMiddleware ("app.request")
+errorlog = "-"
+
+# Hooks
+# ─────
+
+def pre_fork(server, worker):
+    """
+    Move everything the master allocated so far out of the garbage
+    collector's reach: collections in a worker would otherwise touch (and
+    so copy) the shared pages
+    """
+    gc.freeze()
+
+def post_fork(server, worker):
+    """In the new worker: never reuse the master's database connections"""
+    from app.db.session import reset_engines_after_fork
+    reset_engines_after_fork()
+
+def child_exit(server, worker):
+    """In the master, after a worker exits: drop its live gauge values"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
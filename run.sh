@@ -7,13 +7,21 @@ case "$1" in
     ;;
   prod)
     echo "Starting production server..."
-    uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers 4
+    # Workers share metrics through this directory (wiped on every start)
+    export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/taxflow-metrics}"
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+    # Worker count, recycling and graceful shutdown: see gunicorn.conf.py
+    exec gunicorn -c gunicorn.conf.py app.main:app
+    ;;
+  worker)
+    echo "Starting receipt worker..."
+    exec python -m app.cli.receipt_worker
     ;;
   test)
     echo "Running tests..."
     pytest
     ;;
   *)
-    echo "Usage: ./run.sh {dev|prod|test}"
+    echo "Usage: ./run.sh {dev|prod|worker|test}"
     ;;
 esac
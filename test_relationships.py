@@ -1,5 +1,6 @@
 from app.db.session import get_db_session
 from app.db.models import User, UserProfile, UserRole
+from app.services.user_service import USER_LOAD_PROFILES
 
 db = get_db_session()
 
@@ -42,9 +43,14 @@ try:
     print(f"✓ Profile created: {user.profile.business_name}")
     print(f"✓ Role assigned: {user.roles[0].role_name}")
     
-    # Query back with relationships
+    # Query back with relationships (eager-loaded: no extra SELECT per attribute)
     print("\n✓ Querying user with relationships...")
-    found = db.query(User).filter(User.email == "alice@example.com").first()
+    found = (
+        db.query(User)
+        .options(*USER_LOAD_PROFILES['full'])
+        .filter(User.email == "alice@example.com")
+        .first()
+    )
     
     print(f"  User: {found.email}")
     print(f"  Business: {found.profile.business_name}")
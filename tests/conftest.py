@@ -0,0 +1,75 @@
+"""
+Shared fixtures
+
+Tests that use the API or the database need DATABASE_URL pointing at a
+migrated database (alembic upgrade head), as in CI.
+"""
+
+import os
+
+# Cheap password hashing, in a thread; no per-IP login limit (every
+# request comes from the same test client); lazy relationship loads raise
+# (N+1 guard, app/db/guards.py)
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("LOGIN_RATE_LIMIT_PER_IP", "0")
+os.environ.setdefault("DB_RAISE_ON_LAZY_LOAD", "true")
+
+import uuid
+
+import httpx
+import pytest
+
+PASSWORD = "TestPass123"
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+async def client():
+    """API client (in-process ASGI transport)"""
+    from app.main import app
+    from app.db.session import dispose_engines
+    
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    # Pooled connections belong to this test's event loop
+    await dispose_engines()
+
+async def register(client, account_type: str = "business") -> dict:
+    """Register and log in a new user: {'user_id', 'email', 'headers'}"""
+    email = f"test-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post("/api/v1/users/register", json={
+        'email': email,
+        'password': PASSWORD,
+        'first_name': "Test",
+        'last_name': "User",
+        'account_type': account_type
+    })
+    assert response.status_code == 201, response.text
+    user_id = response.json()['user']['user_id']
+    
+    response = await client.post("/api/v1/users/login", json={'email': email, 'password': PASSWORD})
+    assert response.status_code == 200, response.text
+    return {
+        'user_id': user_id,
+        'email': email,
+        'headers': {'Authorization': f"Bearer {response.json()['access_token']}"}
+    }
+
+@pytest.fixture
+async def user(client):
+    """A freshly registered business client: {'user_id', 'email', 'headers'}"""
+    return await register(client)
+
+@pytest.fixture
+async def admin(user):
+    """The user, with the admin and accountant roles"""
+    from app.db.session import get_async_db_session
+    from app.services.permission_service import PermissionService
+    
+    async with get_async_db_session() as db:
+        await PermissionService.assign_role(db, user['user_id'], "admin")
+        await PermissionService.assign_role(db, user['user_id'], "accountant")
+    return user
@@ -0,0 +1,24 @@
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+
+# A production configuration that passes every check
+PRODUCTION = {
+    'DEBUG': False,
+    'JWT_SECRET_KEY': "not-the-development-key",
+    'LOGIN_THROTTLE_BACKEND': "redis",
+    'CACHE_BACKEND': "redis",
+    'WEB_CONCURRENCY': 4,
+}
+
+def test_production_settings():
+    assert Settings(**PRODUCTION).WEB_CONCURRENCY == 4
+
+@pytest.mark.parametrize("backend", ["memory", "local", "none"])
+def test_per_process_cache_with_several_workers(backend):
+    with pytest.raises(ValidationError, match="CACHE_BACKEND=redis"):
+        Settings(**{**PRODUCTION, 'CACHE_BACKEND': backend})
+    # Fine with one worker, or in development
+    Settings(**{**PRODUCTION, 'CACHE_BACKEND': backend, 'WEB_CONCURRENCY': 1})
+    Settings(**{**PRODUCTION, 'CACHE_BACKEND': backend, 'DEBUG': True})
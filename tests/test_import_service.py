@@ -0,0 +1,50 @@
+import pytest
+
+from app.services.import_service import iter_records
+
+pytestmark = pytest.mark.anyio
+
+async def records(text: str, fmt: str = "csv", chunk_size: int = 7) -> list:
+    """iter_records over text sent in small chunks (records and lines split across them)"""
+    data = text.encode()
+    
+    async def chunks():
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+    return [record async for record in iter_records(chunks(), fmt)]
+
+HEADER = "email,password,first_name,last_name,account_type\n"
+
+async def test_quote_inside_a_value():
+    rows = await records(
+        HEADER
+        + 'sean@example.com,Passw0rd123,Sean,O"Brien,individual\n'
+        + "ann@example.com,Passw0rd123,Ann,Lee,business\n"
+    )
+    
+    assert [(number, record['last_name'], error) for number, record, error in rows] == [
+        (1, 'O"Brien', None),
+        (2, "Lee", None),
+    ]
+
+async def test_quoted_fields_with_newlines_and_escaped_quotes():
+    rows = await records(
+        HEADER
+        + 'bo@example.com,Passw0rd123,"Bo ""B""\nJr.",Smith,individual\r\n'
+        + 'al@example.com,Passw0rd123,Al,"Grey, ""Big""",individual\r\n'
+    )
+    
+    assert [record['first_name'] for _, record, _ in rows] == ['Bo "B"\nJr.', "Al"]
+    assert rows[1][1]['last_name'] == 'Grey, "Big"'
+
+async def test_unterminated_quoted_field():
+    rows = await records(HEADER + 'al@example.com,Passw0rd123,"Al,Grey,individual\n')
+    
+    assert rows == [(1, None, "Unterminated quoted field")]
+
+async def test_ndjson():
+    rows = await records('{"email": "a@example.com"}\n\nnot json\n[1]\n', fmt="ndjson")
+    
+    assert rows[0] == (1, {'email': "a@example.com"}, None)
+    assert rows[1][2].startswith("Invalid JSON")
+    assert rows[2] == (3, None, "Each line must be a JSON object")
@@ -0,0 +1,71 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.db.models import User
+from app.db.session import get_async_db_session
+from app.services.user_service import MAX_FAILED_LOGIN_ATTEMPTS
+from app.utils.security import password_hasher
+from tests.conftest import PASSWORD
+
+pytestmark = pytest.mark.anyio
+
+async def login(client, email: str, password: str):
+    return await client.post("/api/v1/users/login", json={'email': email, 'password': password})
+
+async def load_user(user_id) -> User:
+    async with get_async_db_session() as db:
+        return (await db.execute(select(User).where(User.user_id == uuid.UUID(user_id)))).scalar_one()
+
+async def test_login_records_last_login(client, user):
+    response = await login(client, user['email'], PASSWORD)
+    
+    assert response.status_code == 200, response.text
+    assert response.json()['user']['user_id'] == user['user_id']
+    assert (await load_user(user['user_id'])).last_login_at is not None
+
+async def test_lockout_after_failed_attempts(client, user):
+    for _ in range(MAX_FAILED_LOGIN_ATTEMPTS):
+        assert (await login(client, user['email'], "WrongPass123")).status_code == 401
+        
+    # Locked: the right password is refused too
+    assert (await login(client, user['email'], PASSWORD)).status_code == 401
+    
+    locked = await load_user(user['user_id'])
+    assert locked.is_locked
+    assert locked.failed_login_attempts == MAX_FAILED_LOGIN_ATTEMPTS
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Fresh rate limit counters; tests set the limits they exercise"""
+    monkeypatch.setattr(rate_limit, "_store", None)
+    return monkeypatch
+
+async def assert_throttled_without_hashing(client, email: str):
+    completed = password_hasher.stats()['completed']
+    response = await login(client, email, PASSWORD)
+    
+    assert response.status_code == 429, response.text
+    assert 1 <= int(response.headers['Retry-After']) <= settings.LOGIN_RATE_WINDOW_SECONDS
+    assert password_hasher.stats()['completed'] == completed
+
+async def test_ip_rate_limit(client, user, limits):
+    limits.setattr(settings, "LOGIN_RATE_LIMIT_PER_IP", 3)
+    for attempt in range(3):
+        # Different emails: only the per-IP limit adds up
+        assert (await login(client, f"nobody-{uuid.uuid4().hex[:12]}@example.com", PASSWORD)).status_code == 401
+        
+    # Over the limit: refused before any password hashing, right password or not
+    await assert_throttled_without_hashing(client, user['email'])
+
+async def test_email_rate_limit(client, user, limits):
+    limits.setattr(settings, "LOGIN_RATE_LIMIT_PER_EMAIL", 2)
+    for attempt in range(2):
+        assert (await login(client, user['email'], PASSWORD)).status_code == 200
+        
+    await assert_throttled_without_hashing(client, user['email'])
+    # Other accounts from the same client are unaffected
+    assert (await login(client, f"nobody-{uuid.uuid4().hex[:12]}@example.com", PASSWORD)).status_code == 401
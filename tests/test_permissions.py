@@ -0,0 +1,95 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.permissions import Permission, ROLE_PERMISSIONS, compile_permissions, permission_bit
+from app.services import permission_service
+from app.services.permission_service import PermissionService, permission_cache
+from tests.conftest import register
+
+pytestmark = pytest.mark.anyio
+
+def test_role_bitsets():
+    assert permission_bit("users:read") == Permission.USERS_READ
+    assert not compile_permissions(["client"]) & Permission.USERS_READ
+    assert compile_permissions(["client", "accountant"]) == ROLE_PERMISSIONS['client'] | ROLE_PERMISSIONS['accountant']
+    assert compile_permissions(["no-such-role"]) == 0
+    with pytest.raises(ValueError):
+        permission_bit("users:reed")
+
+async def read_self(client, user, **headers) -> int:
+    """GET /users/{id} (needs users:read, which clients don't have)"""
+    response = await client.get(f"/api/v1/users/{user['user_id']}", headers={**user['headers'], **headers})
+    return response.status_code
+
+async def test_assign_and_revoke(client, admin):
+    user = await register(client)
+    assert await read_self(client, user) == 403
+    
+    response = await client.post(
+        f"/api/v1/users/{user['user_id']}/roles", json={'role_name': "accountant"}, headers=admin['headers']
+    )
+    assert response.status_code == 201, response.text
+    assert await read_self(client, user) == 200
+    
+    response = await client.delete(f"/api/v1/users/{user['user_id']}/roles/accountant", headers=admin['headers'])
+    assert response.status_code == 200, response.text
+    assert await read_self(client, user) == 403
+
+async def test_revocation_reaches_other_workers(client, admin):
+    user = await register(client)
+    await client.post(f"/api/v1/users/{user['user_id']}/roles", json={'role_name': "accountant"}, headers=admin['headers'])
+    assert await read_self(client, user) == 200
+    compiled_at = time.time()
+    mask = permission_cache.get(user['user_id'])
+    
+    await client.delete(f"/api/v1/users/{user['user_id']}/roles/accountant", headers=admin['headers'])
+    
+    # Another worker's entry, compiled before the revocation, once it rereads the marker
+    permission_cache.set(user['user_id'], None, mask, compiled_at=compiled_at)
+    permission_service._changes_seen.pop(user['user_id'], None)
+    assert await read_self(client, user) == 403
+
+async def test_expired_role(client, admin):
+    user = await register(client)
+    response = await client.post(
+        f"/api/v1/users/{user['user_id']}/roles",
+        json={'role_name': "accountant", 'expires_at': (datetime.utcnow() - timedelta(minutes=1)).isoformat()},
+        headers=admin['headers']
+    )
+    assert response.status_code == 201, response.text
+    
+    assert await read_self(client, user) == 403
+
+async def test_organization_scope(client, admin):
+    user = await register(client)
+    organization_id = str(uuid.uuid4())
+    response = await client.post(
+        f"/api/v1/users/{user['user_id']}/roles",
+        json={'role_name': "accountant", 'organization_id': organization_id},
+        headers=admin['headers']
+    )
+    assert response.status_code == 201, response.text
+    
+    assert await read_self(client, user) == 403
+    assert await read_self(client, user, **{'X-Organization-ID': str(uuid.uuid4())}) == 403
+    assert await read_self(client, user, **{'X-Organization-ID': organization_id}) == 200
+    
+    response = await client.delete(
+        f"/api/v1/users/{user['user_id']}/roles/accountant?organization_id={organization_id}",
+        headers=admin['headers']
+    )
+    assert response.status_code == 200, response.text
+    assert await read_self(client, user, **{'X-Organization-ID': organization_id}) == 403
+
+async def test_malformed_ids(client, admin):
+    assert await read_self(client, admin, **{'X-Organization-ID': "nope"}) == 422
+    
+    for url in (
+        "/api/v1/users/not-a-uuid/roles/admin",
+        f"/api/v1/users/{admin['user_id']}/roles/admin?organization_id=nope",
+    ):
+        response = await client.delete(url, headers=admin['headers'])
+        assert response.status_code == 422, url
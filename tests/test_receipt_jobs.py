@@ -0,0 +1,55 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.models import ReceiptJob
+from app.db.session import get_async_db_session
+from app.services.receipt_jobs import ReceiptJobQueue
+from tests.test_receipt_summaries import assert_matches_rebuild, run_worker, upload
+
+pytestmark = pytest.mark.anyio
+
+async def crash(job_id) -> ReceiptJob:
+    """Claim a job as a worker that then dies, and let its lock expire"""
+    async with get_async_db_session() as db:
+        claimed = await ReceiptJobQueue.claim(db, "crashed-worker", limit=100)
+        assert job_id in [job.job_id for job in claimed]
+        await db.execute(
+            update(ReceiptJob)
+            .where(ReceiptJob.job_id == job_id)
+            .values(locked_at=datetime.utcnow() - timedelta(seconds=settings.RECEIPT_JOB_LOCK_TIMEOUT_SECONDS + 1))
+        )
+        await db.commit()
+        assert await ReceiptJobQueue.requeue_stale(db) == 1
+        
+    async with get_async_db_session() as db:
+        return (await db.execute(select(ReceiptJob).where(ReceiptJob.job_id == job_id))).scalar_one()
+
+async def test_stale_job_is_dead_lettered_after_max_attempts(client, user, monkeypatch):
+    monkeypatch.setattr(settings, "RECEIPT_JOB_MAX_ATTEMPTS", 3)
+    await run_worker()  # Nothing else due
+    receipt_id = await upload(client, user, "Staples office\n2025-04-01\nTOTAL 113.00")
+    async with get_async_db_session() as db:
+        job_id = (await db.execute(
+            select(ReceiptJob.job_id).where(ReceiptJob.receipt_id == uuid.UUID(receipt_id))
+        )).scalar_one()
+        
+    for attempt in range(1, settings.RECEIPT_JOB_MAX_ATTEMPTS):
+        job = await crash(job_id)
+        assert (job.status, job.attempts, job.locked_by) == ('queued', attempt, None)
+        assert job.run_after > datetime.utcnow()  # Backed off, not claimed again right away
+        async with get_async_db_session() as db:
+            await db.execute(update(ReceiptJob).where(ReceiptJob.job_id == job_id).values(run_after=datetime.utcnow()))
+            await db.commit()
+            
+    job = await crash(job_id)
+    assert (job.status, job.attempts) == ('dead', settings.RECEIPT_JOB_MAX_ATTEMPTS)
+    assert job.finished_at is not None
+    
+    response = await client.get(f"/api/v1/receipts/{receipt_id}", headers=user['headers'])
+    assert response.json()['status'] == 'FAILED'
+    assert await assert_matches_rebuild(user['user_id']) == []
+    assert await run_worker() == 0  # Not claimed again
@@ -0,0 +1,53 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.core.cpus import available_cpus
+from app.db.models import ReceiptJob, ReceiptLineItem
+from app.db.session import get_async_db_session
+from app.workers.ocr import OcrPool
+from tests.test_receipt_summaries import run_worker, upload
+
+pytestmark = pytest.mark.anyio
+
+PIPELINE_TIMINGS = {
+    'queued_ms', 'ocr_queue_ms', 'fetch_ms', 'ocr_ms', 'llm_queue_ms', 'llm_batch_wait_ms',
+    'llm_ms', 'llm_batch_size', 'save_queue_ms', 'save_ms', 'total_ms',
+}
+
+def test_ocr_pool_defaults_to_available_cpus():
+    assert OcrPool(engine="fake").max_workers == available_cpus() >= 1
+
+async def test_claim_ocr_llm_save(client, user):
+    receipt_ids = [
+        await upload(client, user, "Staples office\n2025-04-01\nTOTAL 113.00"),
+        await upload(client, user, "Tim Hortons cafe\n2025-03-14\nTOTAL 11.30"),
+        await upload(client, user, "illegible"),
+    ]
+    
+    assert await run_worker() >= len(receipt_ids)
+    
+    receipts = {}
+    for receipt_id in receipt_ids:
+        response = await client.get(f"/api/v1/receipts/{receipt_id}", headers=user['headers'])
+        receipts[receipt_id] = response.json()
+    staples, cafe, illegible = (receipts[receipt_id] for receipt_id in receipt_ids)
+    
+    assert (staples['status'], staples['category'], staples['total_amount']) == ('APPROVED', "Office Supplies", "113.00")
+    assert (cafe['status'], cafe['receipt_date']) == ('APPROVED', "2025-03-14")
+    assert illegible['status'] == 'REVIEW'
+    
+    async with get_async_db_session() as db:
+        jobs = (await db.execute(
+            select(ReceiptJob).where(ReceiptJob.receipt_id.in_([uuid.UUID(r) for r in receipt_ids]))
+        )).scalars().all()
+        line_items = (await db.execute(
+            select(ReceiptLineItem).where(ReceiptLineItem.receipt_id == uuid.UUID(receipt_ids[0]))
+        )).scalars().all()
+        
+    assert [job.status for job in jobs] == ['succeeded'] * 3
+    for job in jobs:
+        assert set(job.timings) == PIPELINE_TIMINGS
+        assert job.locked_by is None and job.attempts == 1
+    assert [(item.category, str(item.amount)) for item in line_items] == [("Office Supplies", "113.00")]
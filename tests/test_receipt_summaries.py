@@ -0,0 +1,109 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models import ReceiptSummary
+from app.db.session import get_async_db_session
+from app.services.receipt_jobs import ReceiptJobQueue
+from app.services.summary_service import SummaryService
+from app.workers.llm import FakeExtractionModel
+from app.workers.ocr import OcrPool
+from app.workers.receipt_worker import ReceiptWorker
+
+pytestmark = pytest.mark.anyio
+
+class BrokenModel(FakeExtractionModel):
+    """A model server that fails every request"""
+    
+    async def extract_batch(self, texts):
+        raise RuntimeError("model unavailable")
+
+async def run_worker(model=None) -> int:
+    worker = ReceiptWorker(ocr_pool=OcrPool(engine="fake", max_workers=0), model=model or FakeExtractionModel())
+    try:
+        return await worker.run_once()
+    finally:
+        await worker.close()
+
+async def upload(client, user, text: str) -> str:
+    response = await client.post(
+        "/api/v1/receipts?filename=receipt.pdf",
+        content=f"{text}\n{uuid.uuid4().hex}".encode(),
+        headers={**user['headers'], 'Content-Type': "application/pdf"}
+    )
+    assert response.status_code == 202, response.text
+    return response.json()['receipt_id']
+
+async def summaries(user_id) -> list:
+    async with get_async_db_session() as db:
+        result = await db.execute(
+            select(
+                ReceiptSummary.fiscal_year,
+                ReceiptSummary.month,
+                ReceiptSummary.category,
+                ReceiptSummary.receipt_count,
+                ReceiptSummary.review_count,
+                ReceiptSummary.total_amount
+            )
+            .where(ReceiptSummary.user_id == uuid.UUID(user_id))
+            .order_by(ReceiptSummary.fiscal_year, ReceiptSummary.month, ReceiptSummary.category)
+        )
+        return [tuple(row) for row in result]
+
+async def assert_matches_rebuild(user_id) -> list:
+    """The incrementally kept rows are what a rebuild from the receipts gives"""
+    kept = await summaries(user_id)
+    async with get_async_db_session() as db:
+        await SummaryService.rebuild(db, [uuid.UUID(user_id)])
+    assert kept == await summaries(user_id)
+    return kept
+
+async def dead_letter(client, user, text: str, monkeypatch) -> str:
+    """Upload a receipt whose only processing attempt fails (receipt FAILED, job dead)"""
+    await run_worker()  # Nothing else due, so only this receipt's job fails
+    receipt_id = await upload(client, user, text)
+    monkeypatch.setattr(settings, "RECEIPT_JOB_MAX_ATTEMPTS", 1)
+    await run_worker(BrokenModel())
+    monkeypatch.undo()
+    
+    response = await client.get(f"/api/v1/receipts/{receipt_id}", headers=user['headers'])
+    assert response.json()['status'] == 'FAILED'
+    return receipt_id
+
+async def test_corrected_receipt_is_not_requeued(client, user, monkeypatch):
+    receipt_id = await dead_letter(client, user, "Staples office\n2025-04-01\nTOTAL 113.00", monkeypatch)
+    assert await summaries(user['user_id']) == []
+    
+    response = await client.patch(
+        f"/api/v1/receipts/{receipt_id}",
+        json={'category': "Office Supplies", 'total_amount': "113.00", 'receipt_date': "2025-04-01"},
+        headers=user['headers']
+    )
+    assert response.status_code == 200, response.text
+    
+    async with get_async_db_session() as db:
+        assert await ReceiptJobQueue.requeue_dead(db, uuid.UUID(receipt_id)) == 0
+    await run_worker()
+    
+    rows = await assert_matches_rebuild(user['user_id'])
+    assert [(row[2], row[3]) for row in rows] == [("Office Supplies", 1)]
+
+async def test_requeued_receipt_is_counted_once(client, user, monkeypatch):
+    receipt_id = await dead_letter(client, user, "Shell gas\n2025-04-20\nTOTAL 65.50", monkeypatch)
+    
+    async with get_async_db_session() as db:
+        assert await ReceiptJobQueue.requeue_dead(db, uuid.UUID(receipt_id)) == 1
+    await run_worker()
+    
+    rows = await assert_matches_rebuild(user['user_id'])
+    assert [(row[2], row[3]) for row in rows] == [("Fuel & Vehicle", 1)]
+    
+    # Edited after processing: moved, not added
+    response = await client.patch(
+        f"/api/v1/receipts/{receipt_id}", json={'receipt_date': "2025-05-02"}, headers=user['headers']
+    )
+    assert response.status_code == 200, response.text
+    rows = await assert_matches_rebuild(user['user_id'])
+    assert [(row[1].month, row[3]) for row in rows] == [(5, 1)]
@@ -0,0 +1,41 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+from app.tax import TaxRulesEngine
+
+# Three provinces, so a date outside one's band would land in a neighbour's
+TAX_RATES = [
+    ('--', date(2008, 1, 1), 0.05, 0.0, 0.0),
+    ('AB', date(2008, 1, 1), 0.05, 0.0, 0.0),
+    ('BC', date(2010, 7, 1), 0.0, 0.12, 0.0),
+    ('BC', date(2013, 4, 1), 0.05, 0.0, 0.07),
+]
+
+def rates_of(engine, province, day):
+    row = engine.rates(engine.province_codes([province]), np.array([day], dtype='datetime64[D]'))[0]
+    return engine._gst[row], engine._hst[row], engine._pst[row]
+
+def test_dates_before_1970_use_the_provinces_first_rates():
+    engine = TaxRulesEngine(tax_rates=TAX_RATES)
+    
+    assert rates_of(engine, 'BC', date(1965, 5, 1)) == (0.0, 0.12, 0.0)
+    assert rates_of(engine, '--', date(1969, 12, 31)) == (0.05, 0.0, 0.0)
+
+def test_rates_follow_the_effective_dates():
+    engine = TaxRulesEngine(tax_rates=TAX_RATES)
+    
+    assert rates_of(engine, 'BC', date(2013, 3, 31)) == (0.0, 0.12, 0.0)
+    assert rates_of(engine, 'BC', date(2013, 4, 1)) == (0.05, 0.0, 0.07)
+    assert rates_of(engine, 'BC', date(2300, 1, 1)) == (0.05, 0.0, 0.07)
+
+def test_evaluate_one_before_1970():
+    engine = TaxRulesEngine()
+    
+    old = engine.evaluate_one(Decimal("113.00"), "Office Supplies", "ON", date(1960, 1, 1), True)
+    first = engine.evaluate_one(Decimal("113.00"), "Office Supplies", "ON", date(2010, 7, 1), True)
+    
+    assert old == first
+    assert old['hst'] == Decimal("13.00")
+    assert old['subtotal'] + old['gst'] + old['hst'] + old['pst'] == Decimal("113.00")
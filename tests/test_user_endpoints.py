@@ -0,0 +1,73 @@
+"""User endpoints that load relationships (run with the lazy-load guard, see conftest)"""
+
+import pytest
+
+from app.core.config import settings
+from app.db import session
+from tests.conftest import register
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def replicas(client, monkeypatch):
+    """One read replica (the primary database under another engine)"""
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URLS", settings.DATABASE_URL)
+    monkeypatch.setattr(session, "_replica_router", None)
+    replica_router = session.get_replica_router()
+    yield replica_router
+    for engine in replica_router.engines:
+        await engine.dispose()
+
+def test_lazy_load_guard_is_on():
+    assert settings.DB_RAISE_ON_LAZY_LOAD
+
+async def test_me_full(client, user):
+    response = await client.get("/api/v1/users/me/full", headers=user['headers'])
+    
+    assert response.status_code == 200, response.text
+    assert response.json()['user_id'] == user['user_id']
+    assert 'profile' in response.json()
+
+async def test_user_full(client, admin):
+    response = await client.get(f"/api/v1/users/{admin['user_id']}/full", headers=admin['headers'])
+    
+    assert response.status_code == 200, response.text
+    assert sorted(role['role_name'] for role in response.json()['roles']) == ["accountant", "admin", "client"]
+
+@pytest.mark.parametrize("query", ["", "?role=admin", "?account_type=business&is_active=true", "?limit=1"])
+async def test_list_users(client, admin, query):
+    response = await client.get(f"/api/v1/users{query}", headers=admin['headers'])
+    
+    assert response.status_code == 200, response.text
+    assert response.json()['items']
+
+async def test_user_cache_key_ignores_id_spelling(client, admin):
+    url = f"/api/v1/users/{admin['user_id'].upper()}"
+    assert (await client.get(url, headers=admin['headers'])).json()['first_name'] == "Test"
+    
+    response = await client.put("/api/v1/users/me", json={'first_name': "Renamed"}, headers=admin['headers'])
+    assert response.status_code == 200, response.text
+    
+    # The update dropped the entry cached under the upper-case spelling too
+    assert (await client.get(url, headers=admin['headers'])).json()['first_name'] == "Renamed"
+
+async def test_recent_write_ignores_id_spelling(client, admin, replicas):
+    other = await register(client)
+    response = await client.put("/api/v1/users/me", json={'first_name': "Renamed"}, headers=other['headers'])
+    assert response.status_code == 200, response.text
+    
+    # Marked under the canonical id, found under any spelling: the read goes to the primary
+    before = dict(replicas.reads)
+    response = await client.get(f"/api/v1/users/{other['user_id'].upper()}", headers=admin['headers'])
+    assert response.json()['first_name'] == "Renamed"
+    assert replicas.reads.get("primary", 0) == before.get("primary", 0) + 1
+    assert replicas.reads.get("replica0", 0) == before.get("replica0", 0)
+    
+    # Non-UUID path parameters aren't looked up (and are a 404 as usual)
+    response = await client.get("/api/v1/users/not-a-uuid", headers=admin['headers'])
+    assert response.status_code == 404
+
+async def test_user_id_not_a_uuid(client, admin):
+    response = await client.get("/api/v1/users/not-a-uuid", headers=admin['headers'])
+    
+    assert response.status_code == 404